@@ -1,18 +1,24 @@
 ''' Main Home Assistant interface Free@Home '''
 import asyncio
 import logging
+import os
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry, SOURCE_IMPORT
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.helpers import event
+from homeassistant.helpers.storage import STORAGE_DIR
 from homeassistant.const import CONF_HOST, CONF_USERNAME, CONF_PASSWORD, CONF_PORT, EVENT_HOMEASSISTANT_STOP
 import homeassistant.helpers.config_validation as cv
 
 from datetime import datetime
 
 from .const import DOMAIN, CONF_USE_ROOM_NAMES, DEFAULT_USE_ROOM_NAMES, CONF_SWITCH_AS_X, DEFAULT_SWITCH_AS_X, BACKWARD_COMPATIBILE_SWITCH_AS_X
+from .const import CONF_STATE_WRITE_WINDOW, DEFAULT_STATE_WRITE_WINDOW
+from .const import CONF_CALLBACK_CONCURRENCY, DEFAULT_CALLBACK_CONCURRENCY, CONF_CALLBACK_TIMEOUT, DEFAULT_CALLBACK_TIMEOUT
+from .const import CONF_UPDATE_WORKER, DEFAULT_UPDATE_WORKER
+from .coalescer import async_get_state_writer
 
 PLATFORMS = [
         "binary_sensor",
@@ -38,6 +44,14 @@ CONFIG_SCHEMA = vol.Schema({
                      default=DEFAULT_USE_ROOM_NAMES): cv.boolean,
         vol.Optional(CONF_SWITCH_AS_X,
                      default=DEFAULT_SWITCH_AS_X): cv.boolean,
+        vol.Optional(CONF_STATE_WRITE_WINDOW,
+                     default=DEFAULT_STATE_WRITE_WINDOW): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_CALLBACK_CONCURRENCY,
+                     default=DEFAULT_CALLBACK_CONCURRENCY): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional(CONF_CALLBACK_TIMEOUT,
+                     default=DEFAULT_CALLBACK_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_UPDATE_WORKER,
+                     default=DEFAULT_UPDATE_WORKER): cv.boolean,
     })
 }, extra=vol.ALLOW_EXTRA)
 
@@ -46,6 +60,11 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup(hass: HomeAssistant, base_config: dict):
     """ Setup of the Free@Home interface for Home Assistant ."""
     hass.data.setdefault(DOMAIN, {})
+
+    # The window applies to all entries, so it is only read from the yaml configuration
+    if DOMAIN in base_config:
+        async_get_state_writer(hass).window = base_config[DOMAIN][CONF_STATE_WRITE_WINDOW]
+
     if DOMAIN not in base_config or hass.config_entries.async_entries(DOMAIN):
         return True
 
@@ -64,6 +83,8 @@ async def async_setup(hass: HomeAssistant, base_config: dict):
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     from .fah import pfreeathome
+    from .fah.dispatch import CallbackDispatcher
+    from .fah.updatepipeline import UpdatePipeline
 
     sysap = pfreeathome.FreeAtHomeSysApp(
             entry.data[CONF_HOST],
@@ -77,7 +98,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.warning("No switch_as_x option found in saved config, consider adding it")
         sysap.switch_as_x = BACKWARD_COMPATIBILE_SWITCH_AS_X
         
+    # Set in the options, or imported from the yaml configuration
+    options = {**entry.data, **entry.options}
+    concurrency = options.get(CONF_CALLBACK_CONCURRENCY, DEFAULT_CALLBACK_CONCURRENCY)
+    if concurrency:
+        timeout = options.get(CONF_CALLBACK_TIMEOUT, DEFAULT_CALLBACK_TIMEOUT)
+        sysap.set_callback_dispatcher(CallbackDispatcher(concurrency, timeout or None))
+    if options.get(CONF_UPDATE_WORKER, DEFAULT_UPDATE_WORKER):
+        sysap.set_update_pipeline(UpdatePipeline())
+
     sysap.component_path = hass.config.path("custom_components")    
+    sysap.cache_path = hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry.entry_id}.config")
 
     await sysap.connect()
     if not await sysap.wait_for_connection():
@@ -112,8 +143,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     sysap.set_auth_failed_callback(_handle_rejected_login)
 
+    def _handle_devices_changed(added, removed):
+        # The entities were created from the cached configuration. Reload so
+        # the platforms add and remove entities for the current one, the
+        # cache is up to date by now.
+        _LOGGER.info("Devices of %s changed, reloading", entry.data[CONF_HOST])
+        hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+
+    sysap.set_devices_changed_callback(_handle_devices_changed)
+
     hass.data[DOMAIN][entry.entry_id] = sysap
 
+    # Changed options take effect on a reload
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, sysap.shutdown)
 
     await sysap.find_devices()
@@ -182,6 +225,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     return True
 
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload the entry with its new options."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -190,9 +237,25 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     # Drop the callback first, so an entry that is being removed cannot open
     # a reauth dialog on the way out.
     sysap.set_auth_failed_callback(None)
+    sysap.set_devices_changed_callback(None)
+    # Also stops the worker thread of the update pipeline
     await sysap.disconnect()
 
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not hass.data[DOMAIN]:
+            async_get_state_writer(hass).async_shutdown()
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the configuration cache of a removed entry."""
+    path = hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entry.entry_id}.config")
+
+    def _remove_cache():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    await hass.async_add_executor_job(_remove_cache)
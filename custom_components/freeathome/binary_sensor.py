@@ -2,6 +2,7 @@
 import logging
 from homeassistant.components.binary_sensor import (BinarySensorEntity, BinarySensorDeviceClass)
 from .const import DOMAIN
+from .coalescer import async_get_state_writer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -72,11 +73,11 @@ class FreeAtHomeBinarySensor(BinarySensorEntity):
     def extra_state_attributes(self):
         """Return specific state attributes."""
         attributes = {}
-        if self.binary_device.window_position == '0':
+        if self.binary_device.window_position == 0:
             attributes["window_position"] = "closed"
-        elif self.binary_device.window_position == '33':
+        elif self.binary_device.window_position == 33:
             attributes["window_position"] = "tilted"
-        elif self.binary_device.window_position == '100':
+        elif self.binary_device.window_position == 100:
             attributes["window_position"] = "open"
 
         return attributes
@@ -86,7 +87,8 @@ class FreeAtHomeBinarySensor(BinarySensorEntity):
 
         async def after_update_callback(device):
             """Call after device was updated."""
-            await self.async_update_ha_state(True)
+            await self.async_update()
+            async_get_state_writer(self.hass).async_schedule(self)
 
         self.binary_device.register_device_updated_cb(after_update_callback)
 
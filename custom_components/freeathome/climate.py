@@ -9,6 +9,7 @@ from homeassistant.const import (ATTR_TEMPERATURE, UnitOfTemperature)
 from homeassistant.helpers import config_validation as cv, entity_platform, service
 
 from .const import DOMAIN
+from .coalescer import async_get_state_writer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -179,7 +180,8 @@ class FreeAtHomeThermostat(ClimateEntity):
 
         async def after_update_callback(device):
             """Call after device was updated."""
-            await self.async_update_ha_state(True)
+            await self.async_update()
+            async_get_state_writer(self.hass).async_schedule(self)
 
         self.thermostat_device.register_device_updated_cb(after_update_callback)
 
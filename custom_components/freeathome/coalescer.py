@@ -0,0 +1,94 @@
+''' Coalesced state writes of the Free@Home entities '''
+import logging
+from collections import Counter
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_STATE_WRITER, DEFAULT_STATE_WRITE_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StateWriteCoalescer:
+    """Collect entities that changed and write their states in one batch.
+
+    A single update message of the SysAP can change dozens of channels, and
+    every changed device would write its state to Home Assistant on its own.
+    Instead the entities are collected, each one at most once, and written
+    together one loop iteration later, or after window seconds if a window is
+    configured. Entities that change again while waiting are written once,
+    with their latest state.
+    """
+
+    def __init__(self, hass: HomeAssistant, window=DEFAULT_STATE_WRITE_WINDOW):
+        self._hass = hass
+        self._window = window
+        self._pending = {}
+        self._flush_handle = None
+
+        # Number of batches per batch size, and the totals over all batches
+        self.batch_sizes = Counter()
+        self.batches = 0
+        self.writes = 0
+        self.requests = 0
+
+    @property
+    def window(self):
+        """Return the time in seconds state writes are collected."""
+        return self._window
+
+    @window.setter
+    def window(self, value):
+        self._window = max(0, value)
+
+    @callback
+    def async_schedule(self, entity):
+        """Write the state of entity with the next batch."""
+        self.requests += 1
+        # A dict keeps the order in which the entities changed first
+        self._pending[entity] = None
+
+        if self._flush_handle is None:
+            if self._window:
+                self._flush_handle = self._hass.loop.call_later(self._window, self._async_flush)
+            else:
+                self._flush_handle = self._hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the pending batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending = {}
+
+    @callback
+    def _async_flush(self):
+        pending = self._pending
+        self._pending = {}
+        self._flush_handle = None
+
+        for entity in pending:
+            try:
+                entity.async_write_ha_state()
+            except Exception:
+                # One broken entity must not hold back the rest of the batch
+                _LOGGER.exception("Error writing state of %s", entity.entity_id)
+
+        size = len(pending)
+        self.batch_sizes[size] += 1
+        self.batches += 1
+        self.writes += size
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Wrote %s states in one batch (%s writes for %s requests in %s batches)",
+                          size, self.writes, self.requests, self.batches)
+
+
+@callback
+def async_get_state_writer(hass: HomeAssistant) -> StateWriteCoalescer:
+    """Return the state writer shared by all Free@Home entities."""
+    writer = hass.data.get(DATA_STATE_WRITER)
+    if writer is None:
+        writer = hass.data[DATA_STATE_WRITER] = StateWriteCoalescer(hass)
+    return writer
@@ -16,9 +16,15 @@ from homeassistant.const import (
 )
 
 from .const import (
+    CONF_CALLBACK_CONCURRENCY,
+    CONF_CALLBACK_TIMEOUT,
     CONF_SWITCH_AS_X,
+    CONF_UPDATE_WORKER,
     CONF_USE_ROOM_NAMES,
+    DEFAULT_CALLBACK_CONCURRENCY,
+    DEFAULT_CALLBACK_TIMEOUT,
     DEFAULT_SWITCH_AS_X,
+    DEFAULT_UPDATE_WORKER,
     DEFAULT_USE_ROOM_NAMES,
     DOMAIN,
 )  # pylint:disable=unused-import
@@ -64,6 +70,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize."""
         self.discovered_conf = {}
 
+    @staticmethod
+    @core.callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow of an entry."""
+        return OptionsFlowHandler()
+
     """ free@home found thru zeroconf """
 
     async def async_step_zeroconf(self, discovery_info: zeroconf.ZeroconfServiceInfo):
@@ -292,6 +304,20 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of an entry, they take effect on a reload."""
+
+    async def async_step_init(self, user_input=None):
+        """Show the options, defaults from the options or the imported yaml configuration."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=_options_schema_with_defaults({**self.config_entry.data, **self.config_entry.options}),
+        )
+
+
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -340,6 +366,25 @@ def _reconfigure_schema_with_defaults(schema_input):
     )
 
 
+def _options_schema_with_defaults(schema_input):
+    return vol.Schema(
+        {
+            vol.Optional(
+                CONF_CALLBACK_CONCURRENCY,
+                default=schema_input.get(CONF_CALLBACK_CONCURRENCY, DEFAULT_CALLBACK_CONCURRENCY),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Optional(
+                CONF_CALLBACK_TIMEOUT,
+                default=schema_input.get(CONF_CALLBACK_TIMEOUT, DEFAULT_CALLBACK_TIMEOUT),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(
+                CONF_UPDATE_WORKER,
+                default=schema_input.get(CONF_UPDATE_WORKER, DEFAULT_UPDATE_WORKER),
+            ): bool,
+        }
+    )
+
+
 def _ordered_shared_schema(schema_input):
     return {
         vol.Required(CONF_USERNAME, default=schema_input.get(CONF_USERNAME, "")): str,
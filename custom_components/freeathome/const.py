@@ -4,4 +4,23 @@ DEFAULT_USE_ROOM_NAMES = False
 
 CONF_SWITCH_AS_X = 'switch_as_x'
 DEFAULT_SWITCH_AS_X = True
-BACKWARD_COMPATIBILE_SWITCH_AS_X = False
\ No newline at end of file
+BACKWARD_COMPATIBILE_SWITCH_AS_X = False
+
+CONF_STATE_WRITE_WINDOW = 'state_write_window'
+# Seconds to collect entity state changes before writing them, 0 writes them
+# one loop iteration after the first change
+DEFAULT_STATE_WRITE_WINDOW = 0
+
+CONF_CALLBACK_CONCURRENCY = 'callback_concurrency'
+# Device updated callbacks that run side by side, 0 runs them one after the other
+DEFAULT_CALLBACK_CONCURRENCY = 0
+CONF_CALLBACK_TIMEOUT = 'callback_timeout'
+# Seconds after which a concurrent callback is cancelled, 0 never cancels it
+DEFAULT_CALLBACK_TIMEOUT = 0
+
+CONF_UPDATE_WORKER = 'update_worker'
+# Decrypt and inflate updates in a worker thread instead of on the event loop
+DEFAULT_UPDATE_WORKER = False
+
+# Not below DOMAIN, that only holds the SysAP of every config entry
+DATA_STATE_WRITER = f"{DOMAIN}_state_writer"
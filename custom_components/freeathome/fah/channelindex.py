@@ -0,0 +1,69 @@
+"""
+Lookup tables of a channel of the SysAP configuration
+"""
+
+
+class ChannelIndex:
+    """Attributes, datapoints and parameters of a channel, read in a single pass.
+
+    Device discovery asks every device class whether it handles a channel and
+    for which pairing and parameter IDs. Searching the channel XML for every
+    one of these IDs scans the same elements over and over, so the channel is
+    indexed once and every query is a dict lookup. Like the searches, the
+    first element wins if an ID occurs more than once.
+
+    The datapoints and parameters of a container ('inputs', 'outputs',
+    'parameters') are only indexed when they are asked for the first time,
+    most channels are not of interest to any device class.
+    """
+
+    __slots__ = ('attributes', '_containers', '_index')
+
+    def __init__(self, channel):
+        # Attribute name -> text
+        self.attributes = {}
+        # Container tag -> element
+        self._containers = {}
+        # (item tag, container tag) -> ID -> number
+        self._index = {}
+
+        for child in channel:
+            if child.tag == 'attribute':
+                self.attributes.setdefault(child.get('name'), child.text)
+            else:
+                self._containers.setdefault(child.tag, child)
+
+    def attribute(self, name):
+        """Return the text of an attribute, '' if there is no such attribute."""
+        return self.attributes.get(name, '')
+
+    def datapoints_by_pairing_ids(self, pairing_ids):
+        """Returns a dict with pairing id as key and datapoint number as value."""
+        return self._lookup('dataPoint', 'pairingId', pairing_ids)
+
+    def parameters_by_parameter_ids(self, parameter_ids):
+        """Returns a dict with parameter id as key and parameter number as value."""
+        return self._lookup('parameter', 'parameterId', parameter_ids)
+
+    def _lookup(self, tag, id_attribute, ids):
+        result = {}
+        for type, ids_for_type in ids.items():
+            numbers = self._index.get((tag, type))
+            if numbers is None:
+                numbers = self._index[(tag, type)] = self._build(tag, id_attribute, type)
+            for id in ids_for_type:
+                number = numbers.get(id)
+                if number is not None:
+                    result[id] = number
+        return result
+
+    def _build(self, tag, id_attribute, type):
+        numbers = {}
+        container = self._containers.get(type)
+        if container is not None:
+            for item in container.iter(tag):
+                id = item.get(id_attribute)
+                # Not every parameter has an ID, those can not be asked for anyway
+                if id is not None:
+                    numbers.setdefault(int(id, 16), item.get('i'))
+        return numbers
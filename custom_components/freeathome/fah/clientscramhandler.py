@@ -4,6 +4,8 @@ import base64
 import hmac
 import logging
 
+from .keycache import DERIVED_KEYS
+
 log = logging.getLogger(__name__)
 
 
@@ -118,9 +120,7 @@ class ClientScramHandler:
         return scram_string[bc + 2 : bd]
 
     def createClientKey(self, password):
-        bj = hashlib.pbkdf2_hmac(
-            "sha256", bytes(password, "utf8"), self.salt, self.iterations
-        )
+        bj = DERIVED_KEYS.derive(password, self.salt, self.iterations)
         if bj is None or len(bj) <= 0:
             raise Exception("__createClientKey: PBKDF2_HMAC_SHA256 failed")
 
@@ -133,9 +133,7 @@ class ClientScramHandler:
         return bg
 
     def createServerKey(self, password):
-        bn = hashlib.pbkdf2_hmac(
-            "sha256", bytes(password, "utf8"), self.salt, self.iterations
-        )
+        bn = DERIVED_KEYS.derive(password, self.salt, self.iterations)
         if bn is None or len(bn) <= 0:
             raise Exception("__createServerKey: PBKDF2_HMAC_SHA256 failed")
 
@@ -0,0 +1,165 @@
+"""
+Decoding of the datapoint and parameter values the SysAP sends
+"""
+import functools
+import re
+
+from .const import (
+        PID_INFO_ON_OFF,
+        PID_SYSAP_INFO_ON_OFF,
+        PID_INFO_ACTUAL_DIMMING_VALUE,
+        PID_SYSAP_INFO_ACTUAL_DIMMING_VALUE,
+        PID_INFO_COLOR_TEMPERATURE,
+        PID_INFO_RGB,
+        PID_CURRENT_ABSOLUTE_POSITION_BLINDS_PERCENTAGE,
+        PID_CURRENT_ABSOLUTE_POSITION_SLATS_PERCENTAGE,
+        PID_SET_VALUE_TEMPERATURE,
+        PID_CONTROLLER_ON_OFF,
+        PID_STATUS_INDICATION,
+        PID_MEASURED_TEMPERATURE,
+        PID_HEATING_DEMAND,
+        PID_INFO_VALUE_HEATING,
+        PID_INFO_VALUE_COOLING,
+        PID_MEASURED_HUMIDITY,
+        PID_MEASURED_VOC,
+        PID_MEASURED_CO2,
+        PID_MEASURED_BRIGHTNESS,
+        PID_OUTDOOR_TEMPERATURE,
+        PID_WIND_FORCE,
+        PID_WIND_SPEED,
+        PID_RAIN_ALARM,
+        PID_WINDOW_DOOR_POSITION,
+        PARAM_TEMPERATURE_CORRECTION,
+    )
+
+# The SysAP sends few distinct values, so the decoded value of a string is kept
+CACHE_SIZE = 1024
+
+
+def cached(decode):
+    """Keep the results of a codec for repeated strings. Results must be immutable."""
+    return functools.lru_cache(maxsize=CACHE_SIZE)(decode)
+
+
+@cached
+def decode_on_off(value):
+    """'1' is on, everything else off."""
+    return value == '1'
+
+
+@cached
+def decode_int(value):
+    """An integer, sent with or without decimals."""
+    return int(float(value))
+
+
+@cached
+def decode_float(value):
+    return float(value)
+
+
+@cached
+def decode_rgb(value):
+    """Parse various RGB formats to an integer (R<<16 | G<<8 | B).
+
+    Accepts:
+    - decimal string (e.g. "16711680")
+    - hex string with 0x or # prefix (e.g. "0xFF0000", "#FF0000")
+    - plain hex string (e.g. "FF0000")
+    - CSV/space/semicolon separated "R,G,B" (e.g. "255,0,0")
+
+    Raises ValueError for anything else.
+    """
+    v = value.strip()
+
+    # Hex with 0x prefix
+    if v.startswith(('0x', '0X')):
+        return int(v, 16)
+
+    # Hex with # prefix
+    if v.startswith('#'):
+        return int(v[1:], 16)
+
+    # Decimal integer string
+    try:
+        return int(v)
+    except ValueError:
+        pass
+
+    # CSV / space / semicolon separated R G B
+    if any(sep in v for sep in (',', ';')) or re.search(r"\s+", v):
+        parts = re.split(r'[,;\s]+', v)
+        if len(parts) == 3:
+            r, g, b = (int(p) for p in parts)
+            return (r << 16) | (g << 8) | b
+
+    # Plain hex (e.g. "FF0000")
+    if re.fullmatch(r'[0-9a-fA-F]+', v):
+        return int(v, 16)
+
+    raise ValueError('unknown rgb format: %r' % value)
+
+
+class CodecRegistry:
+    """Codecs by pairing ID (or parameter ID).
+
+    A codec turns the string the SysAP sends into a typed value, the devices
+    only ever see the decoded value. IDs without a codec are passed on as
+    they are.
+    """
+
+    def __init__(self):
+        self._codecs = {}
+
+    def register(self, id, codec):
+        """Decode the values of id with codec."""
+        self._codecs[id] = codec
+
+    def get(self, id):
+        """Return the codec of id, None if its values are not decoded."""
+        return self._codecs.get(id)
+
+    def decode(self, id, value):
+        """Return the decoded value of id."""
+        codec = self._codecs.get(id)
+        return value if codec is None else codec(value)
+
+
+DATAPOINT_CODECS = CodecRegistry()
+PARAMETER_CODECS = CodecRegistry()
+
+for pairing_id in (PID_INFO_ON_OFF, PID_SYSAP_INFO_ON_OFF, PID_CONTROLLER_ON_OFF):
+    DATAPOINT_CODECS.register(pairing_id, decode_on_off)
+
+for pairing_id in (
+        PID_INFO_ACTUAL_DIMMING_VALUE,
+        PID_SYSAP_INFO_ACTUAL_DIMMING_VALUE,
+        PID_INFO_COLOR_TEMPERATURE,
+        PID_CURRENT_ABSOLUTE_POSITION_BLINDS_PERCENTAGE,
+        PID_CURRENT_ABSOLUTE_POSITION_SLATS_PERCENTAGE,
+        # Bit field, bit 2 is eco mode
+        PID_STATUS_INDICATION,
+        PID_WIND_FORCE,
+        PID_RAIN_ALARM,
+        PID_WINDOW_DOOR_POSITION,
+        ):
+    DATAPOINT_CODECS.register(pairing_id, decode_int)
+
+for pairing_id in (
+        PID_SET_VALUE_TEMPERATURE,
+        PID_MEASURED_TEMPERATURE,
+        PID_HEATING_DEMAND,
+        PID_INFO_VALUE_HEATING,
+        PID_INFO_VALUE_COOLING,
+        PID_MEASURED_HUMIDITY,
+        PID_MEASURED_VOC,
+        PID_MEASURED_CO2,
+        PID_MEASURED_BRIGHTNESS,
+        PID_OUTDOOR_TEMPERATURE,
+        PID_WIND_SPEED,
+        ):
+    DATAPOINT_CODECS.register(pairing_id, decode_float)
+
+DATAPOINT_CODECS.register(PID_INFO_RGB, decode_rgb)
+
+PARAMETER_CODECS.register(PARAM_TEMPERATURE_CORRECTION, decode_float)
@@ -0,0 +1,153 @@
+"""
+Persistent cache of the devices found in the SysAP configuration, and their state
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import zlib
+
+LOG = logging.getLogger(__name__)
+
+# Increase when the format of the cache file or of the device table changes
+CACHE_VERSION = 2
+
+
+def config_digest(config):
+    """Return the digest that identifies a configuration."""
+    return hashlib.sha256(config.encode('utf-8')).hexdigest()
+
+
+def device_entry(fah_class, serialnumber, channel_id, function_id, name, device_info, datapoints, parameters):
+    """Return the device table entry of a device, everything needed to create it."""
+    device_info = dict(device_info)
+    device_info['identifiers'] = sorted(list(identifier) for identifier in device_info['identifiers'])
+    return {
+            'class': fah_class.__name__,
+            'serialnumber': serialnumber,
+            'channel_id': channel_id,
+            'function_id': function_id,
+            'name': name,
+            'device_info': device_info,
+            # As pairs, JSON would turn the numeric pairing IDs into strings
+            'datapoints': sorted(datapoints.items()),
+            'parameters': sorted(parameters.items()),
+            }
+
+
+def describe_device(device):
+    """Return the device table entry of a device, everything needed to create it again."""
+    return device_entry(
+            type(device),
+            device.serialnumber,
+            device.channel_id,
+            device.function_id,
+            device.name,
+            device.device_info,
+            device.datapoints,
+            device.parameters)
+
+
+def device_key(entry):
+    """Return a key that is equal for equal device table entries."""
+    return json.dumps(entry, sort_keys=True)
+
+
+def restore_device(fah_class, client, entry, device_infos=None):
+    """Create the device of a device table entry.
+
+    The channels of a device have the same device info. If device_infos is
+    given, it maps serial numbers to the device info that is shared by them.
+    """
+    device_info = None if device_infos is None else device_infos.get(entry['serialnumber'])
+    if device_info is None:
+        device_info = dict(entry['device_info'])
+        device_info['identifiers'] = {tuple(identifier) for identifier in device_info['identifiers']}
+        if device_infos is not None:
+            device_infos[entry['serialnumber']] = device_info
+    return fah_class(
+            client,
+            device_info,
+            entry['serialnumber'],
+            entry['channel_id'],
+            entry['function_id'],
+            entry['name'],
+            datapoints=dict(entry['datapoints']),
+            parameters=dict(entry['parameters']))
+
+
+def read_cache(path, settings):
+    """Return the contents of the cache file at path, None if there is no usable cache.
+
+    Reading, inflating and decoding a cache blocks, so this runs in an
+    executor, in a thread or in another process.
+    """
+    try:
+        with open(path, mode='rb') as f:
+            cache = json.loads(zlib.decompress(f.read()))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, zlib.error) as error:
+        LOG.warning("Ignoring unreadable configuration cache %s: %s", path, error)
+        return None
+
+    if cache.get('version') != CACHE_VERSION or cache.get('settings') != settings:
+        LOG.info("Ignoring configuration cache %s, it was written with other settings", path)
+        return None
+
+    return cache
+
+
+def write_cache(path, cache, config):
+    """Store the contents of a cache with the digest of config in the file at path, return the digest.
+
+    Runs in an executor like read_cache.
+    """
+    cache['digest'] = config_digest(config)
+    data = zlib.compress(json.dumps(cache).encode('utf-8'))
+
+    try:
+        with open(path, mode='wb') as f:
+            f.write(data)
+    except OSError as error:
+        LOG.warning("Cannot write configuration cache %s: %s", path, error)
+
+    return cache['digest']
+
+
+class ConfigCache:
+    """The digest of the last configuration read from the SysAP, the device table and the state derived from it.
+
+    They are stored together in one zlib compressed JSON file, next to the
+    settings they were derived with. A cache written with other settings, or
+    by another version of this module, is ignored. The state is kept as
+    (serialnumber, channel_id, datapoint_id, value) tuples, so a restart from
+    the cache does not parse any XML. The file is read and written in
+    executor, None is the default executor of the loop.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.digest = None
+
+    async def load(self, settings, executor=None):
+        """Return (device table, state) of the cache, or None if there is no usable cache."""
+        loop = asyncio.get_running_loop()
+        cache = await loop.run_in_executor(executor, read_cache, self.path, settings)
+        if cache is None:
+            return None
+
+        self.digest = cache['digest']
+        return cache['devices'], cache['state']
+
+    async def save(self, settings, config, devices, state, executor=None):
+        """Store the digest of the configuration, the device table of devices and their state."""
+        cache = {
+                'version': CACHE_VERSION,
+                'settings': settings,
+                'devices': sorted((describe_device(device) for device in devices), key=device_key),
+                'state': state,
+                }
+
+        loop = asyncio.get_running_loop()
+        self.digest = await loop.run_in_executor(executor, write_cache, self.path, cache, config)
@@ -1,10 +1,4 @@
-import hashlib
-from .pure_pynacl import (
-    crypto_onetimeauth_poly1305_tweet as crypto_onetimeauth,
-    crypto_onetimeauth_poly1305_tweet_verify as crypto_onetimeauth_verify,
-    IntArray,
-)
-from .pure_pynacl import tweetnacl
+from .poly1305 import load_backend
 from nacl.bindings.crypto_box import crypto_box_keypair
 from nacl.hash import generichash
 from nacl.utils import random
@@ -24,6 +18,8 @@ import base64
 from .messagereader import MessageReader
 from .messagewriter import MessageWriter
 from .clientscramhandler import ClientScramHandler
+from .keycache import DERIVED_KEYS
+from .replaywindow import ReplayWindow
 from .constants import General, Result, FAHMessage
 
 log = logging.getLogger(__name__)
@@ -31,6 +27,11 @@ crypto_box_MACBYTES = crypto_box_ZEROBYTES - crypto_box_BOXZEROBYTES
 
 
 class Crypto:
+    # Poly1305 of the key exchange, libsodium if available, see load_backend
+    poly1305 = load_backend()
+    # Number of sequence numbers below the highest received that may still arrive late
+    replay_window = 64
+
     def __init__(self, jid, password, iterations, salt):
         self.jid = jid
         self.password = password
@@ -50,9 +51,7 @@ class Crypto:
 
     # complete
     def generateSharedKey(self):
-        return hashlib.pbkdf2_hmac(
-            "sha256", bytes(self.password, "utf-8"), self.salt, self.iterations
-        )
+        return DERIVED_KEYS.derive(self.password, self.salt, self.iterations)
 
         # complete
 
@@ -72,9 +71,7 @@ class Crypto:
         if generic_hash is None:
             raise Error("generic hash undefined")
 
-        tok = IntArray(tweetnacl.u8, size=32)
-        crypto_onetimeauth(tok, m=self.publicKey, n=len(self.publicKey), k=generic_hash)
-        token = bytes(tok[:16])
+        token = self.poly1305.auth(self.publicKey, generic_hash)
 
         if len(self.publicKey) + len(key) + len(token) != 64:
             raise Error("Unexpected token size")
@@ -183,7 +180,7 @@ class Crypto:
         if keyHash is None:
             return False
 
-        result = crypto_onetimeauth_verify(token, message2, len(message2), keyHash)
+        result = self.poly1305.verify(token, message2, keyHash)
 
         return result
 
@@ -195,52 +192,58 @@ class Crypto:
         if data_bytes is None or len(data_bytes) == 0:
             raise Exception("Can not decrypt empty pubsub")
 
+        nonceNumber = MessageReader(data_bytes[16:24]).readUint64()
+        self.checkPubSubSequence(nonceNumber)
+
+        pubSubMessage = self.openPubSub(data_bytes)
+
+        self.acceptPubSubSequence(nonceNumber)
+        return pubSubMessage
+
+    def pubSubSequence(self, data):
+        """Return the sequence number of a base64 encoded pubsub message, decoding only its nonce."""
+        nonce = base64.b64decode(data[:32])
+        if len(nonce) < crypto_box_NONCEBYTES:
+            raise Exception("Can not decrypt empty pubsub")
+
+        return MessageReader(nonce[16:24]).readUint64()
+
+    def checkPubSubSequence(self, nonceNumber):
+        """Raise if a pubsub message with the sequence number would be a replay, without recording it."""
+        window = self.__pubSubWindow()
+        if not window.check(nonceNumber):
+            self.__rejectSequence(window, nonceNumber)
+
+    def acceptPubSubSequence(self, nonceNumber):
+        """Record the sequence number of a pubsub message that was decrypted, in message order.
+
+        Only authenticated messages may move the window, a forged nonce with a
+        high sequence number would have every later update rejected otherwise.
+        """
+        window = self.__pubSubWindow()
+        if not window.accept(nonceNumber):
+            self.__rejectSequence(window, nonceNumber)
+
+    def __pubSubWindow(self):
+        window = self.__Yq.get("update")
+        if window is None:
+            # No sequence number in the key data, accept the first one received
+            window = self.__Yq["update"] = ReplayWindow(self.replay_window)
+        return window
+
+    def __rejectSequence(self, window, nonceNumber):
+        raise Exception(
+            "Unexpected sequence in received symmetric nonce ",
+            nonceNumber,
+            "(",
+            window.next_sequence,
+            ")",
+        )
+
+    def openPubSub(self, data_bytes):
+        """Return the decrypted pubsub message of the decoded data, its sequence must have been checked."""
         nonce = data_bytes[0:crypto_box_NONCEBYTES]
 
-        messageReader = MessageReader(data_bytes[16:24])
-        nonceNumber = messageReader.readUint64()
-        if "update" not in self.__Yq:
-            self.__Yq["update"] = {}
-            self.__Yq["update"][
-                "sequenceCounter"
-            ] = "cU"  # Was this supposed to be cU (without quotes)?
-            self.__Yq["update"]["skippedSymmetricSequences"] = []
-
-        sequenceNumber = self.__Yq["update"]["sequenceCounter"]
-        if nonceNumber < sequenceNumber:
-            if nonceNumber not in self.__Yq["update"]["skippedSymmetricSequences"]:
-                raise Exception(
-                    "Unexpected sequence in received symmetric nonce ",
-                    nonceNumber,
-                    "(",
-                    sequenceNumber,
-                    ")",
-                )
-
-            self.__Yq["update"]["skippedSymmetricSequences"].remove(nonceNumber)
-
-        if nonceNumber > sequenceNumber:
-            c = nonceNumber - sequenceNumber - 1
-            if c > 16:
-                c = 16
-
-            x = nonceNumber - 1
-            for i in range(c):
-                if x == 0:
-                    break
-
-            self.__Yq["update"]["skippedSymmetricSequences"].append(x)
-            x -= x
-
-            if len(self.__Yq["update"]["skippedSymmetricSequences"]) > 32:
-                a = sorted(
-                    self.__Yq["update"]["skippedSymmetricSequences"]
-                )  # returns list
-                dK = len(a) - 32
-                for i in range(dK):
-                    self.__Yq["update"]["skippedSymmetricSequences"].remove(a[i])
-
-        self.__Yq["update"]["sequenceCounter"] += 1
         pubSubMessage = crypto_secretbox_open(
             data_bytes[crypto_box_NONCEBYTES:], nonce, self.__Key
         )
@@ -371,9 +374,7 @@ class Crypto:
                     cR = cR[0 : len(cR) - 10]
 
                 cU = keyData.readUint64()
-                self.__Yq[cR] = {}
-                self.__Yq[cR]["sequenceCounter"] = cU
-                self.__Yq[cR]["skippedSymmetricSequences"] = []
+                self.__Yq[cR] = ReplayWindow(self.replay_window, start=cU)
 
             self.__Yv = True
 
@@ -41,43 +41,52 @@ LOG = logging.getLogger(__name__)
 CYCLIC_PERIOD = 840.0
 CYCLIC_TOLERANCE = 2.0
 
+BINARY_SENSOR_OUTPUTS = [
+        PID_SWITCH_ON_OFF,
+        # Add timed start/stop, even though in tests it only ever showed value '1'
+        PID_TIMED_START_STOP,
+        PID_FORCE_POSITION,
+        # Keep scene control here, although in tests it never showed up
+        #PID_SCENE_CONTROL,
+        PID_RELATIVE_SET_VALUE,
+        PID_MOVE_UP_DOWN,
+        PID_ADJUST_UP_DOWN,
+        PID_WIND_ALARM,
+        PID_FROST_ALARM,
+        PID_RAIN_ALARM,
+        PID_BRIGHTNESS_ALARM,
+        PID_FORCE_POSITION_BLIND,
+        PID_WINDOW_DOOR,
+        PID_WINDOW_DOOR_POSITION,
+        PID_SWITCHOVER_HEATING_COOLING,
+        # Keep movement detector here, although in tests it only ever showed value '1'
+        PID_MOVEMENT_UNDER_CONSIDERATION_OF_BRIGHTNESS,
+        PID_PRESENCE,
+        PID_FIRE_ALARM_ACTIVE,
+        PID_CO_ALARM_ACTIVE,
+]
+
 
 class FahBinarySensor(FahDevice):
     """Free@Home binary object """
-    state = None
-    window_position = None
-    # Created lazily per instance on the first telegram (deliberately NOT a
-    # dict literal here: that would be a class attribute shared by all sensors).
-    _cyclic_last = None
+    # _cyclic_last is created lazily on the first telegram, most sensors never get one
+    __slots__ = ('state', 'window_position', '_cyclic_last')
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(FUNCTION_IDS_BINARY_SENSOR + FUNCTION_IDS_WEATHER_STATION)
+
+    datapoint_handlers = {pairing_id: ('_update_state', 'state') for pairing_id in BINARY_SENSOR_OUTPUTS}
+    # The window position is a value of its own, not a repetition prone on/off state
+    datapoint_handlers[PID_WINDOW_DOOR_POSITION] = ('_set_value', 'window_position')
+
+    # The on/off state is stored, and its repetitions detected, as sent
+    raw_pairing_ids = frozenset(BINARY_SENSOR_OUTPUTS) - {PID_WINDOW_DOOR_POSITION}
 
     def pairing_ids(function_id=None):
         if function_id in FUNCTION_IDS_BINARY_SENSOR:
             return {
                     "inputs": [],
-                    "outputs": [
-                        PID_SWITCH_ON_OFF,
-                        # Add timed start/stop, even though in tests it only ever showed value '1'
-                        PID_TIMED_START_STOP,
-                        PID_FORCE_POSITION,
-                        # Keep scene control here, although in tests it never showed up
-                        #PID_SCENE_CONTROL,
-                        PID_RELATIVE_SET_VALUE,
-                        PID_MOVE_UP_DOWN,
-                        PID_ADJUST_UP_DOWN,
-                        PID_WIND_ALARM,
-                        PID_FROST_ALARM,
-                        PID_RAIN_ALARM,
-                        PID_BRIGHTNESS_ALARM,
-                        PID_FORCE_POSITION_BLIND,
-                        PID_WINDOW_DOOR,
-                        PID_WINDOW_DOOR_POSITION,
-                        PID_SWITCHOVER_HEATING_COOLING,
-                        # Keep movement detector here, although in tests it only ever showed value '1'
-                        PID_MOVEMENT_UNDER_CONSIDERATION_OF_BRIGHTNESS,
-                        PID_PRESENCE,
-                        PID_FIRE_ALARM_ACTIVE,
-                        PID_CO_ALARM_ACTIVE,
-                        ]
+                    "outputs": BINARY_SENSOR_OUTPUTS,
                     }
         elif function_id in FUNCTION_IDS_WEATHER_STATION:
             return {
@@ -115,11 +124,14 @@ class FahBinarySensor(FahDevice):
 
     def update_datapoint(self, dp, value):
         """Receive updated datapoint."""
-        if self._datapoints.get(PID_WINDOW_DOOR_POSITION) == dp:
-            self.window_position = value
-            LOG.info("binary sensor %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-            return
-
+        # Every datapoint, but the window position, reports the on/off state
+        if dp in self.datapoint_routes:
+            super().update_datapoint(dp, value)
+        else:
+            self._update_state('state', dp, value)
+
+    def _update_state(self, attribute, dp, value):
+        """Store the on/off state, unless the telegram is a cyclic repetition."""
         if self._is_cyclic_repeat(dp, value):
             LOG.debug("binary sensor %s (%s) dp %s: cyclic repeat of value %s ignored",
                       self.name, self.lookup_key, dp, value)
@@ -135,6 +147,3 @@ class FahBinarySensor(FahDevice):
     def is_co_sensor(self):
         """Return true if device is a dimmer"""
         return PID_CO_ALARM_ACTIVE in self._datapoints
-
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
@@ -38,10 +38,22 @@ class FahCover(FahDevice):
     In freeathome the value 100 indicates that the cover is fully closed
     In home assistant the value 100 indicates that the cover is fully open
     """
-    state = None
-    position = None
-    tilt_position = None
-    forced_position = None
+    # Positions are integers, in the sense of home assistant
+    __slots__ = ('state', 'position', 'tilt_position', 'forced_position')
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(
+            FUNCTION_IDS_BLIND_ACTUATOR +
+            FUNCTION_IDS_ATTIC_WINDOW_ACTUATOR +
+            FUNCTION_IDS_AWNING_ACTUATOR +
+            FUNCTION_IDS_SHUTTER_ACTUATOR)
+
+    datapoint_handlers = {
+            PID_INFO_MOVE_UP_DOWN: ('_set_value', 'state'),
+            PID_CURRENT_ABSOLUTE_POSITION_BLINDS_PERCENTAGE: ('_set_inverted_percentage', 'position'),
+            PID_CURRENT_ABSOLUTE_POSITION_SLATS_PERCENTAGE: ('_set_inverted_percentage', 'tilt_position'),
+            PID_FORCE_POSITION_INFO: ('_set_value', 'forced_position'),
+            }
 
     def pairing_ids(function_id=None):
         if function_id in FUNCTION_IDS_BLIND_ACTUATOR or \
@@ -80,7 +92,7 @@ class FahCover(FahDevice):
     def is_cover_closed(self):
         """ Return if the cover is closed   """
         if self.supports_position():
-            return int(self.position) == 0
+            return self.position == 0
 
         return None
 
@@ -95,29 +107,31 @@ class FahCover(FahDevice):
     def get_cover_position(self):
         """ Return the cover position """
         if self.supports_position():
-            return int(self.position)
+            return self.position
 
     def get_cover_tilt_position(self):
         """ Return the cover position """
         if self.supports_tilt_position():
-            return int(self.tilt_position)
+            return self.tilt_position
 
     def get_forced_cover_position(self):
         """Return forced cover position."""
         if self.supports_forced_position():
             return FORCE_POSITION_STATES.get(self.forced_position)
 
-    async def set_cover_position(self, position):
-        """ Set the cover position  """
-        if PID_SET_ABSOLUTE_POSITION_BLINDS in self._datapoints:
-            dp = self._datapoints[PID_SET_ABSOLUTE_POSITION_BLINDS]
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, dp, str(abs(100 - position)))
+    async def set_cover_position(self, position, tilt_position=None):
+        """ Set the cover position, and the tilt position if given  """
+        async with self.transaction() as transaction:
+            if PID_SET_ABSOLUTE_POSITION_BLINDS in self._datapoints:
+                transaction.set(PID_SET_ABSOLUTE_POSITION_BLINDS, str(abs(100 - position)))
+            if tilt_position is not None and PID_SET_ABSOLUTE_POSITION_SLATS in self._datapoints:
+                transaction.set(PID_SET_ABSOLUTE_POSITION_SLATS, str(abs(100 - tilt_position)))
 
     async def set_cover_tilt_position(self, tilt_position):
         """ Set the cover tilt position  """
-        if PID_SET_ABSOLUTE_POSITION_SLATS in self._datapoints:
-            dp = self._datapoints[PID_SET_ABSOLUTE_POSITION_SLATS]
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, dp, str(abs(100 - tilt_position)))
+        async with self.transaction() as transaction:
+            if PID_SET_ABSOLUTE_POSITION_SLATS in self._datapoints:
+                transaction.set(PID_SET_ABSOLUTE_POSITION_SLATS, str(abs(100 - tilt_position)))
 
     async def set_forced_cover_position(self, forced_position):
         """Set forced cover position."""
@@ -171,26 +185,7 @@ class FahCover(FahDevice):
         else:
             return None
 
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if self._datapoints.get(PID_INFO_MOVE_UP_DOWN) == dp:
-            self.state = value
-            LOG.info("cover device %s (%s) dp %s state %s", self.name, self.lookup_key, dp, self.state)
-
-        elif self._datapoints.get(PID_CURRENT_ABSOLUTE_POSITION_BLINDS_PERCENTAGE) == dp:
-            self.position = str(abs(100 - int(float(value))))
-            LOG.info("cover device %s (%s) dp %s position %s", self.name, self.lookup_key, dp, value)
-
-        elif self._datapoints.get(PID_CURRENT_ABSOLUTE_POSITION_SLATS_PERCENTAGE) == dp:
-            self.tilt_position = str(abs(100 - int(float(value))))
-            LOG.info("cover device %s (%s) dp %s tilt position %s", self.name, self.lookup_key, dp, value)
-
-        elif self._datapoints.get(PID_FORCE_POSITION_INFO) == dp:
-            self.forced_position = value
-            LOG.info("cover device %s (%s) dp %s forced position %s", self.name, self.lookup_key, dp, value)
-
-        else:
-            LOG.info("cover device %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
+    def _set_inverted_percentage(self, attribute, dp, value):
+        """Store a position, free@home counts from closed (100) to open (0)."""
+        setattr(self, attribute, None if value is None else abs(100 - value))
+        LOG.info("cover device %s (%s) dp %s %s %s", self.name, self.lookup_key, dp, attribute, value)
@@ -1,5 +1,159 @@
+import logging
+import sys
+
+from ..codec import DATAPOINT_CODECS, PARAMETER_CODECS
+
+LOG = logging.getLogger(__name__)
+
+# Datapoint (and parameter) maps by their items. Channels of the same kind have
+# equal maps, so a map is stored once and shared by every device that has it.
+_SHARED_MAPS = {}
+
+# (class, handlers, map items) -> routes, shared like the maps
+_SHARED_ROUTES = {}
+
+
+def shared_map(ids):
+    """Return the shared, equal map of pairing (or parameter) ID -> number. It must not be changed."""
+    key = tuple(sorted(ids.items()))
+    shared = _SHARED_MAPS.get(key)
+    if shared is None:
+        shared = _SHARED_MAPS[key] = {id: sys.intern(number) if isinstance(number, str) else number
+                                      for id, number in ids.items()}
+    return shared
+
+
+class DatapointTransaction:
+    """Datapoint writes of a device that are sent together.
+
+    Writes are staged with set and sent by commit, or when leaving the
+    transaction as async context manager without an exception. A datapoint
+    that is staged more than once is only sent once, with the last value.
+    """
+
+    def __init__(self, device):
+        self._device = device
+        self._writes = {}
+        self.replaced = 0
+
+    def set(self, pairing_id, value):
+        """Stage a write of value to the datapoint with pairing_id."""
+        self.set_datapoint(self._device._datapoints[pairing_id], value)
+
+    def set_datapoint(self, datapoint, value):
+        """Stage a write of value to datapoint."""
+        if datapoint in self._writes:
+            self.replaced += 1
+        self._writes[datapoint] = value
+
+    @property
+    def writes(self):
+        """Return the staged datapoint -> value writes."""
+        return self._writes
+
+    async def commit(self):
+        """Send the staged writes, return when all were answered."""
+        writes = self._writes
+        self._writes = {}
+        if writes:
+            device = self._device
+            await device.client.set_datapoints(device.serialnumber, device.channel_id, writes)
+
+    def rollback(self):
+        """Forget the staged writes."""
+        self._writes = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            await self.commit()
+        else:
+            self.rollback()
+
+
+class DeviceRegistry:
+    """Device classes by the function IDs of the channels they handle.
+
+    Every FahDevice subclass with function_ids registers itself when it is
+    defined. Classifying a channel is then one lookup of its function ID,
+    instead of asking every class. The pairing IDs the classes return are
+    cached per function ID.
+    """
+
+    def __init__(self):
+        self.classes = []
+        self._by_function_id = {}
+        self._specs = {}
+
+    def register(self, fah_class):
+        """Add a device class, in the order classes are asked."""
+        self.classes.append(fah_class)
+        for function_id in fah_class.function_ids:
+            self._by_function_id.setdefault(function_id, []).append(fah_class)
+        self._specs.clear()
+
+    def unregister(self, fah_class):
+        """Remove a device class."""
+        self.classes.remove(fah_class)
+        for function_id in fah_class.function_ids:
+            classes = self._by_function_id[function_id]
+            classes.remove(fah_class)
+            if not classes:
+                del self._by_function_id[function_id]
+        self._specs.clear()
+
+    def candidates(self, function_id):
+        """Return the classes that may handle a channel with function_id."""
+        return self._by_function_id.get(function_id, ())
+
+    def classify(self, function_id, switch_as_x=False):
+        """Return (class, pairing IDs) of all classes that handle a channel with function_id."""
+        key = (function_id, switch_as_x)
+        specs = self._specs.get(key)
+        if specs is None:
+            specs = []
+            for fah_class in self.candidates(function_id):
+                pairing_ids = fah_class.device_pairing_ids(function_id, switch_as_x)
+                if pairing_ids is not None:
+                    specs.append((fah_class, pairing_ids))
+            specs = self._specs[key] = tuple(specs)
+        return specs
+
+
+DEVICE_REGISTRY = DeviceRegistry()
+
+
 class FahDevice:
-    """ Free@Home base object """
+    """ Free@Home base object
+
+    Devices use __slots__, an installation has thousands of them. The state
+    attributes of a subclass are slots too, they are None until the SysAP sends
+    a value. Datapoint and parameter maps and the routes derived from them are
+    shared between devices, see shared_map.
+    """
+
+    __slots__ = ('_device_info', '_serialnumber', '_channel_id', '_function_id', '_name', '_client',
+                 '_device_updated_cbs', '_datapoints', '_parameters', '_datapoint_routes', '_parameter_routes')
+
+    # The slots of the subclasses, set to None by __init__
+    _state_slots = ()
+
+    # Function IDs of the channels a subclass may handle. A subclass that sets
+    # them is added to DEVICE_REGISTRY and considered during discovery.
+    function_ids = frozenset()
+
+    # Pairing IDs of the datapoints and parameter IDs of the parameters that carry state, mapped to
+    # the name of the method that handles an update and the attribute that receives the value.
+    # The client routes updates straight to these handlers, see datapoint_routes. Handlers are
+    # called as handler(device, attribute, datapoint, value), with the value decoded by the
+    # codec of its pairing ID, see DATAPOINT_CODECS.
+    datapoint_handlers = {}
+    parameter_handlers = {}
+
+    # Pairing IDs whose values the subclass takes as sent, without decoding
+    raw_pairing_ids = frozenset()
 
     def __init__(self, client, device_info, serialnumber, channel_id, function_id, name, datapoints: dict[str, str]={},parameters={}, device_updated_cb=None):
         self._device_info = device_info
@@ -8,22 +162,113 @@ class FahDevice:
         self._function_id = function_id
         self._name = name
         self._client = client
-        self._device_updated_cbs = []
-        self._datapoints: dict[str, str] = datapoints
-        self._parameters = parameters
+        self._device_updated_cbs = ()
+        self._datapoints: dict[str, str] = shared_map(datapoints)
+        self._parameters = shared_map(parameters)
+        self._datapoint_routes = self._build_routes(self.datapoint_handlers, self._datapoints, DATAPOINT_CODECS)
+        self._parameter_routes = self._build_routes(self.parameter_handlers, self._parameters, PARAMETER_CODECS)
+        for name in self._state_slots:
+            setattr(self, name, None)
         if device_updated_cb is not None:
             self.register_device_updated_cb(device_updated_cb)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'function_ids' in cls.__dict__ and cls.function_ids:
+            DEVICE_REGISTRY.register(cls)
+        cls._state_slots = cls._state_slots + tuple(cls.__dict__.get('__slots__', ()))
+
+    @classmethod
+    def device_pairing_ids(cls, function_id, switch_as_x=False):
+        """Return the pairing IDs of a channel with function_id, None if it is not handled."""
+        return cls.pairing_ids(function_id)
+
     def register_device_updated_cb(self, device_updated_cb):
         """Register device updated callback."""
-        self._device_updated_cbs.append(device_updated_cb)
+        self._device_updated_cbs += (device_updated_cb,)
 
     def unregister_device_cb(self, device_updated_cb):
         """Unregister device updated callback."""
-        self._device_updated_cbs.remove(device_updated_cb)
+        callbacks = list(self._device_updated_cbs)
+        callbacks.remove(device_updated_cb)
+        self._device_updated_cbs = tuple(callbacks)
+
+    def _build_routes(self, handlers, ids, codecs):
+        """Map datapoint (or parameter) numbers to a handler, target attribute and codec."""
+        cls = type(self)
+        key = (cls, id(handlers), id(ids))
+        routes = _SHARED_ROUTES.get(key)
+        if routes is None:
+            routes = {}
+            for pairing_id, (handler, attribute) in handlers.items():
+                number = ids.get(pairing_id)
+                if number is not None:
+                    codec = None if pairing_id in cls.raw_pairing_ids else codecs.get(pairing_id)
+                    routes[number] = (getattr(cls, handler), attribute, codec)
+            # Keyed by identity: shared maps are never dropped and the class keeps its handlers
+            _SHARED_ROUTES[key] = routes
+        return routes
+
+    @property
+    def datapoint_routes(self):
+        """Return datapoint number -> (handler, attribute, codec) for all datapoints with a handler."""
+        return self._datapoint_routes
+
+    @property
+    def parameter_routes(self):
+        """Return parameter number -> (handler, attribute, codec) for all parameters with a handler."""
+        return self._parameter_routes
+
+    def update_datapoint(self, dp, value):
+        """Receive updated datapoint."""
+        route = self._datapoint_routes.get(dp)
+        if route is None:
+            LOG.info("%s %s (%s) unknown dp %s value %s", self.__class__.__name__, self.name, self.lookup_key, dp, value)
+            return
+        handler, attribute, codec = route
+        if codec is not None and value is not None:
+            try:
+                value = codec(value)
+            except ValueError:
+                LOG.warning("%s %s (%s) invalid value %r for dp %s", self.__class__.__name__, self.name, self.lookup_key, value, dp)
+                return
+        handler(self, attribute, dp, value)
+
+    def update_parameter(self, param, value):
+        """Receive updated parameter."""
+        route = self._parameter_routes.get(param)
+        if route is None:
+            LOG.debug("%s %s (%s) unknown param %s value %s", self.__class__.__name__, self.name, self.lookup_key, param, value)
+            return
+        handler, attribute, codec = route
+        if codec is not None and value is not None:
+            try:
+                value = codec(value)
+            except ValueError:
+                LOG.warning("%s %s (%s) invalid value %r for param %s", self.__class__.__name__, self.name, self.lookup_key, value, param)
+                return
+        handler(self, attribute, param, value)
+
+    def _set_value(self, attribute, dp, value):
+        """Store the (decoded) value."""
+        setattr(self, attribute, value)
+        LOG.info("%s %s (%s) dp %s %s %s", self.__class__.__name__, self.name, self.lookup_key, dp, attribute, value)
+
+    def transaction(self):
+        """Return a transaction to stage datapoint writes that are sent together."""
+        return DatapointTransaction(self)
+
+    @property
+    def device_updated_cbs(self):
+        """Return the registered device updated callbacks."""
+        return self._device_updated_cbs
 
-    async def after_update(self):
+    async def after_update(self, dispatcher=None):
         """Execute callbacks after internal state has been changed."""
+        if dispatcher is not None:
+            await dispatcher.dispatch([(cb, self) for cb in self._device_updated_cbs])
+            return
+
         for device_updated_cb in self._device_updated_cbs:
             await device_updated_cb(self)
 
@@ -37,6 +282,21 @@ class FahDevice:
         """Return channel id"""
         return self._channel_id
 
+    @property
+    def function_id(self):
+        """Return function id of the channel"""
+        return self._function_id
+
+    @property
+    def datapoints(self):
+        """Return the datapoints by pairing id"""
+        return self._datapoints
+
+    @property
+    def parameters(self):
+        """Return the parameters by parameter id"""
+        return self._parameters
+
     @property
     def name(self):
         """ return the name of the device   """
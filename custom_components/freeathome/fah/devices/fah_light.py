@@ -1,9 +1,9 @@
 """Devices that represent lights"""
 import asyncio
 import logging
-import re
 
 from .fah_device import FahDevice
+from ..codec import decode_rgb
 from ..const import (
     FUNCTION_IDS_SWITCHING_ACTUATOR,
     FUNCTION_IDS_DIMMING_ACTUATOR,
@@ -29,15 +29,25 @@ LOG = logging.getLogger(__name__)
 
 class FahLight(FahDevice):
     """ Free@Home light object   """
-    state = None
-    brightness = None
-    color_temp = None 
-    rgb_color = None
-    max_color_temp = None
-    min_color_temp = None
-
+    __slots__ = ('state', 'brightness', 'color_temp', 'rgb_color', 'max_color_temp', 'min_color_temp')
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(
+            FUNCTION_IDS_COLOR_ACTUATOR +
+            FUNCTION_IDS_COLOR_TEMP_ACTUATOR +
+            FUNCTION_IDS_DIMMING_ACTUATOR +
+            FUNCTION_IDS_SWITCHING_ACTUATOR)
+
+    datapoint_handlers = {
+            PID_INFO_ON_OFF: ('_set_value', 'state'),
+            PID_INFO_ACTUAL_DIMMING_VALUE: ('_set_value', 'brightness'),
+            PID_INFO_COLOR_TEMPERATURE: ('_set_color_temp', 'color_temp'),
+            PID_INFO_RGB: ('_set_rgb', 'rgb_color'),
+            }
 
     def __init__(self, client, device_info, serialnumber, channel_id, function_id, name, datapoints={}, parameters={}, device_updated_cb=None):
+        FahDevice.__init__(self, client, device_info, serialnumber, channel_id, function_id, name, datapoints=datapoints, parameters=parameters, device_updated_cb=device_updated_cb)
+
         # Determine minimum and maximum value for color temperature
         if PID_COLOR_TEMPERATURE in datapoints:
             if PAR_MAXIMUM_COLOR_TEMPERATURE in parameters:
@@ -45,8 +55,11 @@ class FahLight(FahDevice):
             if PAR_MINIMUM_COLOR_TEMPERATURE in parameters:
                 self.min_color_temp = parameters[PAR_MINIMUM_COLOR_TEMPERATURE]    
 
-        FahDevice.__init__(self, client, device_info, serialnumber, channel_id, function_id, name, datapoints=datapoints, parameters=parameters, device_updated_cb=device_updated_cb)
 
+    @classmethod
+    def device_pairing_ids(cls, function_id, switch_as_x=False):
+        # Switching actuators are lights or switches, depending on switch_as_x
+        return cls.pairing_ids(function_id, switch_as_x=switch_as_x)
 
     def pairing_ids(function_id=None, switch_as_x=False):
 
@@ -111,32 +124,36 @@ class FahLight(FahDevice):
 
     async def turn_on(self):
         """ Turn the light on   """
-        oldstate = self.state
-        if self.state == False:
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_SWITCH_ON_OFF], '1')
+        switching_on = self.state == False
+        async with self.transaction() as transaction:
+            if switching_on:
+                transaction.set(PID_SWITCH_ON_OFF, '1')
+
+            if self.is_dimmer() \
+                    and ((switching_on and int(self.brightness) > 0) or not switching_on):
+                transaction.set(PID_ABSOLUTE_SET_VALUE, str(self.brightness))
+
+            if self.is_color_temp():
+                transaction.set(PID_COLOR_TEMPERATURE, str(self.color_temp))
+
+            if self.is_rgb():
+                # Format RGB for outgoing datapoint. Use CSV "R,G,B" which is accepted by many implementations.
+                rgb_val = None
+                if isinstance(self.rgb_color, int):
+                    r = (self.rgb_color >> 16) & 255
+                    g = (self.rgb_color >> 8) & 255
+                    b = self.rgb_color & 255
+                    rgb_val = f"{r},{g},{b}"
+                else:
+                    # fallback to string conversion
+                    rgb_val = str(self.rgb_color)
+
+                transaction.set(PID_RGB, rgb_val)
+
+        # Only once the SysAP accepted the writes
+        if switching_on:
             self.state = True
 
-        if self.is_dimmer() \
-                and ((oldstate != self.state and int(self.brightness) > 0) or (oldstate == self.state)):
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_ABSOLUTE_SET_VALUE], str(self.brightness))
-
-        if self.is_color_temp():
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_COLOR_TEMPERATURE], str(self.color_temp))
-
-        if self.is_rgb():
-            # Format RGB for outgoing datapoint. Use CSV "R,G,B" which is accepted by many implementations.
-            rgb_val = None
-            if isinstance(self.rgb_color, int):
-                r = (self.rgb_color >> 16) & 255
-                g = (self.rgb_color >> 8) & 255
-                b = self.rgb_color & 255
-                rgb_val = f"{r},{g},{b}"
-            else:
-                # fallback to string conversion
-                rgb_val = str(self.rgb_color)
-
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_RGB], rgb_val)
-
     async def turn_off(self):
         """ Turn the light off   """
         if self.state == True:
@@ -182,71 +199,18 @@ class FahLight(FahDevice):
         return red, green, blue
 
     def _parse_rgb_to_int(self, value):
-        """Parse various RGB formats to an integer (R<<16 | G<<8 | B).
-
-        Accepts:
-        - integer (returned as-is)
-        - decimal string (e.g. "16711680")
-        - hex string with 0x or # prefix (e.g. "0xFF0000", "#FF0000")
-        - plain hex string (e.g. "FF0000")
-        - CSV/space/semicolon separated "R,G,B" (e.g. "255,0,0")
+        """Parse an RGB value to an integer (R<<16 | G<<8 | B), see decode_rgb.
 
-        Returns integer on success or None on parse failure.
+        Integers are returned as-is, None on parse failure.
         """
-        if value is None:
-            return None
-
-        # Already an int
-        if isinstance(value, int):
+        if value is None or isinstance(value, int):
             return value
 
         try:
-            v = str(value).strip()
-        except Exception:
-            return None
-
-        if not v:
+            return decode_rgb(str(value))
+        except ValueError:
             return None
 
-        # Hex with 0x prefix
-        if v.startswith(('0x', '0X')):
-            try:
-                return int(v, 16)
-            except Exception:
-                return None
-
-        # Hex with # prefix
-        if v.startswith('#'):
-            try:
-                return int(v[1:], 16)
-            except Exception:
-                return None
-
-        # Decimal integer string
-        try:
-            return int(v)
-        except Exception:
-            pass
-
-        # CSV / space / semicolon separated R G B
-        if any(sep in v for sep in (',', ';')) or re.search(r"\s+", v):
-            parts = re.split(r'[,;\s]+', v)
-            if len(parts) == 3:
-                try:
-                    r, g, b = (int(p) for p in parts)
-                    return (r << 16) | (g << 8) | b
-                except Exception:
-                    return None
-
-        # Plain hex (e.g. "FF0000")
-        if re.fullmatch(r'[0-9a-fA-F]+', v):
-            try:
-                return int(v, 16)
-            except Exception:
-                return None
-
-        return None
-
     def is_on(self):
         """ Return the state of the light   """
         return self.state
@@ -261,30 +225,12 @@ class FahLight(FahDevice):
     def is_rgb(self):
         return PID_RGB in self._datapoints
 
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if PID_INFO_ON_OFF in self._datapoints and self._datapoints[PID_INFO_ON_OFF] == dp:
-            self.state = (value == '1')
-            LOG.info("light device %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-
-        elif PID_INFO_ACTUAL_DIMMING_VALUE in self._datapoints and self._datapoints[PID_INFO_ACTUAL_DIMMING_VALUE] == dp:
-            self.brightness = value
-            LOG.info("light device %s (%s) dp %s brightness %s", self.name, self.lookup_key, dp, value)
-
-        elif PID_INFO_COLOR_TEMPERATURE in self._datapoints and self._datapoints[PID_INFO_COLOR_TEMPERATURE] == dp:
-            self.color_temp = int(value)
-            LOG.info("light device %s (%s) dp %s color temperature %s", self.name, self.lookup_key, dp, value)
-
-        elif PID_INFO_RGB in self._datapoints and self._datapoints[PID_INFO_RGB] == dp:
-            parsed = self._parse_rgb_to_int(value)
-            if parsed is not None:
-                self.rgb_color = int(parsed)
-                LOG.info("light device %s (%s) dp %s rgb color %s", self.name, self.lookup_key, dp, value)
-            else:
-                LOG.warning("light device %s (%s) dp %s unknown rgb format: %s", self.name, self.lookup_key, dp, value)
+    def _set_color_temp(self, attribute, dp, value):
+        """Store the color temperature (0 - 100 %)."""
+        self.color_temp = value
+        LOG.info("light device %s (%s) dp %s color temperature %s", self.name, self.lookup_key, dp, value)
 
-        else:
-            LOG.info("light device %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-            
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
+    def _set_rgb(self, attribute, dp, value):
+        """Store the RGB color, decoded to an integer by decode_rgb."""
+        self.rgb_color = value
+        LOG.info("light device %s (%s) dp %s rgb color %s", self.name, self.lookup_key, dp, value)
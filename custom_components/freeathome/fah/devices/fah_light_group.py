@@ -16,10 +16,15 @@ LOG = logging.getLogger(__name__)
 
 class FahLightGroup(FahDevice):
     """ Free@home light group """
-    state = None
-    brightness = None
-    color_temp = None 
-    rgb_color = None
+    __slots__ = ('state', 'brightness', 'color_temp', 'rgb_color')
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(FUNCTION_IDS_LIGHT_GROUP)
+
+    datapoint_handlers = {
+            PID_SYSAP_INFO_ON_OFF: ('_set_value', 'state'),
+            PID_SYSAP_INFO_ACTUAL_DIMMING_VALUE: ('_set_value', 'brightness'),
+            }
 
     def pairing_ids(function_id=None):
         if function_id in FUNCTION_IDS_LIGHT_GROUP:
@@ -38,20 +43,24 @@ class FahLightGroup(FahDevice):
 
     async def turn_on(self):
         """ Turn the light on   """
-        oldstate = self.state
-        await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_INFO_ON_OFF], '1')
-        await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_SWITCH_ON_OFF], '1')
-        self.state = True
+        switching_on = self.state != True
+        async with self.transaction() as transaction:
+            transaction.set(PID_INFO_ON_OFF, '1')
+            transaction.set(PID_SWITCH_ON_OFF, '1')
 
-        if self.is_dimmer() \
-                and ((oldstate != self.state and int(self.brightness) > 0) or (oldstate == self.state)):
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_INFO_ACTUAL_DIMMING_VALUE], str(self.brightness))
-            await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_ABSOLUTE_SET_VALUE], str(self.brightness))
+            if self.is_dimmer() \
+                    and ((switching_on and int(self.brightness) > 0) or not switching_on):
+                transaction.set(PID_INFO_ACTUAL_DIMMING_VALUE, str(self.brightness))
+                transaction.set(PID_ABSOLUTE_SET_VALUE, str(self.brightness))
+
+        # Only once the SysAP accepted the writes
+        self.state = True
 
     async def turn_off(self):
         """ Turn the light off   """
-        await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_INFO_ON_OFF], '0')
-        await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_SWITCH_ON_OFF], '0')
+        async with self.transaction() as transaction:
+            transaction.set(PID_INFO_ON_OFF, '0')
+            transaction.set(PID_SWITCH_ON_OFF, '0')
         self.state = False
 
     def set_brightness(self, brightness):
@@ -76,19 +85,3 @@ class FahLightGroup(FahDevice):
 
     def is_rgb(self):
         return False
-
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if PID_SYSAP_INFO_ON_OFF in self._datapoints and self._datapoints[PID_SYSAP_INFO_ON_OFF] == dp:
-            self.state = (value == '1')
-            LOG.info("light group %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-
-        elif PID_SYSAP_INFO_ACTUAL_DIMMING_VALUE in self._datapoints and self._datapoints[PID_SYSAP_INFO_ACTUAL_DIMMING_VALUE] == dp:
-            self.brightness = value
-            LOG.info("light group %s (%s) dp %s brightness %s", self.name, self.lookup_key, dp, value)
-
-        else:
-            LOG.info("light group %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
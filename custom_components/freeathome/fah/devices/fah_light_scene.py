@@ -15,6 +15,14 @@ LOG = logging.getLogger(__name__)
 
 class FahLightScene(FahDevice):
     """ Free@home scene   """
+    __slots__ = ('state',)
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(FUNCTION_IDS_SCENE)
+
+    datapoint_handlers = {
+            PID_SCENE_CONTROL: ('_set_value', 'state'),
+            }
 
     def pairing_ids(function_id=None):
         if function_id in FUNCTION_IDS_SCENE:
@@ -29,15 +37,3 @@ class FahLightScene(FahDevice):
         """ Activate the scene   """
         dp = self._datapoints[PID_SCENE_CONTROL]
         await self.client.set_datapoint(self.serialnumber, self.channel_id, dp, '1')
-
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if self._datapoints.get(PID_SCENE_CONTROL) == dp:
-            self.state = value
-            LOG.info("scene %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-
-        else:
-            LOG.info("scene %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-            
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
\ No newline at end of file
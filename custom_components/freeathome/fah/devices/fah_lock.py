@@ -12,7 +12,14 @@ LOG = logging.getLogger(__name__)
 
 class FahLock(FahDevice):
     """Free@home lock control via 7 inch panel"""
-    state = None
+    __slots__ = ('state',)
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(FUNCTION_IDS_DOOR_OPENER)
+
+    datapoint_handlers = {
+            PID_INFO_ON_OFF: ('_set_value', 'state'),
+            }
 
     def pairing_ids(function_id=None):
         if function_id in FUNCTION_IDS_DOOR_OPENER:
@@ -32,15 +39,3 @@ class FahLock(FahDevice):
     async def unlock(self):
         dp = self._datapoints[PID_TIMED_START_STOP]
         await self.client.set_datapoint(self.serialnumber, self.channel_id, dp, '1')
-
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if self._datapoints.get(PID_INFO_ON_OFF) == dp:
-            self.state = value
-            LOG.info("lock device %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-
-        else:
-            LOG.info("light device %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-            
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
\ No newline at end of file
@@ -61,7 +61,29 @@ EXTRA_LOOKUP_KEY_PIDS = AIR_QUALITY_PIDS | {PID_WIND_FORCE}
 # # TODO: Use FahSensor for weather station sensors
 class FahSensor(FahDevice):
     """ Free@Home sensor object """
-    state = None
+    __slots__ = ('state', 'type')
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(
+            FUNCTION_IDS_MOVEMENT_DETECTOR +
+            FUNCTION_IDS_WEATHER_STATION +
+            FUNCTION_IDS_HEATING_ACTOR +
+            FUNCTION_IDS_COOLING_ACTOR +
+            FUNCTION_IDS_HEATING_COOLING_ACTOR +
+            FUNCTION_IDS_AIR_QUALITY_SENSOR)
+
+    datapoint_handlers = {pairing_id: ('_set_value', 'state') for pairing_id in [
+            PID_MEASURED_BRIGHTNESS,
+            PID_RAIN_ALARM,
+            PID_OUTDOOR_TEMPERATURE,
+            PID_INFO_VALUE_HEATING,
+            PID_INFO_VALUE_COOLING,
+            PID_WIND_SPEED,
+            PID_WIND_FORCE,
+            PID_MEASURED_HUMIDITY,
+            PID_MEASURED_VOC,
+            PID_MEASURED_CO2,
+            ]}
 
     def pairing_ids(function_id=None):
         if function_id in FUNCTION_IDS_MOVEMENT_DETECTOR:
@@ -118,36 +140,16 @@ class FahSensor(FahDevice):
 
     def __init__(self, client, device_info, serialnumber, channel_id, function_id, name, datapoints={}, parameters={}, device_updated_cb=None):
         # Determine sensor type (e.g. temperature, brightness) from datapoints
-        self.type = sensor_type_from_pairing_ids(datapoints)
+        type = sensor_type_from_pairing_ids(datapoints)
 
         # Add type suffix to name
-        if self.type is not None:
-            name = name + '_' + self.type
+        if type is not None:
+            name = name + '_' + type
 
         FahDevice.__init__(self, client, device_info, serialnumber, channel_id, function_id, name, datapoints=datapoints, parameters=parameters, device_updated_cb=None)
+        self.type = type
 
 
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if self._datapoints.get(PID_MEASURED_BRIGHTNESS) == dp or \
-                self._datapoints.get(PID_RAIN_ALARM) == dp or \
-                self._datapoints.get(PID_OUTDOOR_TEMPERATURE) == dp or \
-                self._datapoints.get(PID_INFO_VALUE_HEATING) == dp or \
-                self._datapoints.get(PID_INFO_VALUE_COOLING) == dp or \
-                self._datapoints.get(PID_WIND_SPEED) == dp or \
-                self._datapoints.get(PID_WIND_FORCE) == dp or \
-                self._datapoints.get(PID_MEASURED_HUMIDITY) == dp or \
-                self._datapoints.get(PID_MEASURED_VOC) == dp or \
-                self._datapoints.get(PID_MEASURED_CO2) == dp:
-            self.state = value
-            LOG.info("sensor %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-
-        else:
-            LOG.info("sensor %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-    
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
-
     @property
     def lookup_key(self):
         """Return device lookup key"""
@@ -13,7 +13,19 @@ LOG = logging.getLogger(__name__)
 
 class FahSwitch(FahDevice):
     """ Free@Home switch object   """
-    state = None
+    __slots__ = ('state',)
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(FUNCTION_IDS_SWITCHING_ACTUATOR)
+
+    datapoint_handlers = {
+            PID_INFO_ON_OFF: ('_set_value', 'state'),
+            }
+
+    @classmethod
+    def device_pairing_ids(cls, function_id, switch_as_x=False):
+        # Switching actuators are lights or switches, depending on switch_as_x
+        return cls.pairing_ids(function_id, switch_as_x=switch_as_x)
 
     def pairing_ids(function_id=None, switch_as_x=False):
         # If switch_as_x is True, we want to treat the switching actuator as an actual switch in HA
@@ -41,15 +53,3 @@ class FahSwitch(FahDevice):
     def is_on(self):
         """ Return the state of the switch   """
         return self.state
-
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if PID_INFO_ON_OFF in self._datapoints and self._datapoints[PID_INFO_ON_OFF] == dp:
-            self.state = (value == '1')
-            LOG.info("switch device %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-
-        else:
-            LOG.info("switch device %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-
-    def update_parameter(self, param, value):
-        LOG.debug("Not yet implemented")
\ No newline at end of file
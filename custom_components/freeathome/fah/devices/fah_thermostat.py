@@ -19,10 +19,24 @@ LOG = logging.getLogger(__name__)
 
 class FahThermostat(FahDevice):
     """Free@Home thermostat """
-    current_temperature = None
-    current_actuator = None
-    target_temperature = None
-    temperature_correction = None
+    # Temperatures, the heating demand and the correction are floats, state and ecomode booleans
+    __slots__ = ('current_temperature', 'current_actuator', 'target_temperature', 'temperature_correction',
+                 'state', 'ecomode')
+
+    # Function IDs of the channels this class may handle, see DEVICE_REGISTRY
+    function_ids = frozenset(FUNCTION_IDS_ROOM_TEMPERATURE_CONTROLLER)
+
+    datapoint_handlers = {
+            PID_SET_VALUE_TEMPERATURE: ('_set_value', 'target_temperature'),
+            PID_CONTROLLER_ON_OFF: ('_set_value', 'state'),
+            PID_STATUS_INDICATION: ('_set_eco_mode', 'ecomode'),
+            PID_MEASURED_TEMPERATURE: ('_set_value', 'current_temperature'),
+            PID_HEATING_DEMAND: ('_set_value', 'current_actuator'),
+            }
+
+    parameter_handlers = {
+            PARAM_TEMPERATURE_CORRECTION: ('_set_value', 'temperature_correction'),
+            }
 
     def pairing_ids(function_id=None):
         if function_id in FUNCTION_IDS_ROOM_TEMPERATURE_CONTROLLER:
@@ -51,8 +65,9 @@ class FahThermostat(FahDevice):
 
     async def turn_on(self):
         """ Turn the thermostat on   """
-        await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_ECO_MODE_ON_OFF_REQUEST], '0')
-        await self.client.set_datapoint(self.serialnumber, self.channel_id, self._datapoints[PID_CONTROLLER_ON_OFF_REQUEST], '1')
+        async with self.transaction() as transaction:
+            transaction.set(PID_ECO_MODE_ON_OFF_REQUEST, '0')
+            transaction.set(PID_CONTROLLER_ON_OFF_REQUEST, '1')
 
     async def turn_off(self):
         """ Turn the thermostat off   """
@@ -68,50 +83,7 @@ class FahThermostat(FahDevice):
     async def set_temperature_correction(self, correction):
         await self.client.set_parameter(self.serialnumber, self.channel_id, self._parameters[PARAM_TEMPERATURE_CORRECTION], '%.2f' % correction)
 
-    @property
-    def state(self):
-        return self._state
-
-    @state.setter
-    def state(self, state):
-        self._state = state == '1'
-
-    @property
-    def ecomode(self):
-        return self._eco_mode
-
-    @ecomode.setter
-    def ecomode(self, eco_mode):
-        self._eco_mode = int(eco_mode) & 0x04 == 0x04
-
-    def update_datapoint(self, dp, value):
-        """Receive updated datapoint."""
-        if self._datapoints.get(PID_SET_VALUE_TEMPERATURE) == dp:
-            self.target_temperature = value
-            LOG.info("thermostat %s (%s) dp %s target temp %s", self.name, self.lookup_key, dp, value)
-
-        elif self._datapoints.get(PID_CONTROLLER_ON_OFF) == dp:
-            self.state = value
-            LOG.info("thermostat %s (%s) dp %s state %s", self.name, self.lookup_key, dp, value)
-
-        elif self._datapoints.get(PID_STATUS_INDICATION) == dp:
-            self.ecomode = value
-            LOG.info("thermostat %s (%s) dp %s ecomode %s", self.name, self.lookup_key, dp, value)
-
-        elif self._datapoints.get(PID_MEASURED_TEMPERATURE) == dp:
-            self.current_temperature = value
-            LOG.info("thermostat %s (%s) dp %s current temperature %s", self.name, self.lookup_key, dp, value)
-
-        elif self._datapoints.get(PID_HEATING_DEMAND) == dp:
-            self.current_actuator = value
-            LOG.info("thermostat %s (%s) dp %s current actuator %s", self.name, self.lookup_key, dp, value)
-
-        else:
-            LOG.info("thermostat %s (%s) unknown dp %s value %s", self.name, self.lookup_key, dp, value)
-
-
-    def update_parameter(self, param, value):
-        """Receive updated parameter."""
-        if self._parameters.get(PARAM_TEMPERATURE_CORRECTION) == param:
-            self.temperature_correction = value
-            LOG.info("thermostat %s (%s) param %s temperatur correction %s", self.name, self.lookup_key, param, value)
\ No newline at end of file
+    def _set_eco_mode(self, attribute, dp, value):
+        """Store the eco mode, bit 2 of the status indication."""
+        self.ecomode = None if value is None else value & 0x04 == 0x04
+        LOG.info("thermostat %s (%s) dp %s ecomode %s", self.name, self.lookup_key, dp, self.ecomode)
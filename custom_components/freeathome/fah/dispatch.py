@@ -0,0 +1,48 @@
+"""
+Concurrent dispatch of the device updated callbacks
+"""
+import asyncio
+import logging
+
+LOG = logging.getLogger(__name__)
+
+
+class CallbackDispatcher:
+    """Run device updated callbacks concurrently.
+
+    By default every callback of every updated device is awaited one after the
+    other, so a single slow subscriber delays all others of the same update
+    message. A dispatcher runs them side by side instead, at most concurrency
+    at a time. A callback that takes longer than timeout seconds is cancelled,
+    and a callback that fails is logged; neither affects the other callbacks.
+    """
+
+    def __init__(self, concurrency=8, timeout=None):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.timeouts = 0
+        self.failures = 0
+
+    async def dispatch(self, calls):
+        """Run all (callback, device) calls, return when all have finished."""
+        if calls:
+            await asyncio.gather(*(self._run(callback, device) for callback, device in calls))
+
+    async def _run(self, callback, device):
+        async with self._semaphore:
+            try:
+                if self.timeout is None:
+                    await callback(device)
+                else:
+                    await asyncio.wait_for(callback(device), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                LOG.warning("Callback %s for %s did not finish within %s seconds",
+                            getattr(callback, '__qualname__', callback), device.lookup_key, self.timeout)
+            except Exception:
+                self.failures += 1
+                LOG.exception("Callback %s for %s failed",
+                              getattr(callback, '__qualname__', callback), device.lookup_key)
@@ -0,0 +1,62 @@
+"""
+PBKDF2 derived keys, kept across handshakes
+"""
+import collections
+import hashlib
+import threading
+
+
+class DerivedKeyCache:
+    """PBKDF2-HMAC-SHA256 keys of the last maxsize (password, salt, iterations).
+
+    A handshake derives the same key from the password up to three times (key
+    exchange and SCRAM), with up to 600000 iterations each, and every reconnect
+    does the same handshake again. Keys are kept in memory only, under the
+    digest of the password, and the least recently used one is dropped when
+    there are more than maxsize.
+    """
+
+    def __init__(self, maxsize=8):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._keys = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def derive(self, password, salt, iterations):
+        """Return pbkdf2_hmac('sha256', password, salt, iterations), password as str or bytes."""
+        if isinstance(password, str):
+            password = password.encode("utf-8")
+        salt = bytes(salt)
+        key = (hashlib.sha256(password).digest(), salt, iterations)
+
+        with self._lock:
+            derived = self._keys.get(key)
+            if derived is not None:
+                self._keys.move_to_end(key)
+                self.hits += 1
+                return derived
+
+        derived = hashlib.pbkdf2_hmac("sha256", password, salt, iterations)
+
+        with self._lock:
+            self.misses += 1
+            self._keys[key] = derived
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+        return derived
+
+    def clear(self):
+        """Forget all keys."""
+        with self._lock:
+            self._keys.clear()
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# The keys of all handshakes of the process
+DERIVED_KEYS = DerivedKeyCache()
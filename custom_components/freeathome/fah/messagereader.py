@@ -1,69 +1,65 @@
+import struct
+
+_UINT16 = struct.Struct('<H')
+_UINT32 = struct.Struct('<I')
+_UINT32BE = struct.Struct('>I')
+_UINT64 = struct.Struct('<II')
 
 
 class MessageReader:
+    """Read the values of a binary message, in place.
+
+    Integers are unpacked with struct straight from the buffer and strings are
+    decoded from a memoryview, no value is sliced out of the message first.
+    Blobs and the remaining data are returned as the type of the message,
+    getRemainingView returns the remaining data without a copy.
+    """
+
     def __init__(self, data):
         self.data = data
         self.offset = 0
+        self._view = memoryview(data).cast('B')
+        self._length = len(self._view)
 
-    def readUint8(self):
-        if self.offset + 1 > len(self.data):
-            raise Exception('Insufficient data for reading')    
+    def _advance(self, size):
+        """Return the offset of the next size bytes and move behind them."""
+        offset = self.offset
+        if offset + size > self._length:
+            raise Exception('Insufficient data for reading')
+        self.offset = offset + size
+        return offset
 
-        self.offset += 1 
-        return self.data[self.offset - 1]
+    def readUint8(self):
+        return self._view[self._advance(1)]
 
     def readUint16(self):
-        if self.offset + 2 > len(self.data):
-            raise Exception('Insufficient data for reading')
-
-        x = int.from_bytes(self.data[self.offset:self.offset + 2], "little")
-        self.offset += 2
-        return x        
+        return _UINT16.unpack_from(self._view, self._advance(2))[0]
 
     def readUint32(self):
-
-        if self.offset + 4 > len(self.data):
-            raise Exception('Insufficient data for reading')    
- 
-        x = int.from_bytes(self.data[self.offset:self.offset + 4], "little")
-        self.offset += 4
-        return x
+        return _UINT32.unpack_from(self._view, self._advance(4))[0]
 
     def readUint64(self):
-        if self.offset + 8 > len(self.data):
-            raise Exception('Insufficient data for reading')
-
-        g = self.readUint32()
-        f = self.readUint32()
-        if f != 0:
-            raise Exception('Cannot read 64 bit value: upper 32 bits have value != 0')    
+        low, high = _UINT64.unpack_from(self._view, self._advance(8))
+        if high != 0:
+            raise Exception('Cannot read 64 bit value: upper 32 bits have value != 0')
 
-        return g
+        return low
 
     def readUint32BE(self):
-        if self.offset + 4 > len(self.data):
-            raise Exception('Insufficient data for reading')
-
-        return (self.readUint8() << 24) | (self.readUint8() << 16) | (self.readUint8() << 8) | self.readUint8()
-    
-    def readString(self):  
-        i = self.readUint32()
-        if self.offset + i > len(self.data):
-            raise Exception('Insufficient data for reading')
-
-        print('i:', i)
+        return _UINT32BE.unpack_from(self._view, self._advance(4))[0]
 
-        text = self.data[self.offset: self.offset + i].decode('utf-8')
-        self.offset += i
-        return text
+    def readString(self):
+        size = self.readUint32()
+        offset = self._advance(size)
+        return str(self._view[offset:offset + size], 'utf-8')
 
     def readBlob(self, amount):
-        if self.offset + amount > len(self.data):
-            raise Exception('Insufficient data for reading')
+        offset = self._advance(amount)
+        return self.data[offset:offset + amount]
 
-        blob = self.data[self.offset: self.offset + amount]
-        self.offset += amount
-        return blob
-    
     def getRemainingData(self):
         return self.data[self.offset:]
+
+    def getRemainingView(self):
+        """Return the remaining data as memoryview, without copying it."""
+        return self._view[self.offset:]
@@ -1,70 +1,75 @@
-class MessageWriter:
+import struct
+
+_UINT8 = struct.Struct('<B')
+_UINT32 = struct.Struct('<I')
+
+MAX_SIZE = 1024 * 1024 * 10
+
 
-    def __init__(self):
-        self.data = []
+class MessageWriter:
+    """Write the values of a binary message.
+
+    Values are packed into one preallocated buffer as they are written, it
+    doubles when it is full. toUint8Array hands out that buffer, trimmed to
+    the written bytes, instead of a copy. Writing after that continues in a
+    copy, so the returned array never changes.
+    """
+
+    def __init__(self, capacity=64):
+        self._buffer = bytearray(capacity)
+        self._length = 0
+        self._handed_out = False
+
+    def _reserve(self, size):
+        """Return the offset of the next size bytes, growing the buffer if needed."""
+        if self._handed_out:
+            self._buffer = bytearray(self._buffer)
+            self._handed_out = False
+        offset = self._length
+        end = offset + size
+        if end > len(self._buffer):
+            self._buffer.extend(bytes(max(end, 2 * len(self._buffer)) - len(self._buffer)))
+        self._length = end
+        return offset
 
     def writeUint8(self, value):
         if value > 255:
-            raise Exception('Refusing attempt to write ', value_bytes, ', exceeding the value of a uint.')
-        item = {'type': 'uint8', 'value': value}
-        self.data.append(item)
+            raise Exception('Refusing attempt to write ', value, ', exceeding the value of a uint.')
+        offset = self._reserve(1)
+        _UINT8.pack_into(self._buffer, offset, value)
 
     def writeUint32(self, value):
-        item = {'type': 'uint32', 'value': value}
-        self.data.append(item)
+        offset = self._reserve(4)
+        _UINT32.pack_into(self._buffer, offset, value)
 
     def writeString(self, value):
         value_bytes = value.encode()
-        if len(value_bytes) > 1024 * 1024 * 10:
+        if len(value_bytes) > MAX_SIZE:
             raise Exception('Refusing attempt to write ', len(value_bytes), ' bytes of data, exceeding valid range.')
 
-        item = {'type': 'string', 'value': value_bytes}
-        self.data.append(item)
+        self.writeUint32(len(value_bytes))
+        self._write(value_bytes)
 
     def writeBlob(self, value):
-        if len(value) > 1024 * 1024 * 10:
+        if len(value) > MAX_SIZE:
             raise Exception('Refusing attempt to write ', len(value), ' bytes of data, exceeding valid range.')
-        item = {'type': 'blob', 'value': value}
-        self.data.append(item)
+        self._write(value)
+
+    def _write(self, value):
+        size = len(value)
+        if self._length + size > len(self._buffer) and not self._handed_out:
+            # Append instead of growing with zeros first, large blobs are copied once
+            del self._buffer[self._length:]
+            self._buffer += value
+            self._length = len(self._buffer)
+            return
+        offset = self._reserve(size)
+        self._buffer[offset:offset + size] = value
+
+    def __len__(self):
+        return self._length
 
     def toUint8Array(self):
-        length = 0
-
-        # Iterate the data
-        for d in self.data:
-            if d['type'] == 'uint8':
-                length += 1
-
-            if d['type'] == 'uint32':
-                length += 4
-
-            if d['type'] == 'string':
-                length += 4 + len(d['value'])
-
-            if d['type'] == 'blob':
-                length += len(d['value'])
-
-        pos = 0
-        array_bytes = bytearray()
-
-        for d in self.data:
-            if d['type'] == 'uint8':
-                x = d['value'].to_bytes(1, byteorder='little')
-                print(type(x))
-                array_bytes = array_bytes + x
-                pos += 1
-
-            if d['type'] == 'uint32':
-                array_bytes = array_bytes + d['value'].to_bytes(4, byteorder='little')
-                pos += 4
-
-            if d['type'] == 'string':
-                array_bytes = array_bytes + len(d['value']).to_bytes(4, byteorder='little')
-                array_bytes = array_bytes + d['value']
-                pos += 4 + len(d['value'])
-
-            if d['type'] == 'blob':
-                array_bytes = array_bytes + d['value']
-                pos += len(d['value'])
-
-        return array_bytes
+        del self._buffer[self._length:]
+        self._handed_out = True
+        return self._buffer
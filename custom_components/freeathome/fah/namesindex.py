@@ -0,0 +1,180 @@
+"""
+Compact, memory mapped index of the names in names.json
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections.abc import Mapping
+
+LOG = logging.getLogger(__name__)
+
+MAGIC = b'FAHN'
+# Increase when the format of the index changes
+INDEX_VERSION = 2
+
+# magic, version, number of names, size and sha256 of the names.json the index was built from
+HEADER = struct.Struct('<4sHIQ32s')
+# A name ID or the offset of a string
+ENTRY = struct.Struct('<I')
+
+# Path of an index -> NamesIndex, shared by all clients of the process
+_INDEXES = {}
+_LOCK = threading.Lock()
+
+
+def build_names_index(data):
+    """Return the index of the contents of a names.json file.
+
+    Layout, all numbers little endian: the header, the sorted name IDs, the
+    offsets of the strings and the UTF-8 encoded strings one after the other.
+    """
+    strings = {}
+    for item in json.loads(data)['strings']:
+        strings[int(item['nameId'], 16)] = item['string']
+
+    name_ids = sorted(strings)
+    blob = bytearray()
+    offsets = []
+    for name_id in name_ids:
+        offsets.append(len(blob))
+        blob += strings[name_id].encode('utf-8')
+    offsets.append(len(blob))
+
+    return b''.join([
+            HEADER.pack(MAGIC, INDEX_VERSION, len(name_ids), len(data), hashlib.sha256(data).digest()),
+            struct.pack('<%dI' % len(name_ids), *name_ids),
+            struct.pack('<%dI' % len(offsets), *offsets),
+            bytes(blob),
+            ])
+
+
+class NamesIndex(Mapping):
+    """Read only mapping of name ID ('FEF1') to name, on top of an index.
+
+    Nothing is decoded up front, a lookup is a binary search over the name
+    IDs and only the names that are asked for are decoded (and kept).
+    """
+
+    def __init__(self, buffer):
+        magic, version, self._count, self.source_size, self.digest = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != INDEX_VERSION:
+            raise ValueError('not a names index of version %d' % INDEX_VERSION)
+
+        self._buffer = buffer
+        self._offsets = HEADER.size + ENTRY.size * self._count
+        self._strings = self._offsets + ENTRY.size * (self._count + 1)
+        self._decoded = {}
+
+    def _find(self, name_id):
+        """Return the position of a name ID, -1 if it is not in the index."""
+        try:
+            key = int(name_id, 16)
+        except (TypeError, ValueError):
+            return -1
+
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            (found,) = ENTRY.unpack_from(self._buffer, HEADER.size + ENTRY.size * middle)
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    def __getitem__(self, name_id):
+        name = self._decoded.get(name_id)
+        if name is None:
+            position = self._find(name_id)
+            if position < 0:
+                raise KeyError(name_id)
+            start, end = struct.unpack_from('<2I', self._buffer, self._offsets + ENTRY.size * position)
+            name = self._decoded[name_id] = str(self._buffer[self._strings + start:self._strings + end], 'utf-8')
+        return name
+
+    def __contains__(self, name_id):
+        return name_id in self._decoded or self._find(name_id) >= 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for (name_id,) in ENTRY.iter_unpack(self._buffer[HEADER.size:self._offsets]):
+            yield '%04X' % name_id
+
+
+def _map(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _write(path, index):
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(index)
+    os.replace(temporary, path)
+
+
+def _current_index(path, json_path):
+    """Return the mapped index at path if it was built from json_path, None if it was not."""
+    names = NamesIndex(_map(path))
+    source = os.stat(json_path)
+    if names.source_size != source.st_size:
+        return None
+    if source.st_mtime_ns > os.stat(path).st_mtime_ns:
+        # Changed after the index was built, or unpacked in another order
+        with open(json_path, 'rb') as f:
+            if hashlib.sha256(f.read()).digest() != names.digest:
+                return None
+    return names
+
+
+def load_names_index(json_path):
+    """Return the NamesIndex of a names.json file.
+
+    The index is shipped next to it, with the extension .idx. It is trusted
+    if it was built from a names.json of the same size that is not newer
+    than the index, so names.json is not read at all. If names.json is newer,
+    its digest is compared with the one in the index first. A missing or
+    stale index is built in memory, nothing is written. An index is mapped
+    once per process and shared by every caller.
+    """
+    path = os.path.splitext(json_path)[0] + '.idx'
+
+    with _LOCK:
+        names = _INDEXES.get(path)
+        if names is not None:
+            return names
+
+        try:
+            names = _current_index(path, json_path)
+            error = 'built from another names.json'
+        except (OSError, ValueError, struct.error) as e:
+            names = None
+            error = e
+        if names is None:
+            LOG.warning('Cannot use names index %s, building it in memory: %s', path, error)
+            with open(json_path, 'rb') as f:
+                names = NamesIndex(build_names_index(f.read()))
+
+        _INDEXES[path] = names
+        return names
+
+
+def main(argv):
+    """Build the index of a names.json, after changing it: python namesindex.py names.json"""
+    json_path = argv[1]
+    with open(json_path, 'rb') as f:
+        index = build_names_index(f.read())
+    _write(os.path.splitext(json_path)[0] + '.idx', index)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
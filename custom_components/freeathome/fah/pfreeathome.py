@@ -3,20 +3,21 @@
 """
 Interface for accessing Free@Home
 """
-import aiofiles
 import asyncio
+import functools
 import logging
 # import urllib.request
 import json
 import xml.etree.ElementTree as ET
 import re
 import slixmpp
-import zlib
 import sys
 import os
 import random
 import ssl
 import hmac
+import time
+import zlib
 
 from packaging import version
 from slixmpp import Message
@@ -38,7 +39,7 @@ from slixmpp.util.sasl.client import sasl_mech, Mech, \
                                        SASLCancelled, SASLFailed, \
                                        SASLMutualAuthFailed
 
-from .devices.fah_device import FahDevice
+from .devices.fah_device import FahDevice, DEVICE_REGISTRY
 from .devices.fah_switch import FahSwitch
 from .devices.fah_light import FahLight
 from .devices.fah_binary_sensor import FahBinarySensor
@@ -55,12 +56,21 @@ from .const import (
     FUNCTION_IDS_WEATHER_STATION
     )
 
-from .messagereader import MessageReader
+from .channelindex import ChannelIndex
+from .namesindex import load_names_index
+from .sharedtables import SHARED_TABLES, get_section, section_digest
+from .configcache import ConfigCache, config_digest, describe_device, device_entry, device_key, restore_device
+from .pipeline import CommandPipeline
+from .updatepipeline import INFLATE_CHUNK, inflate_chunks, inflate_update
+from .updateparser import UpdateParser, DuplicateAttributeError
 from .settings import SettingsFah
 from .saslhandler import SaslHandler
 
 LOG = logging.getLogger(__name__)
 
+# Characters of configuration XML that are parsed at once
+PARSE_CHUNK_SIZE = 1 << 16
+
 @sasl_mech(1000)
 class SCRAMTweak(SCRAM):
     def process_1(self, challenge: bytes_) -> bytes_:
@@ -147,22 +157,13 @@ def get_names(xmlroot):
 
     return result
 
-async def get_json_names(c_path):
-    
-    async with aiofiles.open(c_path + '/freeathome/names.json', mode='r') as f:
-        contents = await f.read()
-    data = json.loads(contents)
+def get_json_names(c_path):
+    """ Return the names of the backup device name file, for SysAPs that do not send them """
+    names = load_names_index(c_path + '/freeathome/names.json')
 
-    result = {}
+    LOG.debug('{} names are available from the backup device name file'.format(len(names)))
     
-    for i in data['strings']:
-        name_id = i['nameId']
-        name = i['string']
-        result[name_id] = name
-
-    LOG.debug('{} names have been loaded from the backup device name file'.format(len(result)))
-    
-    return result
+    return names
 
 def get_attribute(xmlnode, name):
     """ Return an attribute value (xml)   """
@@ -254,6 +255,279 @@ def get_all_datapoints_as_str(xmlnode):
     return datapoints
 
 
+def strip_duplicate_attributes(xml):
+    """ Return xml without the duplicate attributes some SysAPs send """
+    # Ugly hack: Some SysAPs seem to return invalid XML, i.e. duplicate name attributes
+    # Strip them altogether.
+    duplicates = ["name", "imaginary", "inputPairingId", "outputPairingId"]
+
+    for duplicate in duplicates:
+        xml = re.sub(rf"{duplicate}=\"[^\"]*\" ([^>]*){duplicate}=\"[^\"]*\"", r'\1', xml)
+
+    return xml
+
+
+def parse_update_xml(xml, monitored):
+    """ Return the (serialnumber, channel_id, datapoint_id, value) tuples of the monitored channels in update XML, and the parser """
+    parser = UpdateParser(monitored)
+    try:
+        updates = parser.feed(xml)
+    except DuplicateAttributeError:
+        # Ugly hack: Some SysAPs seem to return invalid XML, i.e. duplicate name attributes.
+        # Only then pay for stripping them.
+        LOG.debug("update contains duplicate attributes, cleaning it")
+        parser = UpdateParser(monitored)
+        updates = parser.feed(strip_duplicate_attributes(xml))
+    updates.extend(parser.close())
+    return updates, parser
+
+
+def parse_compressed_update(message, monitored, chunk_size=INFLATE_CHUNK):
+    """ Return the update tuples and the parser of a decrypted update, parsed while it is inflated
+
+    The XML is fed to the parser chunk by chunk and never held in one piece,
+    so memory stays bounded whatever the size of the update. See
+    inflate_chunks for the cap on its length.
+    """
+    parser = UpdateParser(monitored)
+    updates = []
+    try:
+        for chunk in inflate_chunks(message, chunk_size):
+            updates.extend(parser.feed(chunk))
+    except DuplicateAttributeError:
+        # Cleaning needs the whole XML, see parse_update_xml
+        return parse_update_xml(inflate_update(message), monitored)
+    updates.extend(parser.close())
+    return updates, parser
+
+
+def parse_config_xml(xml):
+    """ Return the root element of configuration XML, without duplicate attributes
+
+    A configuration can be megabytes of XML. Cleaned and parsed in one piece,
+    the regular expressions and the parser would hold the GIL until they are
+    done, in chunks other threads, like the one of the event loop, get their
+    turn in between.
+    """
+    parser = ET.XMLParser()
+    start = 0
+    while start < len(xml):
+        # Chunks end after a tag, duplicate attributes are always within one
+        end = xml.find('>', start + PARSE_CHUNK_SIZE) + 1 or len(xml)
+        parser.feed(strip_duplicate_attributes(xml[start:end]))
+        start = end
+    return parser.close()
+
+
+def describe_config(config, host, use_room_names, switch_as_x, component_path):
+    """ Return the device table of a configuration, the initial state of its devices and the tables to share
+
+    Everything that works on the XML is done here: the table holds plain data
+    (see configcache.device_entry) and the state is a list of
+    (serialnumber, channel_id, datapoint_id, value) tuples. Nothing depends on
+    a client or the event loop, so this runs in an executor, in a thread or in
+    another process.
+
+    The tables to share map the kind of a table in SHARED_TABLES to the digest
+    of the XML it was built from and the table. The client holds them, in its
+    own process.
+    """
+    table = []
+
+    # Ugly hack: Some SysAPs seem to return invalid XML, i.e. duplicate name attributes
+    # Strip them altogether.
+    root = parse_config_xml(config)
+
+    # make a list of the rooms and other names
+    roomnames = get_room_names(root)
+    names = get_names(root)
+
+    shared = {}
+    for kind, shared_table in (('floorplan', roomnames), ('strings', names)):
+        section = get_section(config, kind)
+        if section is not None:
+            shared[kind] = (section_digest(section), shared_table)
+
+    if names == {}: 
+        names = get_json_names(component_path)
+
+    # Now look for the devices
+    devices = root.find('devices')
+
+    for device in devices.findall('device'):
+        device_serialnumber = device.get('serialNumber')
+        device_id = device.get('deviceId')
+        device_name_id = device.get('nameId')
+        device_sw_version = device.get('softwareVersion')
+
+        device_display_name = get_attribute(device, 'displayName')
+        device_floor_id = get_attribute(device, 'floor')
+        device_room_id = get_attribute(device, 'room')
+        device_model = names.get(device_name_id, 'Unknown device ' + device_name_id)
+
+        device_name = device_display_name if device_display_name != '' else device_model
+        device_name = device_name + " (" + device_serialnumber + ")"
+
+        LOG.info('Device: device id %s, name id %s, serialnumber %s, display name %s', device_id, device_name_id, device_serialnumber, device_display_name)
+
+        # Ignore devices from Philips Hue, to avoid circular definitions for users with
+        # emulated_hue enabled.
+        # TODO: Move this to the home assistant component and make it user configurable
+        if device.get('isExternal') == 'true' and device.get('interface') == 'hue':
+            LOG.info('Ignoring Hue device with serial number %s', device_serialnumber)
+            continue
+
+        # Ignore devices that are not yet commissioned
+        state = device.get('commissioningState')
+        if state != 'ready':
+            LOG.info('Ignoring device with serialnumber %s since its commissioning state is not ready', device_serialnumber)
+            continue
+
+        channels_xml = device.find('channels')
+
+        # Ignore devices without channels
+        if channels_xml is None:
+            LOG.info('Ignoring device with serialnumber %s since has no channels', device_serialnumber)
+            continue
+
+        # There may be a device-level parameter called deviceChannelSelector. Each possible value of that
+        # parameter has a mask attribute. This mask can be used to filter applicable channelSelectors,
+        # see below.
+        device_filter_mask = 0xFFFFFFFF
+        device_channel_selector_parameter = device.find("./parameters/parameter[@deviceChannelSelector='true']")
+        if device_channel_selector_parameter is not None:
+            parameter_value = device_channel_selector_parameter.find("value").text
+            device_filter_mask = int(parameter_value, 16) # e.g. '00000001' -> 0x00000001
+
+        # Filter channels based on channelSelector
+        # There is a device-level parameter called channelSelector. Each possible value of that parameter
+        # has a mask attribute. This mask can be used to filter channels that should be active.
+        # E.g. consider a sensor unit 1-gang. The sensor unit has two modes:
+        # 1. Rocker (aka on/off): mask 00000001
+        # 2. Push button: mask 00000002
+        # The sensor unit has three channels:
+        # 1. ch0000 (On/off): mask 00000001
+        # 2. ch0001 (Push button top): mask 00000002
+        # 3. ch0002 (Push button bottom: mask 00000002
+        # --> In Rocker mode, ch0000 is active, in Push button mode ch0001 and ch0002 is active
+        filter_mask = 0xFFFFFFFF
+        channel_selector_parameters = device.findall("./parameters/parameter[@channelSelector='true']")
+        for channel_selector_parameter in channel_selector_parameters:
+            # Check if matchCode matches deviceChannelSelector (see above)
+            parameter_mask = int(channel_selector_parameter.get("matchCode"), 16)
+            if parameter_mask & device_filter_mask:
+                # See which option user has selected, e.g. '1'
+                parameter_value = channel_selector_parameter.find("value").text
+                # Find that option in the list of options
+                option = channel_selector_parameter.find("./valueEnum/option[@key='{}']".format(parameter_value))
+                # Get filter mask from mask attribute
+                if option is not None:
+                    filter_mask = int(option.get('mask'), 16) # e.g. '00000001' -> 0x00000001
+
+        device_info = {
+                "configuration_url": "http://{}/".format(host),
+                "identifiers": {("freeathome", device_serialnumber)},
+                "name": device_name,
+                "model": device_model,
+                "sw_version": device_sw_version,
+                }
+
+        for channel in channels_xml.findall('channel'):
+            channel_id = channel.get('i')
+            channel_name_id = int(channel.get('nameId'), 16)
+            channel_name_id_hex = channel.get('nameId')
+            # Attributes, datapoints and parameters of the channel in one pass
+            index = ChannelIndex(channel)
+            function_id = index.attribute('functionId')
+            function_id = int(function_id, 16) if (function_id is not None and function_id != '') else None
+
+            # Check if channel matches filter mask
+            channel_mask = int(channel.get("mask"), 16)
+            if not channel_mask & filter_mask:
+                LOG.info('Ignoring serialnumber %s, channel_id %s, function ID %s since its channel mask %08x does not match device filter mask %08x', device_serialnumber, channel_id, function_id, channel_mask, filter_mask)
+                continue
+
+            same_location = channel.get('sameLocation')
+            channel_display_name = index.attribute('displayName')
+            channel_floor_id = index.attribute('floor')
+            channel_room_id = index.attribute('room')
+
+            # TODO: Move this to the custom component part
+            # Use room information from device if channel is in same location
+            floor_id = device_floor_id if channel_floor_id == '' or same_location == 'true' else channel_floor_id
+            room_id = device_room_id if channel_room_id == '' or same_location == 'true' else channel_room_id
+            LOG.debug('Device floor/room ID %s/%s, channel floor/room ID %s/%s', device_floor_id, device_room_id, channel_floor_id, channel_room_id)
+
+            # Use device display name if not configured on channel
+            display_name = channel_display_name if channel_display_name != '' else device_display_name
+
+            # Use serial number and channel if no name is configured
+            if display_name == '':
+                display_name = device_serialnumber + '/' + channel_id
+
+            # Add room name to display name if user wishes so
+            room_suffix = ''
+            if floor_id != '' and room_id != '' and use_room_names:
+                room_suffix = ' (' + roomnames[floor_id][room_id] + ')'
+
+            if room_id == '':
+                LOG.info('Ignoring serialnumber %s, channel_id %s, function ID %s since it is not assigned to a room', device_serialnumber, channel_id, function_id)
+                continue
+
+            LOG.info('Encountered serialnumber %s, channel_id %s, function ID %s', device_serialnumber, channel_id, function_id)
+            if LOG.isEnabledFor(logging.DEBUG):
+                LOG.debug(get_all_datapoints_as_str(channel))
+
+            # Add position suffix to name, e.g. 'LT' for left, top
+            position_suffix = NAME_IDS_TO_BINARY_SENSOR_SUFFIX.get(channel_name_id, '')
+
+            # Every class that handles the function ID, with the pairing IDs it wants
+            for fah_class, pairing_ids in DEVICE_REGISTRY.classify(function_id, switch_as_x):
+                datapoints = index.datapoints_by_pairing_ids(pairing_ids)
+
+                # Create an empty for all non thermostat devices
+                parameters = {}
+
+                # TODO: Get parameters for all device types
+                if(fah_class in  [FahThermostat]):
+                    parameter_ids = fah_class.parameter_ids(function_id)
+                    parameters = index.parameters_by_parameter_ids(parameter_ids)
+
+                # There is at least one matching datapoint for requested pairing IDs, so
+                # add the device
+                if not all(value is None for value in datapoints.values()):
+                    if function_id in FUNCTION_IDS_AIR_QUALITY_SENSOR:
+                        table.extend(
+                            device_entry(fah_class, device_serialnumber, channel_id, function_id, display_name + position_suffix + room_suffix, device_info, {pairing_id: datapoint}, parameters)
+                            for pairing_id, datapoint in datapoints.items())
+                    elif function_id in FUNCTION_IDS_WEATHER_STATION:    
+                        # extract extra names for weather station
+                        if channel_name_id_hex in names:
+                            channel_name = names[channel_name_id_hex]
+                        else:
+                            channel_name = display_name + position_suffix
+                        # One device per datapoint, because the wind channel carries both
+                        # wind speed and wind force.
+                        table.extend(
+                            device_entry(fah_class, device_serialnumber, channel_id, function_id, channel_name + room_suffix, device_info, {pairing_id: datapoint}, parameters)
+                            for pairing_id, datapoint in datapoints.items())
+
+                    else:
+                        table.append(device_entry(fah_class, device_serialnumber, channel_id, function_id, display_name + position_suffix + room_suffix, device_info, datapoints, parameters))
+
+    # Initial state of the channels the devices are created for
+    monitored = {}
+    for entry in table:
+        monitored.setdefault(entry['serialnumber'], set()).add(entry['channel_id'])
+    updates, _ = parse_update_xml(config, monitored)
+
+    return table, updates, shared
+
+
+# All device classes, registered when their modules were imported above
+DEVICE_CLASSES = DEVICE_REGISTRY.classes
+
+
 class Client(slixmpp.ClientXMPP):
     """ Client for connecting to the free@home sysap   """
     found_devices = False
@@ -264,11 +538,35 @@ class Client(slixmpp.ClientXMPP):
     connect_in_error = False
     auth_in_error = False
     auth_failed_callback = None
+    # Runs the device updated callbacks concurrently if set, see CallbackDispatcher
+    callback_dispatcher = None
+    # Opens encrypted updates in a worker if set, see UpdatePipeline
+    update_pipeline = None
+    # Number of commands that are sent without waiting for a response
+    command_window = 4
+    # Replace a write that was not sent yet by a newer write to the same datapoint
+    coalesce_writes = True
+    _command_pipeline = None
+    # Optional ConfigCache, devices are created from it while the SysAP is asked for changes
+    config_cache = None
+    # Optional callable, invoked with the added and removed devices if a refresh found changes
+    devices_changed_callback = None
+    _refresh_task = None
+    # Executor the configuration is parsed in, None is the default executor of the loop
+    discovery_executor = None
+    # Seconds the last discovery took to parse the configuration, and blocked the event loop
+    discovery_parse_time = 0.0
+    discovery_stall = 0.0
 
     # The specific devices
     devices = set()
-    monitored_datapoints = {}
-    monitored_parameters = {}
+    # (serialnumber, channel_id, datapoint or parameter number) -> (device, handler, attribute, codec)
+    datapoint_routes = {}
+    # serialnumber -> channel IDs with at least one route, the rest of an update is skipped
+    monitored_channels = {}
+    # Elements and bytes of the last update that were skipped without parsing them further
+    skipped_elements = 0
+    skipped_bytes = 0
 
     _update_handlers = []
     
@@ -416,27 +714,49 @@ class Client(slixmpp.ClientXMPP):
         if self.auth_failed_callback is not None:
             self.auth_failed_callback()
 
-    async def set_datapoint(self, serialnumber, channel_id, datapoint, command):
-        """ Send a command to the sysap   """
+    @property
+    def command_pipeline(self):
+        """Return the pipeline that sends the datapoint and parameter commands."""
+        if self._command_pipeline is None:
+            self._command_pipeline = CommandPipeline(self.send_rpc_command, self.command_window, self.coalesce_writes)
+        return self._command_pipeline
+
+    async def send_rpc_command(self, command, *argv):
+        """ Send a command and wait for the response of the sysap """
+        return await self.send_rpc_iq(command, *argv, callback=self.rpc_callback)
+
+    def queue_datapoint(self, serialnumber, channel_id, datapoint, command):
+        """ Queue a command for the sysap, return a future for the response """
         LOG.info("set_datapoint %s/%s %s %s", serialnumber, channel_id, datapoint, command)
 
         name = serialnumber + '/' + channel_id + '/' + datapoint
 
+        return self.command_pipeline.submit(name, 'RemoteInterface.setDatapoint', name, command)
+
+    def queue_parameter(self, serialnumber, channel_id, parameter, command):
+        """ Queue a command for the sysap, return a future for the response """
+        LOG.info("set_parameter %s/%s %s %s", serialnumber, channel_id, parameter, command)
+
+        name = serialnumber + '/' + channel_id + '/' + parameter
+
+        return self.command_pipeline.submit(name, 'RemoteInterface.setParameter', name, command)
+
+    async def set_datapoint(self, serialnumber, channel_id, datapoint, command):
+        """ Send a command to the sysap   """
         try:
-            await self.send_rpc_iq('RemoteInterface.setDatapoint',
-                                   name, command, callback=self.rpc_callback)
+            await self.queue_datapoint(serialnumber, channel_id, datapoint, command)
         except IqError as error:
             raise error
 
+    async def set_datapoints(self, serialnumber, channel_id, commands):
+        """ Send datapoint -> command writes of one channel together """
+        await asyncio.gather(*(self.set_datapoint(serialnumber, channel_id, datapoint, command)
+                               for datapoint, command in commands.items()))
+
     async def set_parameter(self, serialnumber, channel_id, parameter, command):
         """ Send a command to the sysap   """
-        LOG.info("set_parameter %s/%s %s %s", serialnumber, channel_id, parameter, command)
-
-        name = serialnumber + '/' + channel_id + '/' + parameter
-
         try:
-            await self.send_rpc_iq('RemoteInterface.setParameter',
-                                   name, command, callback=self.rpc_callback)
+            await self.queue_parameter(serialnumber, channel_id, parameter, command)
         except IqError as error:
             raise error
 
@@ -516,25 +836,32 @@ class Client(slixmpp.ClientXMPP):
                 args = message2py(msg["pubsub_event"]["items"]["item"]["update"])
 
                 if args:
+                    crypto = self.saslhandler.crypto
 
-                    xmessage = self.saslhandler.crypto.decryptPubSub(args[0])
+                    if self.update_pipeline is not None:
+                        # Only the sequence is checked here, it is recorded once the worker decrypted the update
+                        crypto.checkPubSubSequence(crypto.pubSubSequence(args[0]))
+                        if self._update_handlers:
+                            await self.update_pipeline.process(crypto, args[0], self.update_devices)
+                        else:
+                            # Nobody needs the XML, the worker parses the update while inflating it
+                            await self.update_pipeline.process(
+                                    crypto, args[0], self.apply_parsed_update,
+                                    functools.partial(parse_compressed_update, monitored=self.monitored_channels))
+                        return
 
-                    update = MessageReader(xmessage)
-                    length = update.readUint32BE()
+                    xmessage = crypto.decryptPubSub(args[0])
+
+                    if not self._update_handlers:
+                        # Nobody needs the XML, parse the update while inflating it
+                        await self.update_compressed_devices(xmessage)
+                        return
 
-                    got_bytes = update.getRemainingData()
                     try:
-                        unzipped = zlib.decompress(got_bytes)
-                    except OSError as e:
-                        LOG.error(e)
-                    except:
-                        LOG.error('error zlib.decompress ', sys.exc_info()[0])
-                    else:
-                        if len(unzipped) != length:
-                            LOG.info(
-                                "Unexpected uncompressed data length, have=" + str(len(unzipped)) + ", expected=" + str(
-                                    length))
-                        args[0] = unzipped.decode('utf-8')
+                        args[0] = inflate_update(xmessage)
+                    except Exception as e:
+                        LOG.error('error inflating update: %s', e)
+                        args = None
         else:
             if msg["pubsub_event"]["items"]["item"]["update"] is not None:
                 args = data2py(msg["pubsub_event"]["items"]["item"]["update"])
@@ -549,106 +876,72 @@ class Client(slixmpp.ClientXMPP):
         for handler in self._update_handlers:
             handler(xml)
 
-        # Ugly hack: Some SysAPs seem to return invalid XML, i.e. duplicate name attributes
-        # Strip them altogether.
-        xml_without_names = self.clean_xml(xml)
-
-        root = ET.fromstring(xml_without_names)
+        await self.apply_updates(self.parse_update_xml(xml), initializing)
 
-        updated_devices = set()
-
-        # Iterate over all channels -> devices -> datapoints
-        devices = root.find('devices')
-        for device in devices.findall('device'):
-            serialnumber = device.get('serialNumber')
-
-            channels = device.find('channels')
-            if channels is not None:
-                for channel in channels.findall('channel'):
-                    channel_id = channel.get('i')
-
-                    # Check if channel has a <function> key. If so, get the current functions sensorMatchCode
-                    # and actuatorMatchCode, which serve as a filter for relevant datapoints
-                    # This ist mostly useful to correctly set the initial state for binary sensors
-                    datapoint_filter_mask = 0xFFFFFFFF
-
-                    xml_function_id = channel.find("attribute[@name='functionId']")
-                    if xml_function_id is not None:
-
-                        # Lookup function ID in list of all possible function IDs for this channel
-                        function_id = int(xml_function_id.text, 16)
-                        xml_function = channel.find("functions/function[@functionId='%04x']" % function_id)
-
-                        if xml_function is not None:
-                            # Get sensor and actuator match codes and combine both to act as a datapoint filter
-                            sensor_match_code = int(xml_function.get("sensorMatchCode"), 16)
-                            actuator_match_code = int(xml_function.get("actuatorMatchCode"), 16)
-                            datapoint_filter_mask = sensor_match_code | actuator_match_code
-
-                    datapoints = channel.findall('.//dataPoint') # All available dataPoints
-                    parameters = channel.findall('.//parameter') # All available parameters
-
-                    # Update datapoints
-                    if datapoints is not None:
-                        for datapoint in datapoints:
-
-                            # If match code is present (i.e. initializing), check if match code matches filter
-                            match_code_hex = datapoint.get("matchCode")
-                            if match_code_hex is not None:
-                                match_code = int(match_code_hex, 16)
-                                if match_code & datapoint_filter_mask == 0:
-                                    continue
-
-                            datapoint_id = datapoint.get('i')
-
-                            # Notify every device that monitors the received datapoint
-                            lookup_key = serialnumber + '/' + channel_id + '/' + datapoint_id
-                            value = datapoint.find('value')
-
-                            # Do not spam log messages during initialization, or if value is None
-                            if not initializing and value is not None:
-                                LOG.debug("received datapoint %s = %s", lookup_key, value.text)
-
-                            if lookup_key in self.monitored_datapoints and value is not None:
-                                monitoring_device = self.monitored_datapoints[lookup_key]
-                                LOG.debug("%s %s: received datapoint %s = %s", monitoring_device.__class__.__name__, monitoring_device.name, lookup_key, value.text)
-                                monitoring_device.update_datapoint(datapoint_id, value.text)
-                                updated_devices.add(monitoring_device)
+    async def update_compressed_devices(self, message):
+        """Parse a decrypted update while inflating it and update devices."""
+        try:
+            updates, parser = parse_compressed_update(message, self.monitored_channels)
+        except (zlib.error, ValueError) as e:
+            LOG.error('error inflating update: %s', e)
+            return
 
-                    # Update parameters
-                    if parameters is not None:
-                        for parameter in parameters:
+        await self.apply_parsed_update((updates, parser))
 
-                            # TODO: Do we require matchCode stuff?
-                            parameter_id = parameter.get('i')
+    async def apply_parsed_update(self, parsed):
+        """Update devices with the updates and the parser of parse_compressed_update."""
+        await self.apply_updates(self._parsed_updates(*parsed))
 
-                             # Notify every device that monitors the received datapoint
-                            lookup_key = serialnumber + '/' + channel_id + '/' + parameter_id
-                            value = parameter.find('value')
+    async def apply_updates(self, updates, initializing=False):
+        """Hand (serialnumber, channel_id, datapoint_id, value) tuples to the devices that monitor them."""
+        updated_devices = set()
+        routes = self.datapoint_routes
+        log_updates = not initializing and LOG.isEnabledFor(logging.DEBUG)
+
+        for update in updates:
+            serialnumber, channel_id, datapoint_id, value = update
+
+            # Do not spam log messages during initialization
+            if log_updates:
+                LOG.debug("received datapoint %s/%s/%s = %s", serialnumber, channel_id, datapoint_id, value)
+
+            # Hand the value to the device that monitors the received datapoint or parameter
+            route = routes.get((serialnumber, channel_id, datapoint_id))
+            if route is not None:
+                device, handler, attribute, codec = route
+                # An empty <value/> is stored as None, as it was sent
+                if codec is not None and value is not None:
+                    try:
+                        value = codec(value)
+                    except ValueError:
+                        LOG.warning("invalid value %r for datapoint %s/%s/%s", value, serialnumber, channel_id, datapoint_id)
+                        continue
+                handler(device, attribute, datapoint_id, value)
+                updated_devices.add(device)
 
-                            # Do not spam log messages during initialization, or if value is None
-                            if not initializing and value is not None:
-                                LOG.debug("received parameter %s = %s", lookup_key, value.text)
+        if self.callback_dispatcher is not None:
+            # All callbacks of all updated devices side by side
+            await self.callback_dispatcher.dispatch(
+                    [(cb, device) for device in updated_devices for cb in device.device_updated_cbs])
+        else:
+            for device in updated_devices:
+                await device.after_update()
 
-                            if lookup_key in self.monitored_parameters and value is not None:
-                                monitoring_device = self.monitored_parameters[lookup_key]
-                                LOG.debug("%s %s: received parameter %s = %s", monitoring_device.__class__.__name__, monitoring_device.name, lookup_key, value.text)
-                                monitoring_device.update_parameter(parameter_id, value.text)
-                                updated_devices.add(monitoring_device)
+    def parse_update_xml(self, xml):
+        """Return the monitored (serialnumber, channel_id, datapoint_id, value) tuples of update XML."""
+        return self._parsed_updates(*parse_update_xml(xml, self.monitored_channels))
 
+    def _parsed_updates(self, updates, parser):
+        """Record the statistics of parser, return its updates."""
+        self.skipped_elements = parser.skipped_elements
+        self.skipped_bytes = parser.skipped_bytes
+        LOG.debug("update: %d values of monitored channels, skipped %d elements (%d bytes)",
+                  len(updates), parser.skipped_elements, parser.skipped_bytes)
 
-        for device in updated_devices:
-            await device.after_update()
+        return updates
 
     def clean_xml(self, xml):
-        # Ugly hack: Some SysAPs seem to return invalid XML, i.e. duplicate name attributes
-        # Strip them altogether.
-        duplicates = ["name", "imaginary", "inputPairingId", "outputPairingId"]
-
-        for duplicate in duplicates:
-            xml = re.sub(rf"{duplicate}=\"[^\"]*\" ([^>]*){duplicate}=\"[^\"]*\"", r'\1', xml)
-
-        return xml
+        return strip_duplicate_attributes(xml)
 
     def add_update_handler(self, handler):
         """Add update handler"""
@@ -658,54 +951,22 @@ class Client(slixmpp.ClientXMPP):
         """Clear update handlers"""
         self._update_handlers = []
 
-    def add_devices_for_all_datapoints(self, fah_class: type[FahDevice], channel, channel_id, display_name, device_info, serialnumber, datapoints, parameters, function_id):
-        devices = []
-        for pairing_id, datapoint in datapoints.items():
-            device = self.add_device(fah_class,
-                            channel,
-                            channel_id,
-                            display_name,
-                            device_info,
-                            serialnumber,
-                            datapoints={pairing_id: datapoint},
-                            parameters=parameters, function_id=function_id)
-            devices.append(device)
-        return devices
-
-    def add_device(self, fah_class: type[FahDevice], channel: object, channel_id: str, display_name: str, device_info: object,
-                   serialnumber: str,
-                   datapoints: dict[str, str],
-                   parameters: object, 
-                   function_id) -> FahDevice:
-        """ Add generic device to the list of light devices   """
-        device = fah_class(
-                self,
-                device_info,
-                serialnumber,
-                channel_id,
-                function_id,
-                display_name,
-                datapoints=datapoints,
-                parameters=parameters)
-
+    def monitor_device(self, device):
+        """ Add device to the devices and route the updates of its datapoints to it """
         self.devices.add(device)
 
-        for datapoint in datapoints.values():
+        serialnumber = sys.intern(device.serialnumber)
+        channel_id = sys.intern(device.channel_id)
+        routes = list(device.datapoint_routes.items()) + list(device.parameter_routes.items())
+
+        for number, (handler, attribute, codec) in routes:
             # State of devices is published only through output datapoints, so do not listen for input datapoints.
             # There may be a better way to check for this.
-            if datapoint is None or datapoint[0] == 'i':
+            if number[0] == 'i':
                 continue
-            LOG.debug('Monitoring datapoint ' + serialnumber + '/' + channel_id + '/' + datapoint)
-            self.monitored_datapoints[serialnumber + '/' + channel_id + '/' + datapoint] = device
-
-        for parameter in parameters.values():
-            if parameter is None or parameter[0] == 'i':
-                continue
-            LOG.debug('Monitoring parameter ' + serialnumber + '/' + channel_id + '/' + parameter)
-            self.monitored_parameters[serialnumber + '/' + channel_id + '/' + parameter] = device
-
-        LOG.info('add device %s  %s %s, datapoints %s, parameters %s', fah_class.__name__, device.lookup_key, display_name, datapoints, parameters)
-        return device
+            LOG.debug('Monitoring %s/%s/%s', serialnumber, channel_id, number)
+            self.datapoint_routes[(serialnumber, channel_id, sys.intern(number))] = (device, handler, attribute, codec)
+            self.monitored_channels.setdefault(serialnumber, set()).add(channel_id)
 
 
     async def get_config(self, pretty=False):
@@ -731,197 +992,146 @@ class Client(slixmpp.ClientXMPP):
         return self.clean_xml(config)
 
 
+    def reset_devices(self):
+        """ Forget all devices """
+        self.devices = set()
+        self.datapoint_routes = {}
+        self.monitored_channels = {}
+
+    def cache_settings(self):
+        """ Return the settings the devices depend on, a cache is only valid for the same settings """
+        return {
+                "host": self._host,
+                "use_room_names": self.use_room_names,
+                "switch_as_x": self.switch_as_x,
+                }
+
     async def find_devices(self, use_room_names, switch_as_x=False):
         """ Find the devices in the system, this is a big XML file   """
         self.use_room_names = use_room_names
         self.switch_as_x = switch_as_x
+
+        if self.config_cache is not None and await self.restore_devices():
+            # Ask the SysAP for changes in the background, the devices are usable right away
+            self._refresh_task = asyncio.get_running_loop().create_task(self.refresh_devices())
+            return
+
         config = await self.get_config()
 
         if config is not None:
-            self.found_devices = True
-
-            # Ugly hack: Some SysAPs seem to return invalid XML, i.e. duplicate name attributes
-            # Strip them altogether.
-            config_without_names = self.clean_xml(config)
-
-            root = ET.fromstring(config_without_names)
-
-            # make a list of the rooms and other names
-            roomnames = get_room_names(root)
-            names = get_names(root)
-            if names == {}: 
-                names = await get_json_names(self.component_path)
-
-            # Now look for the devices
-            devices = root.find('devices')
-
-            for device in devices.findall('device'):
-                device_serialnumber = device.get('serialNumber')
-                device_id = device.get('deviceId')
-                device_name_id = device.get('nameId')
-                device_sw_version = device.get('softwareVersion')
-
-                device_display_name = get_attribute(device, 'displayName')
-                device_floor_id = get_attribute(device, 'floor')
-                device_room_id = get_attribute(device, 'room')
-                device_model = names.get(device_name_id, 'Unknown device ' + device_name_id)
-
-                device_name = device_display_name if device_display_name != '' else device_model
-                device_name = device_name + " (" + device_serialnumber + ")"
-
-                LOG.info('Device: device id %s, name id %s, serialnumber %s, display name %s', device_id, device_name_id, device_serialnumber, device_display_name)
-
-                # Ignore devices from Philips Hue, to avoid circular definitions for users with
-                # emulated_hue enabled.
-                # TODO: Move this to the home assistant component and make it user configurable
-                if device.get('isExternal') == 'true' and device.get('interface') == 'hue':
-                    LOG.info('Ignoring Hue device with serial number %s', device_serialnumber)
-                    continue
-
-                # Ignore devices that are not yet commissioned
-                state = device.get('commissioningState')
-                if state != 'ready':
-                    LOG.info('Ignoring device with serialnumber %s since its commissioning state is not ready', device_serialnumber)
-                    continue
-
-                channels_xml = device.find('channels')
-
-                # Ignore devices without channels
-                if channels_xml is None:
-                    LOG.info('Ignoring device with serialnumber %s since has no channels', device_serialnumber)
-                    continue
-
-                # There may be a device-level parameter called deviceChannelSelector. Each possible value of that
-                # parameter has a mask attribute. This mask can be used to filter applicable channelSelectors,
-                # see below.
-                device_filter_mask = 0xFFFFFFFF
-                device_channel_selector_parameter = device.find("./parameters/parameter[@deviceChannelSelector='true']")
-                if device_channel_selector_parameter is not None:
-                    parameter_value = device_channel_selector_parameter.find("value").text
-                    device_filter_mask = int(parameter_value, 16) # e.g. '00000001' -> 0x00000001
-
-                # Filter channels based on channelSelector
-                # There is a device-level parameter called channelSelector. Each possible value of that parameter
-                # has a mask attribute. This mask can be used to filter channels that should be active.
-                # E.g. consider a sensor unit 1-gang. The sensor unit has two modes:
-                # 1. Rocker (aka on/off): mask 00000001
-                # 2. Push button: mask 00000002
-                # The sensor unit has three channels:
-                # 1. ch0000 (On/off): mask 00000001
-                # 2. ch0001 (Push button top): mask 00000002
-                # 3. ch0002 (Push button bottom: mask 00000002
-                # --> In Rocker mode, ch0000 is active, in Push button mode ch0001 and ch0002 is active
-                filter_mask = 0xFFFFFFFF
-                channel_selector_parameters = device.findall("./parameters/parameter[@channelSelector='true']")
-                for channel_selector_parameter in channel_selector_parameters:
-                    # Check if matchCode matches deviceChannelSelector (see above)
-                    parameter_mask = int(channel_selector_parameter.get("matchCode"), 16)
-                    if parameter_mask & device_filter_mask:
-                        # See which option user has selected, e.g. '1'
-                        parameter_value = channel_selector_parameter.find("value").text
-                        # Find that option in the list of options
-                        option = channel_selector_parameter.find("./valueEnum/option[@key='{}']".format(parameter_value))
-                        # Get filter mask from mask attribute
-                        if option is not None:
-                            filter_mask = int(option.get('mask'), 16) # e.g. '00000001' -> 0x00000001
-
-                device_info = {
-                        "configuration_url": "http://{}/".format(self._host),
-                        "identifiers": {("freeathome", device_serialnumber)},
-                        "name": device_name,
-                        "model": device_model,
-                        "sw_version": device_sw_version,
-                        }
-
-                for channel in channels_xml.findall('channel'):
-                    channel_id = channel.get('i')
-                    channel_name_id = int(channel.get('nameId'), 16)
-                    channel_name_id_hex = channel.get('nameId')
-                    function_id = get_attribute(channel, 'functionId')
-                    function_id = int(function_id, 16) if (function_id is not None and function_id != '') else None
-
-                    # Check if channel matches filter mask
-                    channel_mask = int(channel.get("mask"), 16)
-                    if not channel_mask & filter_mask:
-                        LOG.info('Ignoring serialnumber %s, channel_id %s, function ID %s since its channel mask %08x does not match device filter mask %08x', device_serialnumber, channel_id, function_id, channel_mask, filter_mask)
-                        continue
+            updates = await self.discover_devices(config)
 
-                    same_location = channel.get('sameLocation')
-                    channel_display_name = get_attribute(channel, 'displayName')
-                    channel_floor_id = get_attribute(channel, 'floor')
-                    channel_room_id = get_attribute(channel, 'room')
+            # Update all devices with initial state
+            await self.apply_updates(updates, initializing=True)
 
-                    # TODO: Move this to the custom component part
-                    # Use room information from device if channel is in same location
-                    floor_id = device_floor_id if channel_floor_id == '' or same_location == 'true' else channel_floor_id
-                    room_id = device_room_id if channel_room_id == '' or same_location == 'true' else channel_room_id
-                    LOG.debug('Device floor/room ID %s/%s, channel floor/room ID %s/%s', device_floor_id, device_room_id, channel_floor_id, channel_room_id)
+            if self.config_cache is not None:
+                await self.config_cache.save(self.cache_settings(), config, self.devices, updates, self.discovery_executor)
 
-                    # Use device display name if not configured on channel
-                    display_name = channel_display_name if channel_display_name != '' else device_display_name
+    async def restore_devices(self):
+        """ Create the devices from the config cache, return False if the cache is not usable
 
-                    # Use serial number and channel if no name is configured
-                    if display_name == '':
-                        display_name = device_serialnumber + '/' + channel_id
+        The cache is read in the discovery executor, it holds the state as
+        plain tuples, so nothing is parsed on the event loop. The update
+        handlers are not called, the state is not an update of the SysAP.
+        """
+        cached = await self.config_cache.load(self.cache_settings(), self.discovery_executor)
+        if cached is None:
+            return False
 
-                    # Add room name to display name if user wishes so
-                    room_suffix = ''
-                    if floor_id != '' and room_id != '' and self.use_room_names:
-                        room_suffix = ' (' + roomnames[floor_id][room_id] + ')'
+        table, state = cached
+        self.create_devices(table)
 
-                    if room_id == '':
-                        LOG.info('Ignoring serialnumber %s, channel_id %s, function ID %s since it is not assigned to a room', device_serialnumber, channel_id, function_id)
-                        continue
+        LOG.info('Restored %s devices from %s', len(self.devices), self.config_cache.path)
 
-                    LOG.info('Encountered serialnumber %s, channel_id %s, function ID %s', device_serialnumber, channel_id, function_id)
-                    LOG.debug(get_all_datapoints_as_str(channel))
+        # Update all devices with the state they had when the cache was written
+        await self.apply_updates(state, initializing=True)
+        return True
 
-                    # Ask all classes if the current function ID should be handled
-                    for fah_class in [FahLight, FahSwitch, FahCover, FahBinarySensor, FahThermostat, FahLightScene, FahLightGroup, FahSensor, FahLock]:
-                        # Add position suffix to name, e.g. 'LT' for left, top
-                        position_suffix = NAME_IDS_TO_BINARY_SENSOR_SUFFIX.get(channel_name_id, '')
+    def cancel_refresh(self):
+        """ Stop a refresh of the devices that is still running """
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
 
-                        # If function should be handled, it returns a list of relevant pairing IDs
-                        if fah_class in [FahLight, FahSwitch]:
-                            # Handle special case for lights and switches,
-                            # based on switch_as_x feature, different pairing IDs are returned
-                            pairing_ids = fah_class.pairing_ids(function_id, switch_as_x=self.switch_as_x)
-                        else:
-                            pairing_ids = fah_class.pairing_ids(function_id)
-
-                        # List of pairing IDs was returned, so given class wants to handle the current
-                        # function with the returned pairing IDs.
-                        if pairing_ids is not None:
-                            datapoints = get_datapoints_by_pairing_ids(channel, pairing_ids)
-
-                            # Create an empty for all non thermostat devices
-                            parameters = {}
-
-                            # TODO: Get parameters for all device types
-                            if(fah_class in  [FahThermostat]):
-                                parameter_ids = fah_class.parameter_ids(function_id)
-                                parameters = get_parameters_by_parameter_ids(channel,parameter_ids)
-
-                            # There is at least one matching datapoint for requested pairing IDs, so
-                            # add the device
-                            if not all(value is None for value in datapoints.values()):
-                                if function_id in FUNCTION_IDS_AIR_QUALITY_SENSOR:
-                                    self.add_devices_for_all_datapoints(fah_class, channel, channel_id, display_name + position_suffix + room_suffix, device_info, device_serialnumber, datapoints=datapoints, parameters = parameters, function_id=function_id)
-                                elif function_id in FUNCTION_IDS_WEATHER_STATION:    
-                                    # extract extra names for weather station
-                                    if channel_name_id_hex in names:
-                                        channel_name = names[channel_name_id_hex]
-                                    else:
-                                        channel_name = display_name + position_suffix
-                                    # One device per datapoint, because the wind channel carries both
-                                    # wind speed and wind force.
-                                    self.add_devices_for_all_datapoints(fah_class, channel, channel_id, channel_name + room_suffix, device_info, device_serialnumber, datapoints=datapoints, parameters = parameters, function_id=function_id)
-                                        
-                                else:
-                                    self.add_device(fah_class, channel, channel_id, display_name + position_suffix + room_suffix, device_info, device_serialnumber, datapoints=datapoints, parameters = parameters, function_id=function_id)
+    async def refresh_devices(self):
+        """ Read the configuration of the SysAP again and apply what changed since the cache was written """
+        try:
+            config = await self.get_config()
+        except Exception:
+            LOG.exception('Cannot refresh the devices of %s', self._host)
+            return
+
+        if config is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(self.discovery_executor, config_digest, config)
+        if digest == self.config_cache.digest:
+            LOG.info('Configuration of %s did not change', self._host)
+            return
+
+        # Devices that did not change are kept, the entities of Home Assistant refer to them
+        previous = {device_key(describe_device(device)): device for device in self.devices}
+        updates = await self.discover_devices(config)
+
+        devices = self.devices
+        added = []
+        self.reset_devices()
+        for device in devices:
+            kept = previous.pop(device_key(describe_device(device)), None)
+            if kept is None:
+                added.append(device)
+                kept = device
+            self.monitor_device(kept)
+        removed = list(previous.values())
+
+        await self.apply_updates(updates, initializing=True)
+        await self.config_cache.save(self.cache_settings(), config, self.devices, updates, self.discovery_executor)
+
+        LOG.info('Configuration of %s changed, %s devices added, %s removed', self._host, len(added), len(removed))
+        if (added or removed) and self.devices_changed_callback is not None:
+            self.devices_changed_callback(added, removed)
+
+    async def discover_devices(self, config):
+        """ Create the devices of a configuration, return the initial state of their datapoints
+
+        The configuration is parsed in the discovery executor, only the devices
+        are created on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        table, updates, shared = await loop.run_in_executor(
+                self.discovery_executor, describe_config,
+                config, self._host, self.use_room_names, self.switch_as_x, self.component_path)
+        self.discovery_parse_time = time.monotonic() - start
+
+        # Held here, the same tables are shared by all SysAPs of the process
+        hold_start = time.monotonic()
+        for kind, (digest, shared_table) in shared.items():
+            SHARED_TABLES.add(kind, digest, self._host, shared_table)
+        hold_time = time.monotonic() - hold_start
+
+        self.create_devices(table)
+        self.discovery_stall += hold_time
+        LOG.info('Discovered %s devices, parsing took %.3fs, the event loop was blocked for %.3fs',
+                 len(self.devices), self.discovery_parse_time, self.discovery_stall)
+        return updates
+
+    def create_devices(self, table):
+        """ Replace the devices by the devices of a device table """
+        start = time.monotonic()
+        classes = {fah_class.__name__: fah_class for fah_class in DEVICE_CLASSES}
+        device_infos = {}
+        self.found_devices = True
+        self.reset_devices()
+
+        for entry in table:
+            device = restore_device(classes[entry['class']], self, entry, device_infos)
+            self.monitor_device(device)
+            LOG.info('add device %s  %s %s, datapoints %s, parameters %s', entry['class'], device.lookup_key, device.name, device.datapoints, device.parameters)
+
+        self.discovery_stall = time.monotonic() - start
 
-            # Update all devices with initial state
-            await self.update_devices(config, initializing=True)
 
 class FreeAtHomeSysApp(object):
     """"  This class connects to the Busch Jeager Free @ Home sysapp
@@ -948,6 +1158,15 @@ class FreeAtHomeSysApp(object):
         # Optional plain callable, invoked when the SysAP rejects the login.
         # Keeps this module free of any Home Assistant import.
         self.auth_failed_callback = None
+        # Optional CallbackDispatcher, the device callbacks run serially without it
+        self.callback_dispatcher = None
+        # Optional UpdatePipeline, encrypted updates are opened on the event loop without it
+        self.update_pipeline = None
+        # File to cache the configuration in, None disables the cache
+        self.cache_path = None
+        # Optional plain callable, invoked with the added and removed devices
+        # when the configuration in the cache turned out to be outdated.
+        self.devices_changed_callback = None
 
     @property
     def host(self):
@@ -1004,6 +1223,11 @@ class FreeAtHomeSysApp(object):
             # create xmpp client
             self.xmpp = Client(self._jid, self._password, self._host, self._port, fahversion, iterations, salt, self.reconnect, self._component_path)
             self.xmpp.auth_failed_callback = self.auth_failed_callback
+            self.xmpp.callback_dispatcher = self.callback_dispatcher
+            self.xmpp.update_pipeline = self.update_pipeline
+            self.xmpp.devices_changed_callback = self.devices_changed_callback
+            if self.cache_path is not None:
+                self.xmpp.config_cache = ConfigCache(self.cache_path)
             # connect
             self.xmpp.sysap_connect()
 
@@ -1013,8 +1237,14 @@ class FreeAtHomeSysApp(object):
             # Make sure that client does not reconnect
             LOG.info("Disconnecting connection with Free@Home")
             self.xmpp.reconnect = False
+            self.xmpp.cancel_refresh()
             self.xmpp.disconnect()
 
+        if self.update_pipeline is not None:
+            self.update_pipeline.close()
+
+        SHARED_TABLES.release(self.host)
+
         return True
 
     async def shutdown(self, event=None):
@@ -1029,6 +1259,24 @@ class FreeAtHomeSysApp(object):
         if self.xmpp is not None:
             self.xmpp.auth_failed_callback = callback
 
+    def set_callback_dispatcher(self, dispatcher):
+        """ Run the device updated callbacks through dispatcher, None runs them serially """
+        self.callback_dispatcher = dispatcher
+        if self.xmpp is not None:
+            self.xmpp.callback_dispatcher = dispatcher
+
+    def set_update_pipeline(self, pipeline):
+        """ Open encrypted updates in the worker of pipeline, None opens them on the event loop """
+        self.update_pipeline = pipeline
+        if self.xmpp is not None:
+            self.xmpp.update_pipeline = pipeline
+
+    def set_devices_changed_callback(self, callback):
+        """ Register a callable that is invoked when devices were added or removed after a restart from the cache """
+        self.devices_changed_callback = callback
+        if self.xmpp is not None:
+            self.xmpp.devices_changed_callback = callback
+
     def authentication_in_error(self):
         """ True if the last attempt failed on authentication, not on the connection """
         return self.xmpp is not None and self.xmpp.authentication_in_error()
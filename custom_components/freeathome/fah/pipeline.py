@@ -0,0 +1,138 @@
+"""
+Pipelined sending of RPC commands to the SysAP
+"""
+import asyncio
+import bisect
+import logging
+import time
+
+LOG = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the round trip time histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class _Command:
+    """A command waiting to be sent, and the futures of everyone waiting for its reply."""
+
+    __slots__ = ('method', 'args', 'futures', 'done')
+
+    def __init__(self, method, args, future):
+        self.method = method
+        self.args = args
+        self.futures = [future]
+        # Set when the command was answered, successful or not
+        self.done = future.get_loop().create_future()
+
+
+class CommandPipeline:
+    """Keep up to window RPC commands in flight.
+
+    Every command is sent as soon as a slot in the window is free, without
+    waiting for the reply to the previous one, so a device method that writes
+    several datapoints needs about one round trip instead of one per datapoint.
+    Commands with the same key, the same datapoint, are still sent one after
+    the other, in the order they were submitted.
+
+    If coalesce is set, a command that replaces a command for the same key
+    that was not sent yet takes its place, so there is at most one command in
+    flight and one waiting per key. A burst of writes, like from dragging a
+    slider, then only sends the first and the last value. The replaced
+    commands are counted in dropped, and their callers get the reply to the
+    command that was sent instead.
+
+    send is a coroutine function that sends a single command and returns the
+    reply. The round trip times are collected in latency_histogram.
+    """
+
+    def __init__(self, send, window=4, coalesce=False):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self._send = send
+        self._window = asyncio.Semaphore(window)
+        self.window = window
+        self.coalesce = coalesce
+        # Last submitted command per key
+        self._tails = {}
+        # Command per key that was submitted but not sent yet
+        self._waiting = {}
+        self._tasks = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._latency_counts = [0] * len(LATENCY_BUCKETS)
+
+    def submit(self, key, method, *args):
+        """Queue a command, return a future for the reply."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if self.coalesce:
+            waiting = self._waiting.get(key)
+            if waiting is not None:
+                waiting.method = method
+                waiting.args = args
+                waiting.futures.append(future)
+                self.dropped += 1
+                return future
+
+        command = _Command(method, args, future)
+        previous = self._tails.get(key)
+        self._tails[key] = command
+        self._waiting[key] = command
+
+        task = loop.create_task(self._run(key, previous, command))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return future
+
+    @property
+    def pending(self):
+        """Return the number of commands that were not answered yet."""
+        return len(self._tasks)
+
+    @property
+    def latency_histogram(self):
+        """Return the number of round trips per bucket upper bound in seconds."""
+        return dict(zip(LATENCY_BUCKETS, self._latency_counts))
+
+    async def _run(self, key, previous, command):
+        try:
+            if previous is not None:
+                await previous.done
+
+            async with self._window:
+                # From here on the command can no longer be replaced
+                if self._waiting.get(key) is command:
+                    del self._waiting[key]
+
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                start = time.monotonic()
+                try:
+                    result = await self._send(command.method, *command.args)
+                except Exception as error:
+                    self.failed += 1
+                    for future in command.futures:
+                        if not future.done():
+                            future.set_exception(error)
+                else:
+                    for future in command.futures:
+                        if not future.done():
+                            future.set_result(result)
+                finally:
+                    self.in_flight -= 1
+                    self.sent += 1
+                    self._latency_counts[bisect.bisect_left(LATENCY_BUCKETS, time.monotonic() - start)] += 1
+        finally:
+            for future in command.futures:
+                if not future.done():
+                    future.cancel()
+            command.done.set_result(None)
+            if self._waiting.get(key) is command:
+                del self._waiting[key]
+            if self._tails.get(key) is command:
+                del self._tails[key]
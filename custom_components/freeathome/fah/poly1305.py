@@ -0,0 +1,106 @@
+"""
+Poly1305 one-time authenticators of the key exchange
+"""
+import ctypes
+import ctypes.util
+import logging
+
+from .pure_pynacl.fastnacl import crypto_onetimeauth_poly1305, crypto_onetimeauth_poly1305_verify
+
+LOG = logging.getLogger(__name__)
+
+TOKEN_BYTES = 16
+KEY_BYTES = 32
+
+
+class PurePoly1305:
+    """Poly1305 in pure Python, works everywhere but is slower, see fastnacl."""
+
+    name = "pure"
+
+    def auth(self, message, key):
+        """Return the 16 byte authenticator of message under the 32 byte key."""
+        return crypto_onetimeauth_poly1305(bytes(message), key)
+
+    def verify(self, token, message, key):
+        """Return 0 if token authenticates message under key, -1 if not (like NaCl)."""
+        return crypto_onetimeauth_poly1305_verify(token, bytes(message), key)
+
+
+class SodiumPoly1305:
+    """Poly1305 of libsodium.
+
+    PyNaCl does not wrap crypto_onetimeauth, so the functions are called through
+    ctypes, from the libsodium PyNaCl is built with or else the one of the system.
+    """
+
+    name = "sodium"
+
+    def __init__(self, library):
+        self._auth = library.crypto_onetimeauth_poly1305
+        self._auth.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_ulonglong, ctypes.c_char_p)
+        self._auth.restype = ctypes.c_int
+        self._verify = library.crypto_onetimeauth_poly1305_verify
+        self._verify.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_ulonglong, ctypes.c_char_p)
+        self._verify.restype = ctypes.c_int
+
+    @classmethod
+    def load(cls):
+        """Return the backend, None if no libsodium with poly1305 can be loaded."""
+        for path in cls._library_paths():
+            try:
+                return cls(ctypes.CDLL(path))
+            except (OSError, AttributeError) as e:
+                LOG.debug("no poly1305 in %s: %s", path, e)
+        return None
+
+    @staticmethod
+    def _library_paths():
+        try:
+            from nacl import _sodium
+            yield _sodium.__file__
+        except ImportError:
+            pass
+        path = ctypes.util.find_library("sodium")
+        if path is not None:
+            yield path
+
+    def auth(self, message, key):
+        """Return the 16 byte authenticator of message under the 32 byte key."""
+        key = bytes(key)
+        if len(key) != KEY_BYTES:
+            raise ValueError("poly1305 key must be %d bytes" % KEY_BYTES)
+        message = bytes(message)
+        token = ctypes.create_string_buffer(TOKEN_BYTES)
+        self._auth(token, message, len(message), key)
+        return token.raw
+
+    def verify(self, token, message, key):
+        """Return 0 if token authenticates message under key, -1 if not (like NaCl)."""
+        key = bytes(key)
+        token = bytes(token[:TOKEN_BYTES])
+        if len(key) != KEY_BYTES or len(token) != TOKEN_BYTES:
+            return -1
+        message = bytes(message)
+        return 0 if self._verify(token, message, len(message), key) == 0 else -1
+
+
+BACKENDS = {
+        PurePoly1305.name: PurePoly1305,
+        SodiumPoly1305.name: SodiumPoly1305.load,
+        }
+
+
+def load_backend(name=None):
+    """Return the poly1305 backend name, or the fastest one available without a name."""
+    if name is not None:
+        backend = BACKENDS[name]()
+        if backend is None:
+            raise ValueError("poly1305 backend %s is not available" % name)
+        return backend
+
+    backend = SodiumPoly1305.load()
+    if backend is None:
+        LOG.info("libsodium poly1305 not available, using the pure Python implementation")
+        backend = PurePoly1305()
+    return backend
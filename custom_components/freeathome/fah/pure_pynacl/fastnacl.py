@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Plain int implementations of the tweetnacl primitives the key exchange needs
+
+tweetnacl.py emulates C integer types with an Int object for every value,
+which makes it very slow. The functions here compute the same results on
+plain Python ints: 32 bit words with explicit masks for salsa20, and the
+arbitrary precision ints of Python for the 130 bit arithmetic of poly1305
+and the field arithmetic of curve25519. Messages are read through
+memoryview, without copies. Arguments and results are bytes.
+
+Like tweetnacl.py, the functions are not constant time.
+"""
+import hmac
+import struct
+
+MASK32 = 0xFFFFFFFF
+
+_WORDS = struct.Struct("<16I")
+_KEY = struct.Struct("<8I")
+_NONCE = struct.Struct("<4I")
+_HSALSA20 = struct.Struct("<8I")
+_SIGMA = struct.unpack("<4I", b"expand 32-byte k")
+
+
+def _salsa20_rounds(x0, x1, x2, x3, x4, x5, x6, x7, x8, x9, x10, x11, x12, x13, x14, x15):
+    """Return the state after the 20 rounds of salsa20."""
+    for _ in range(10):
+        # Column round
+        t = (x0 + x12) & MASK32; x4 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x4 + x0) & MASK32; x8 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x8 + x4) & MASK32; x12 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x12 + x8) & MASK32; x0 ^= ((t << 18) | (t >> 14)) & MASK32
+        t = (x5 + x1) & MASK32; x9 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x9 + x5) & MASK32; x13 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x13 + x9) & MASK32; x1 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x1 + x13) & MASK32; x5 ^= ((t << 18) | (t >> 14)) & MASK32
+        t = (x10 + x6) & MASK32; x14 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x14 + x10) & MASK32; x2 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x2 + x14) & MASK32; x6 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x6 + x2) & MASK32; x10 ^= ((t << 18) | (t >> 14)) & MASK32
+        t = (x15 + x11) & MASK32; x3 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x3 + x15) & MASK32; x7 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x7 + x3) & MASK32; x11 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x11 + x7) & MASK32; x15 ^= ((t << 18) | (t >> 14)) & MASK32
+        # Row round
+        t = (x0 + x3) & MASK32; x1 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x1 + x0) & MASK32; x2 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x2 + x1) & MASK32; x3 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x3 + x2) & MASK32; x0 ^= ((t << 18) | (t >> 14)) & MASK32
+        t = (x5 + x4) & MASK32; x6 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x6 + x5) & MASK32; x7 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x7 + x6) & MASK32; x4 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x4 + x7) & MASK32; x5 ^= ((t << 18) | (t >> 14)) & MASK32
+        t = (x10 + x9) & MASK32; x11 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x11 + x10) & MASK32; x8 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x8 + x11) & MASK32; x9 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x9 + x8) & MASK32; x10 ^= ((t << 18) | (t >> 14)) & MASK32
+        t = (x15 + x14) & MASK32; x12 ^= ((t << 7) | (t >> 25)) & MASK32
+        t = (x12 + x15) & MASK32; x13 ^= ((t << 9) | (t >> 23)) & MASK32
+        t = (x13 + x12) & MASK32; x14 ^= ((t << 13) | (t >> 19)) & MASK32
+        t = (x14 + x13) & MASK32; x15 ^= ((t << 18) | (t >> 14)) & MASK32
+    return x0, x1, x2, x3, x4, x5, x6, x7, x8, x9, x10, x11, x12, x13, x14, x15
+
+
+def _salsa20_state(key, in_):
+    """Return the input state of salsa20 for a 32 byte key and 16 byte input."""
+    k0, k1, k2, k3, k4, k5, k6, k7 = _KEY.unpack(key)
+    n0, n1, n2, n3 = _NONCE.unpack(in_)
+    c0, c1, c2, c3 = _SIGMA
+    return (c0, k0, k1, k2, k3, c1, n0, n1, n2, n3, c2, k4, k5, k6, k7, c3)
+
+
+def crypto_core_salsa20(in_, key):
+    """Return the 64 byte salsa20 block of a 16 byte input (nonce and counter) and 32 byte key."""
+    state = _salsa20_state(key, in_)
+    mixed = _salsa20_rounds(*state)
+    return _WORDS.pack(*[(a + b) & MASK32 for a, b in zip(mixed, state)])
+
+
+def crypto_core_hsalsa20(in_, key):
+    """Return the 32 byte hsalsa20 subkey of a 16 byte input and 32 byte key."""
+    x = _salsa20_rounds(*_salsa20_state(key, in_))
+    return _HSALSA20.pack(x[0], x[5], x[10], x[15], x[6], x[7], x[8], x[9])
+
+
+def crypto_stream_salsa20_xor(message, nonce, key):
+    """Return message xor the salsa20 stream of an 8 byte nonce and 32 byte key."""
+    message = memoryview(message)
+    k0, k1, k2, k3, k4, k5, k6, k7 = _KEY.unpack(key)
+    n0, n1 = struct.unpack("<2I", nonce)
+    c0, c1, c2, c3 = _SIGMA
+    out = bytearray(len(message))
+    for block, offset in enumerate(range(0, len(message), 64)):
+        state = (c0, k0, k1, k2, k3, c1, n0, n1, block & MASK32, block >> 32, c2, k4, k5, k6, k7, c3)
+        mixed = _salsa20_rounds(*state)
+        stream = _WORDS.pack(*[(a + b) & MASK32 for a, b in zip(mixed, state)])
+        chunk = message[offset:offset + 64]
+        size = len(chunk)
+        out[offset:offset + size] = (
+                int.from_bytes(chunk, "little") ^ int.from_bytes(stream[:size], "little")
+            ).to_bytes(size, "little")
+    return bytes(out)
+
+
+def crypto_stream_salsa20(length, nonce, key):
+    """Return length bytes of the salsa20 stream of an 8 byte nonce and 32 byte key."""
+    return crypto_stream_salsa20_xor(bytes(length), nonce, key)
+
+
+def crypto_stream_xsalsa20_xor(message, nonce, key):
+    """Return message xor the xsalsa20 stream of a 24 byte nonce and 32 byte key."""
+    return crypto_stream_salsa20_xor(message, nonce[16:24], crypto_core_hsalsa20(nonce[:16], key))
+
+
+def crypto_stream_xsalsa20(length, nonce, key):
+    """Return length bytes of the xsalsa20 stream of a 24 byte nonce and 32 byte key."""
+    return crypto_stream_xsalsa20_xor(bytes(length), nonce, key)
+
+
+P1305 = (1 << 130) - 5
+_CLAMP = 0x0FFFFFFC0FFFFFFC0FFFFFFC0FFFFFFF
+_MASK128 = (1 << 128) - 1
+
+
+def crypto_onetimeauth_poly1305(message, key):
+    """Return the 16 byte poly1305 authenticator of message under a 32 byte key."""
+    key = memoryview(key)
+    r = int.from_bytes(key[:16], "little") & _CLAMP
+    s = int.from_bytes(key[16:32], "little")
+    message = memoryview(message)
+    h = 0
+    for offset in range(0, len(message), 16):
+        chunk = message[offset:offset + 16]
+        h = (h + int.from_bytes(chunk, "little") + (1 << (8 * len(chunk)))) * r % P1305
+    return ((h + s) & _MASK128).to_bytes(16, "little")
+
+
+def crypto_onetimeauth_poly1305_verify(token, message, key):
+    """Return 0 if the 16 byte token authenticates message under key, -1 if not."""
+    expected = crypto_onetimeauth_poly1305(message, key)
+    return 0 if hmac.compare_digest(bytes(token[:16]), expected) else -1
+
+
+def crypto_secretbox_xsalsa20poly1305(message, nonce, key):
+    """Return the authenticator followed by the encrypted message (like PyNaCl)."""
+    c = crypto_stream_xsalsa20_xor(bytes(32) + bytes(message), nonce, key)
+    return crypto_onetimeauth_poly1305(memoryview(c)[32:], c[:32]) + c[32:]
+
+
+def crypto_secretbox_xsalsa20poly1305_open(box, nonce, key):
+    """Return the message of a box of crypto_secretbox_xsalsa20poly1305, None if it is forged."""
+    box = memoryview(box)
+    if len(box) < 16:
+        return None
+    c = crypto_stream_xsalsa20_xor(bytes(32) + bytes(box[16:]), nonce, key)
+    if crypto_onetimeauth_poly1305_verify(box[:16], box[16:], c[:32]) != 0:
+        return None
+    return c[32:]
+
+
+P25519 = (1 << 255) - 19
+_A24 = 121665
+
+
+def crypto_scalarmult_curve25519(n, p):
+    """Return the 32 byte u-coordinate of scalar n times point p (RFC 7748, X25519)."""
+    k = int.from_bytes(n, "little")
+    k &= ~7
+    k &= ~(128 << 8 * 31)
+    k |= 64 << 8 * 31
+    x1 = int.from_bytes(p, "little") & ((1 << 255) - 1)
+
+    # Montgomery ladder
+    x2, z2, x3, z3 = 1, 0, x1, 1
+    swap = 0
+    for t in range(254, -1, -1):
+        bit = (k >> t) & 1
+        if swap ^ bit:
+            x2, x3 = x3, x2
+            z2, z3 = z3, z2
+        swap = bit
+
+        a = x2 + z2
+        aa = a * a % P25519
+        b = x2 - z2
+        bb = b * b % P25519
+        e = aa - bb
+        da = (x3 - z3) * a % P25519
+        cb = (x3 + z3) * b % P25519
+        x3 = (da + cb) ** 2 % P25519
+        z3 = x1 * (da - cb) ** 2 % P25519
+        x2 = aa * bb % P25519
+        z2 = e * (aa + _A24 * e) % P25519
+    if swap:
+        x2, z2 = x3, z3
+
+    return (x2 * pow(z2, P25519 - 2, P25519) % P25519).to_bytes(32, "little")
+
+
+_BASE = (9).to_bytes(32, "little")
+
+
+def crypto_scalarmult_curve25519_base(n):
+    """Return the public key of the 32 byte secret key n."""
+    return crypto_scalarmult_curve25519(n, _BASE)
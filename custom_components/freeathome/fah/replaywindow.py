@@ -0,0 +1,66 @@
+"""
+Replay protection of the sequence numbers of encrypted messages
+"""
+
+
+class ReplayWindow:
+    """Sliding window of the sequence numbers received last, as in IPsec and DTLS.
+
+    A sequence number is accepted once: if it is higher than any before, or
+    if it is one of the size below the highest that was skipped so far. Older
+    ones and repeated ones are rejected. The received ones are bits of an int,
+    bit i is the highest minus i, so every check is a shift and a mask.
+
+    start is the first sequence number that is expected, the lower ones are
+    rejected. Without start the first sequence number received is accepted.
+    """
+
+    __slots__ = ('size', '_mask', 'highest', '_bits')
+
+    def __init__(self, size=64, start=None):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self._mask = (1 << size) - 1
+        if start is None:
+            self.highest = None
+            self._bits = 0
+        else:
+            # Everything below start counts as received
+            self.highest = start - 1
+            self._bits = self._mask
+
+    def check(self, sequence):
+        """Return True if sequence would be accepted."""
+        highest = self.highest
+        if highest is None or sequence > highest:
+            return True
+        offset = highest - sequence
+        return offset < self.size and not (self._bits >> offset) & 1
+
+    def accept(self, sequence):
+        """Mark sequence as received, return False (and mark nothing) if it must be rejected."""
+        highest = self.highest
+        if highest is None:
+            self.highest = sequence
+            self._bits = 1
+            return True
+        if sequence > highest:
+            shift = sequence - highest
+            if shift >= self.size:
+                # Everything received before left the window
+                self._bits = 1
+            else:
+                self._bits = ((self._bits << shift) | 1) & self._mask
+            self.highest = sequence
+            return True
+        offset = highest - sequence
+        if offset >= self.size or (self._bits >> offset) & 1:
+            return False
+        self._bits |= 1 << offset
+        return True
+
+    @property
+    def next_sequence(self):
+        """Return the sequence number after the highest one, None if nothing was received yet."""
+        return None if self.highest is None else self.highest + 1
@@ -0,0 +1,111 @@
+"""
+Lookup tables that are shared by all SysAPs of the process
+"""
+import hashlib
+import threading
+
+
+def get_section(xml, tag):
+    """Return the XML of the first tag element in xml, None if there is none."""
+    start = xml.find('<' + tag)
+    while start >= 0 and xml[start + len(tag) + 1:start + len(tag) + 2] not in ('>', ' ', '/'):
+        start = xml.find('<' + tag, start + 1)
+    if start < 0:
+        return None
+    opening = xml.find('>', start)
+    if xml[opening - 1] == '/':
+        return xml[start:opening + 1]
+    closing = '</' + tag + '>'
+    end = xml.find(closing, opening)
+    return xml[start:] if end < 0 else xml[start:end + len(closing)]
+
+
+def section_digest(xml):
+    """Return the digest a table built from xml is stored under."""
+    return hashlib.sha256(xml.encode('utf-8')).digest()
+
+
+class SharedTables:
+    """Tables derived from configuration XML, stored once per process.
+
+    Installations with several SysAPs, and every reading of the configuration
+    of one SysAP, mostly carry the same names and the same floor plan. A table
+    is stored under the digest of the XML it was built from, so equal XML
+    results in one table, that every owner gets. Tables must not be changed.
+
+    An owner (e.g. the host of a SysAP) holds one table of every kind, getting
+    another one releases the one it held before. A table is dropped as soon
+    as nobody holds it any more.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (kind, digest) -> table
+        self._tables = {}
+        # (kind, digest) -> owners that hold the table
+        self._owners = {}
+        # (owner, kind) -> (kind, digest)
+        self._held = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, xml, owner, build):
+        """Return the table of kind for xml, calling build() only if nobody holds it yet."""
+        key = (kind, section_digest(xml))
+
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self.hits += 1
+                self._hold(owner, kind, key)
+                return table
+
+        return self.add(kind, key[1], owner, build())
+
+    def add(self, kind, digest, owner, table):
+        """Return the table of kind stored under digest, table if nobody holds one yet.
+
+        For tables that were built elsewhere, like in another process, from
+        XML with that digest (see section_digest).
+        """
+        key = (kind, digest)
+
+        with self._lock:
+            # Another owner, or thread, may have been first, keep the first table
+            shared = self._tables.get(key)
+            if shared is None:
+                self.misses += 1
+                shared = self._tables[key] = table
+            else:
+                self.hits += 1
+            self._hold(owner, kind, key)
+            return shared
+
+    def release(self, owner):
+        """Release all tables of an owner."""
+        with self._lock:
+            for held in [held for held in self._held if held[0] == owner]:
+                self._drop(owner, self._held.pop(held))
+
+    def __len__(self):
+        return len(self._tables)
+
+    def _hold(self, owner, kind, key):
+        previous = self._held.get((owner, kind))
+        if previous == key:
+            return
+        self._held[(owner, kind)] = key
+        self._owners.setdefault(key, set()).add(owner)
+        if previous is not None:
+            self._drop(owner, previous)
+
+    def _drop(self, owner, key):
+        owners = self._owners[key]
+        owners.discard(owner)
+        if not owners:
+            del self._owners[key]
+            del self._tables[key]
+
+
+# The tables of all clients of the process
+SHARED_TABLES = SharedTables()
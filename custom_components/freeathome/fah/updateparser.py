@@ -0,0 +1,216 @@
+"""
+Incremental parser for the update messages of the SysAP
+"""
+import logging
+
+from xml.parsers import expat
+
+LOG = logging.getLogger(__name__)
+
+
+class DuplicateAttributeError(Exception):
+    """Raised when the SysAP sent a tag with a duplicate attribute."""
+
+
+class UpdateParser:
+    """Event driven parser for device update XML.
+
+    The XML is fed to expat, in one piece or in chunks, and every datapoint and
+    parameter value inside a channel is collected as a
+    (serialnumber, channel_id, datapoint_id, value) tuple. No element tree is
+    built. Datapoint and parameter IDs do not overlap ('idp'/'odp' versus
+    'pm'), so both share one stream.
+
+    Values of a channel are emitted when the channel is closed, because the
+    datapoint filter (sensor and actuator match codes of the active function)
+    is only known after the channel attributes and functions have been read.
+
+    If monitored is given, it maps serial numbers to the channel IDs of interest.
+    Other devices and channels are skipped: their elements are only counted,
+    in skipped_elements and skipped_bytes, and nothing of them is kept.
+    """
+
+    def __init__(self, monitored=None):
+        self._monitored = monitored
+        self._monitored_channels = None
+        self.skipped_elements = 0
+        self.skipped_bytes = 0
+        self._skip_depth = 0
+        self._skip_start = 0
+
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+
+        self._stack = []
+        self._updates = []
+
+        self._serialnumber = None
+        self._channel_id = None
+        self._function_id = None
+        self._functions = None
+        self._datapoints = None
+        self._parameters = None
+
+        # [datapoint_id, match_code, value] of the datapoint or parameter being read
+        self._item = None
+        # Collects the text of the element being read, None if not interested.
+        # The character data handler is only installed while reading such an
+        # element, so the whitespace between all other elements costs nothing.
+        self._text = None
+
+    def feed(self, data):
+        """Feed a chunk of XML, return the updates completed so far."""
+        self._parse(data, False)
+        return self.read_updates()
+
+    def close(self):
+        """Finish parsing, return the remaining updates."""
+        self._parse(b'', True)
+        return self.read_updates()
+
+    def read_updates(self):
+        """Return and forget the updates collected so far."""
+        updates = self._updates
+        self._updates = []
+        return updates
+
+    def _parse(self, data, final):
+        try:
+            self._parser.Parse(data, final)
+        except expat.ExpatError as error:
+            if error.code == expat.errors.codes[expat.errors.XML_ERROR_DUPLICATE_ATTRIBUTE]:
+                raise DuplicateAttributeError(str(error)) from error
+            raise
+
+    def _start(self, tag, attrs):
+        stack = self._stack
+        parent = stack[-1] if stack else None
+        stack.append(tag)
+
+        if self._channel_id is None:
+            if tag == 'device' and parent == 'devices':
+                serialnumber = attrs.get('serialNumber')
+                if self._monitored is not None:
+                    self._monitored_channels = self._monitored.get(serialnumber)
+                    if self._monitored_channels is None:
+                        self._skip()
+                        return
+                self._serialnumber = serialnumber
+            elif tag == 'channel' and parent == 'channels' and self._serialnumber is not None:
+                channel_id = attrs.get('i')
+                if self._monitored_channels is not None and channel_id not in self._monitored_channels:
+                    self._skip()
+                    return
+                self._channel_id = channel_id
+                self._function_id = None
+                self._functions = {}
+                self._datapoints = []
+                self._parameters = []
+            return
+
+        if tag == 'dataPoint':
+            self._item = [attrs.get('i'), attrs.get('matchCode'), None]
+            self._datapoints.append(self._item)
+        elif tag == 'parameter':
+            self._item = [attrs.get('i'), None, None]
+            self._parameters.append(self._item)
+        elif tag == 'value':
+            if parent == 'dataPoint' or parent == 'parameter':
+                self._capture_text()
+        elif tag == 'attribute':
+            if parent == 'channel' and attrs.get('name') == 'functionId':
+                self._capture_text()
+        elif tag == 'function':
+            if parent == 'functions':
+                self._functions[attrs.get('functionId')] = (
+                        attrs.get('sensorMatchCode'),
+                        attrs.get('actuatorMatchCode'),
+                        )
+
+    def _skip(self):
+        """Skip the element that was just opened, including everything inside."""
+        self._skip_depth = 0
+        self._skip_start = self._parser.CurrentByteIndex
+        self.skipped_elements += 1
+        self._parser.StartElementHandler = self._start_skipped
+        self._parser.EndElementHandler = self._end_skipped
+
+    def _start_skipped(self, tag, attrs):
+        self._skip_depth += 1
+        self.skipped_elements += 1
+
+    def _end_skipped(self, tag):
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+
+        # Back at the end tag of the skipped element
+        self.skipped_bytes += self._parser.CurrentByteIndex - self._skip_start + len(tag) + 3
+        self._stack.pop()
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+
+    def _capture_text(self):
+        self._text = []
+        self._parser.CharacterDataHandler = self._text.append
+
+    def _end(self, tag):
+        stack = self._stack
+        stack.pop()
+
+        if self._text is not None:
+            self._parser.CharacterDataHandler = None
+            text = ''.join(self._text) if self._text else None
+            self._text = None
+            if tag == 'value':
+                # Mark the value as present, an empty value is reported as None
+                self._item[2] = (text,)
+            else:
+                self._function_id = text
+            return
+
+        if tag == 'channel' and self._channel_id is not None and stack[-1] == 'channels':
+            self._finish_channel()
+        elif tag == 'device' and stack and stack[-1] == 'devices':
+            self._serialnumber = None
+
+    def _finish_channel(self):
+        serialnumber = self._serialnumber
+        channel_id = self._channel_id
+        append = self._updates.append
+
+        # If the channel has a function ID, the sensorMatchCode and actuatorMatchCode of
+        # that function serve as a filter for relevant datapoints. This is mostly useful
+        # to correctly set the initial state for binary sensors.
+        filter_mask = 0xFFFFFFFF
+        if self._function_id is not None:
+            match_codes = self._functions.get('%04x' % int(self._function_id, 16))
+            if match_codes is not None:
+                filter_mask = int(match_codes[0], 16) | int(match_codes[1], 16)
+
+        for datapoint_id, match_code, value in self._datapoints:
+            if value is None:
+                continue
+            if match_code is not None and int(match_code, 16) & filter_mask == 0:
+                continue
+            append((serialnumber, channel_id, datapoint_id, value[0]))
+
+        for parameter_id, _, value in self._parameters:
+            if value is not None:
+                append((serialnumber, channel_id, parameter_id, value[0]))
+
+        self._channel_id = None
+        self._functions = None
+        self._datapoints = None
+        self._parameters = None
+        self._item = None
+
+
+def parse_update(xml, monitored=None):
+    """Return all (serialnumber, channel_id, datapoint_id, value) tuples of an update message."""
+    parser = UpdateParser(monitored)
+    updates = parser.feed(xml)
+    updates.extend(parser.close())
+    return updates
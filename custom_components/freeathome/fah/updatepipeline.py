@@ -0,0 +1,201 @@
+"""
+Decoding, decryption and decompression of encrypted updates in a worker
+"""
+import asyncio
+import base64
+import logging
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .messagereader import MessageReader
+
+LOG = logging.getLogger(__name__)
+
+# Stages of an update in the pipeline, see UpdatePipeline.stage_times
+STAGES = ('queue', 'decode', 'decrypt', 'inflate', 'order', 'apply')
+
+# Largest uncompressed update accepted, whatever length an update declares
+MAX_UPDATE_SIZE = 64 * 1024 * 1024
+# Bytes inflated at a time
+INFLATE_CHUNK = 64 * 1024
+
+
+def inflate_chunks(message, chunk_size=INFLATE_CHUNK):
+    """Yield the XML of a decrypted update as bytes, at most chunk_size at a time.
+
+    The message is the uncompressed length followed by zlib data. The length
+    is a hard cap: inflating stops with ValueError as soon as the data would
+    grow beyond it, or when the length itself is beyond MAX_UPDATE_SIZE. So a
+    corrupt or hostile update can not inflate to more than it declared.
+    """
+    update = MessageReader(message)
+    length = update.readUint32BE()
+    if length > MAX_UPDATE_SIZE:
+        raise ValueError("Declared update length %d exceeds %d" % (length, MAX_UPDATE_SIZE))
+
+    inflater = zlib.decompressobj()
+    data = update.getRemainingView()
+    remaining = length
+    for start in range(0, len(data), chunk_size):
+        pending = data[start:start + chunk_size]
+        while not inflater.eof:
+            # One byte more than allowed tells a too long update apart
+            chunk = inflater.decompress(pending, min(chunk_size, remaining + 1))
+            pending = inflater.unconsumed_tail
+            if len(chunk) > remaining:
+                raise ValueError("Update exceeds its declared length %d" % length)
+            if not chunk:
+                if not pending:
+                    # Needs more input
+                    break
+                continue
+            remaining -= len(chunk)
+            yield chunk
+        if inflater.eof:
+            break
+
+    if not inflater.eof:
+        raise zlib.error("Error -5 while decompressing data: incomplete or truncated stream")
+    if remaining:
+        LOG.info("Unexpected uncompressed data length, have=%d, expected=%d", length - remaining, length)
+
+
+def inflate_update(message):
+    """Return the XML of a decrypted update: its uncompressed length followed by zlib data."""
+    return b''.join(inflate_chunks(message)).decode('utf-8')
+
+
+def open_update(crypto, data, read=inflate_update):
+    """Return what read makes of an encrypted update, by default its XML, and the seconds of its stages. Runs in the worker."""
+    start = time.perf_counter()
+    data_bytes = base64.b64decode(data)
+    decoded = time.perf_counter()
+    message = crypto.openPubSub(data_bytes)
+    decrypted = time.perf_counter()
+    result = read(message)
+    inflated = time.perf_counter()
+    return result, {'decode': decoded - start, 'decrypt': decrypted - decoded, 'inflate': inflated - decrypted}
+
+
+class UpdatePipeline:
+    """Open encrypted updates in an executor, apply them in message order.
+
+    Decoding, decrypting and inflating an update is CPU work that grows with
+    its size, a burst after a SysAP reboot can be megabytes. Here it runs in
+    executor while the event loop goes on. Without an executor the pipeline
+    uses a worker thread of its own: more threads only compete with the event
+    loop for the GIL. The sequence number of an update must be checked
+    (Crypto.checkPubSubSequence) before it is handed to process, the pipeline
+    records it (Crypto.acceptPubSubSequence) once the update was decrypted,
+    in message order.
+
+    What the worker makes of a decrypted update is up to the read function
+    given to process: the whole XML by default, the parsed updates with a
+    read that parses while inflating (see inflate_chunks), so memory stays
+    bounded whatever the size of an update. The inflate stage includes
+    that parsing.
+
+    Updates are applied in the order process was called, whatever order they
+    finish in. At most max_pending updates are in the pipeline, further ones
+    wait (in order) until one is applied. depth is the number of updates in
+    the pipeline, waiting ones included, stage_times the seconds all updates
+    spent per stage.
+    """
+
+    def __init__(self, executor=None, max_pending=8):
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.executor = executor
+        self.max_pending = max_pending
+        self._own_executor = None
+        self._slots = asyncio.Semaphore(max_pending)
+        # Tickets in the order of process, the one whose turn it is to be applied
+        self._tickets = 0
+        self._turn = 0
+        self._finished = set()
+        self._turn_waiters = {}
+
+        self.depth = 0
+        self.max_depth = 0
+        self.processed = 0
+        self.failed = 0
+        self.stage_times = dict.fromkeys(STAGES, 0.0)
+
+    async def process(self, crypto, data, apply, read=inflate_update):
+        """Open the base64 encoded update data with crypto and read, then await apply(result) in message order."""
+        # Taken before the first await, so in the order of the calls
+        ticket = self._tickets
+        self._tickets += 1
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        if executor is None:
+            if self._own_executor is None:
+                self._own_executor = ThreadPoolExecutor(1, thread_name_prefix='fah-update')
+            executor = self._own_executor
+
+        try:
+            sequence = crypto.pubSubSequence(data)
+            start = time.perf_counter()
+            async with self._slots:
+                self.stage_times['queue'] += time.perf_counter() - start
+                try:
+                    result, timings = await loop.run_in_executor(executor, open_update, crypto, data, read)
+                except Exception as e:
+                    LOG.error("Failed to open update: %s", e)
+                    self.failed += 1
+                    result = None
+                else:
+                    for stage, seconds in timings.items():
+                        self.stage_times[stage] += seconds
+
+                start = time.perf_counter()
+                await self._wait_turn(ticket)
+                self.stage_times['order'] += time.perf_counter() - start
+
+                if result is not None:
+                    # Authenticated now, the sequence number may move the replay window, in message order
+                    try:
+                        crypto.acceptPubSubSequence(sequence)
+                    except Exception as e:
+                        LOG.error("Failed to open update: %s", e)
+                        self.failed += 1
+                        result = None
+
+                if result is not None:
+                    start = time.perf_counter()
+                    try:
+                        await apply(result)
+                    finally:
+                        self.stage_times['apply'] += time.perf_counter() - start
+                    self.processed += 1
+        finally:
+            self.depth -= 1
+            self._finish(ticket)
+
+    def close(self):
+        """Stop the worker thread of the pipeline, if it has one."""
+        if self._own_executor is not None:
+            self._own_executor.shutdown(wait=False)
+            self._own_executor = None
+
+    async def _wait_turn(self, ticket):
+        if self._turn == ticket:
+            return
+        waiter = self._turn_waiters[ticket] = asyncio.get_running_loop().create_future()
+        try:
+            await waiter
+        finally:
+            self._turn_waiters.pop(ticket, None)
+
+    def _finish(self, ticket):
+        """Pass the turn on, also when an update failed or was cancelled."""
+        self._finished.add(ticket)
+        while self._turn in self._finished:
+            self._finished.discard(self._turn)
+            self._turn += 1
+        waiter = self._turn_waiters.get(self._turn)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
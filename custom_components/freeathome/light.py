@@ -10,6 +10,7 @@ from homeassistant.components.light import (
 )
 
 from .const import DOMAIN
+from .coalescer import async_get_state_writer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -50,7 +51,7 @@ class FreeAtHomeLight(LightEntity):
         
         self._is_dimmer = self.light_device.is_dimmer()
         if self.light_device.brightness is not None:
-            self._brightness = int(float(self.light_device.brightness) * 2.55)
+            self._brightness = int(self.light_device.brightness * 2.55)
         else:
             self._brightness = None
 
@@ -143,7 +144,8 @@ class FreeAtHomeLight(LightEntity):
 
         async def after_update_callback(device):
             """Call after device was updated."""
-            await self.async_update_ha_state(True)
+            await self.async_update()
+            async_get_state_writer(self.hass).async_schedule(self)
 
         self.light_device.register_device_updated_cb(after_update_callback)
 
@@ -177,7 +179,7 @@ class FreeAtHomeLight(LightEntity):
         """
         self._state = self.light_device.is_on()
         if self.light_device.brightness is not None:
-            self._brightness = int(float(self.light_device.get_brightness()) * 2.55)
+            self._brightness = int(self.light_device.get_brightness() * 2.55)
 
         if self.light_device.color_temp is not None:
             self._color_temp_kelvin = self.light_device.get_color_temp()
@@ -3,6 +3,7 @@ import logging
 from homeassistant.components.lock import (LockEntity)
 
 from .const import DOMAIN
+from .coalescer import async_get_state_writer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,7 +28,7 @@ class FreeAtHomeLock(LockEntity):
     def __init__(self, device):
         self.lock_device = device
         self._name = self.lock_device.name
-        self._is_locked = (self.lock_device.state == '0')
+        self._is_locked = (self.lock_device.state is False)
 
     @property
     def name(self):
@@ -58,12 +59,13 @@ class FreeAtHomeLock(LockEntity):
         """Register callback to update hass after device was changed."""
         async def after_update_callback(device):
             """Call after device was updated."""
-            await self.async_update_ha_state(True)
+            await self.async_update()
+            async_get_state_writer(self.hass).async_schedule(self)
         self.lock_device.register_device_updated_cb(after_update_callback)
 
     async def async_update(self):
         """Retrieve latest state."""
-        self._is_locked = (self.lock_device.state == '0')
+        self._is_locked = (self.lock_device.state is False)
 
     async def async_lock(self, **kwargs):
         """Lock the device."""
@@ -2,6 +2,7 @@
 import logging
 from homeassistant.components.scene import Scene
 from .const import DOMAIN
+from .coalescer import async_get_state_writer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ class FreeAtHomeScene(Scene):
 
         async def after_update_callback(device):
             """Call after device was updated."""
-            await self.async_update_ha_state(True)
+            async_get_state_writer(self.hass).async_schedule(self)
 
         self.scene_device.register_device_updated_cb(after_update_callback)
 
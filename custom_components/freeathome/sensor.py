@@ -27,6 +27,7 @@ else:
 
 from .fah.devices.fah_device import FahDevice
 from .const import DOMAIN
+from .coalescer import async_get_state_writer
 
 SENSOR_TYPES = {
     "temperature": [
@@ -155,7 +156,8 @@ class FreeAtHomeSensor(SensorEntity):
         """Register callback to update hass after device was changed."""
         async def after_update_callback(device):
             """Call after device was updated."""
-            await self.async_update_ha_state(True)
+            await self.async_update()
+            async_get_state_writer(self.hass).async_schedule(self)
         self.sensor_device.register_device_updated_cb(after_update_callback)
 
     async def async_update(self):
@@ -235,7 +237,8 @@ class FreeAtHomeThermostatTemperatureSensor(SensorEntity):
 
     async def async_added_to_hass(self):
         async def after_update_callback(device):
-            await self.async_update_ha_state(True)
+            await self.async_update()
+            async_get_state_writer(self.hass).async_schedule(self)
         self.sensor_device.register_device_updated_cb(after_update_callback)
 
     async def async_update(self):
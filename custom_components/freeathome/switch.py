@@ -3,6 +3,7 @@ import logging
 from homeassistant.components.switch import SwitchEntity
 
 from .const import DOMAIN
+from .coalescer import async_get_state_writer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -62,7 +63,8 @@ class FreeAtHomeSwitch(SwitchEntity):
 
         async def after_update_callback(device):
             """Call after device was updated."""
-            await self.async_update_ha_state(True)
+            await self.async_update()
+            async_get_state_writer(self.hass).async_schedule(self)
 
         self.switch_device.register_device_updated_cb(after_update_callback)
 
@@ -0,0 +1,63 @@
+"""Measure the memory of the devices of a large installation.
+
+The device tables of all configuration fixtures are copied COPIES times, under
+other serial numbers, and the devices are created from them like discovery
+does. Reported are the bytes allocated per device, including its routes in the
+client, and the time to create all of them.
+
+Run with: python tests/benchmarks/bench_device_memory.py
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.pfreeathome import Client, describe_config
+from common import load_fixture
+
+COPIES = 200
+
+
+def device_table():
+    fixtures = sorted(f for f in os.listdir(os.path.join(TESTS_DIR, "fixtures"))
+                      if "_update_" not in f and f != "duplicate-attributes.xml")
+    component_path = os.path.dirname(os.path.dirname(TESTS_DIR))
+    table = []
+    for fixture in fixtures:
+        entries, _, _ = describe_config(load_fixture(fixture), "localhost", False, False, component_path)
+        table.extend(entries)
+
+    # Copies of every entry, as if there were COPIES times as many devices
+    return [dict(entry, serialnumber="%s%05d" % (entry["serialnumber"][:7], copy))
+            for copy in range(COPIES) for entry in table]
+
+
+def main():
+    with patch("fah.pfreeathome.Client.__init__", return_value=None), \
+            patch("fah.pfreeathome.get_room_names", return_value={}):
+        table = device_table()
+
+        client = Client()
+        client._host = "localhost"
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        client.create_devices(table)
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+    devices = len(client.devices)
+    print("%d devices, %d routes" % (devices, len(client.datapoint_routes)))
+    print("%-20s %12.0f" % ("bytes per device", size / devices))
+    print("%-20s %12.2f" % ("create (us/device)", elapsed / devices * 1e6))
+
+
+if __name__ == "__main__":
+    main()
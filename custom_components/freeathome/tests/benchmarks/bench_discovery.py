@@ -0,0 +1,77 @@
+"""Compare the per channel XML searches of device discovery with the channel index.
+
+For every channel, the datapoints the device classes ask for are looked up
+once by asking every class and searching the channel XML, and once like
+discover_devices does, through the device registry and a ChannelIndex. The last column times the whole
+discover_devices.
+
+Run with: python tests/benchmarks/bench_discovery.py
+"""
+import asyncio
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+from unittest.mock import patch
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.channelindex import ChannelIndex
+from fah.devices.fah_device import DEVICE_REGISTRY
+from fah.pfreeathome import Client, DEVICE_CLASSES, get_attribute, get_datapoints_by_pairing_ids
+from common import load_fixture
+
+NUMBER = 20
+
+
+def search(channels):
+    for channel in channels:
+        function_id = get_attribute(channel, 'functionId')
+        function_id = int(function_id, 16) if function_id else None
+        get_attribute(channel, 'displayName')
+        get_attribute(channel, 'floor')
+        get_attribute(channel, 'room')
+        for fah_class in DEVICE_CLASSES:
+            pairing_ids = fah_class.pairing_ids(function_id)
+            if pairing_ids is not None:
+                get_datapoints_by_pairing_ids(channel, pairing_ids)
+
+
+def lookup(channels):
+    for channel in channels:
+        index = ChannelIndex(channel)
+        function_id = index.attribute('functionId')
+        function_id = int(function_id, 16) if function_id else None
+        index.attribute('displayName')
+        index.attribute('floor')
+        index.attribute('room')
+        for fah_class, pairing_ids in DEVICE_REGISTRY.classify(function_id):
+            index.datapoints_by_pairing_ids(pairing_ids)
+
+
+def discover(config):
+    client = Client()
+    client._host = "localhost"
+    client.component_path = os.path.dirname(os.path.dirname(TESTS_DIR))
+    asyncio.run(client.discover_devices(config))
+
+
+def main():
+    fixtures = sorted(f for f in os.listdir(os.path.join(TESTS_DIR, "fixtures"))
+                      if "_update_" not in f and f != "duplicate-attributes.xml")
+
+    print("%-55s %9s %12s %12s %8s %15s" % ("fixture", "channels", "search (us)", "index (us)", "speedup", "discover (ms)"))
+    with patch("fah.pfreeathome.Client.__init__", return_value=None), \
+            patch("fah.pfreeathome.get_room_names", return_value={"00": {"00": "room1", "01": "room2"}}):
+        for fixture in fixtures:
+            config = load_fixture(fixture)
+            channels = ET.fromstring(config).findall("./devices/device/channels/channel")
+            searched = min(timeit.repeat(lambda: search(channels), number=NUMBER, repeat=5)) / NUMBER * 1e6
+            indexed = min(timeit.repeat(lambda: lookup(channels), number=NUMBER, repeat=5)) / NUMBER * 1e6
+            discovered = min(timeit.repeat(lambda: discover(config), number=1, repeat=5)) * 1e3
+            print("%-55s %9d %12.1f %12.1f %7.1fx %15.2f" % (fixture, len(channels), searched, indexed, searched / indexed, discovered))
+
+
+if __name__ == "__main__":
+    main()
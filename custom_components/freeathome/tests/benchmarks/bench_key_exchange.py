@@ -0,0 +1,55 @@
+"""Measure the CPU time of the poly1305 authenticators of the key exchange.
+
+The client computes one authenticator for its key exchange request
+(makeAuthenticator) and checks one in the response (validateAuthenticator).
+Both are timed with every available poly1305 backend, on their own and
+together with the PBKDF2 key derivation a key exchange does before them.
+
+Run with: python tests/benchmarks/bench_key_exchange.py
+"""
+import base64
+import os
+import sys
+import timeit
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.crypto import Crypto
+from fah.poly1305 import BACKENDS, load_backend
+
+NUMBER = 20
+# PBKDF2 iterations of the key derivation
+ITERATIONS = 10000
+# Length of the key exchange response the authenticator of the SysAP covers
+RESPONSE_BYTES = 100
+
+
+def main():
+    crypto = Crypto("jid", "password", ITERATIONS, base64.b64encode(os.urandom(16)))
+    crypto.generateKeypair()
+    shared_key = crypto.generateSharedKey()
+    buffer, fD, response = os.urandom(16), os.urandom(16), os.urandom(RESPONSE_BYTES)
+
+    def authenticators():
+        crypto.makeAuthenticator(shared_key, buffer)
+        crypto.validateAuthenticator(response, fD, bytes(16), shared_key)
+
+    def key_exchange():
+        crypto.generateLocalKey()
+        crypto.validateAuthenticator(response, fD, bytes(16), crypto.generateSharedKey())
+
+    print("%-10s %18s %18s" % ("backend", "authenticators ms", "key exchange ms"))
+    for name in BACKENDS:
+        try:
+            crypto.poly1305 = load_backend(name)
+        except ValueError:
+            print("%-10s %18s" % (name, "not available"))
+            continue
+        auth = min(timeit.repeat(authenticators, number=NUMBER, repeat=5)) / NUMBER
+        full = min(timeit.repeat(key_exchange, number=NUMBER // 4, repeat=3)) / (NUMBER // 4)
+        print("%-10s %18.3f %18.3f" % (name, auth * 1e3, full * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure the throughput of MessageWriter and MessageReader.
+
+The writer builds encrypted containers like Crypto.encryptPayload does, with
+payloads of different sizes. The reader reads the key data of a new session
+(names with their sequence counters) and the header of a pubsub update.
+
+Run with: python tests/benchmarks/bench_message.py
+"""
+import os
+import sys
+import timeit
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.messagereader import MessageReader
+from fah.messagewriter import MessageWriter
+
+PAYLOAD_SIZES = [64, 4096, 1024 * 1024]
+NAMES = 100
+
+
+def container(payload):
+    writer = MessageWriter()
+    writer.writeUint8(0x20)
+    writer.writeUint8(2)
+    writer.writeString("session-identifier")
+    writer.writeBlob(payload[:24])
+    writer.writeUint32(len(payload))
+    writer.writeBlob(payload)
+    return writer.toUint8Array()
+
+
+def key_data():
+    writer = MessageWriter()
+    writer.writeBlob(bytes(32))
+    writer.writeUint8(NAMES & 0xff)
+    writer.writeUint8(NAMES >> 8)
+    for i in range(NAMES):
+        writer.writeString("http://abb.com/protocol/update%d_encrypted" % i)
+        writer.writeUint32(i)
+        writer.writeUint32(0)
+    return bytes(writer.toUint8Array())
+
+
+def read_key_data(data):
+    reader = MessageReader(data)
+    reader.readBlob(32)
+    for _ in range(reader.readUint16()):
+        reader.readString()
+        reader.readUint64()
+
+
+def read_update(data):
+    reader = MessageReader(data)
+    reader.readUint32BE()
+    reader.getRemainingView()
+
+
+def measure(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main():
+    print("%-24s %12s %12s" % ("", "us/message", "MB/s"))
+    for size in PAYLOAD_SIZES:
+        payload = os.urandom(size)
+        number = max(10, 100000 // (size // 64))
+        elapsed = measure(lambda: container(payload), number)
+        print("%-24s %12.2f %12.1f" % ("write %d B" % size, elapsed * 1e6, size / elapsed / 1e6))
+
+    data = key_data()
+    elapsed = measure(lambda: read_key_data(data), 2000)
+    print("%-24s %12.2f %12.1f" % ("read %d names" % NAMES, elapsed * 1e6, len(data) / elapsed / 1e6))
+
+    update = os.urandom(1024 * 1024)
+    elapsed = measure(lambda: read_update(update), 200)
+    print("%-24s %12.2f %12.1f" % ("read 1 MiB update", elapsed * 1e6, len(update) / elapsed / 1e6))
+
+
+if __name__ == "__main__":
+    main()
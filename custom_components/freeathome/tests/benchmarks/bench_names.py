@@ -0,0 +1,76 @@
+"""Compare loading names.json with the names index, for the names a discovery asks for.
+
+The json column reads and decodes the whole names.json like get_json_names
+used to. The index columns open the index and look up the names of the
+devices and channels of a configuration: once for the first client of the
+process (the file is mapped and checked), once for every further client.
+
+Run with: python tests/benchmarks/bench_names.py
+"""
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah import namesindex
+from fah.namesindex import load_names_index
+from common import load_fixture
+
+NAMES_JSON = os.path.join(os.path.dirname(TESTS_DIR), "names.json")
+FIXTURE = "B008_sensor_actuator_8gang.xml"
+NUMBER = 200
+
+
+def json_names():
+    with open(NAMES_JSON, mode='r') as f:
+        data = json.loads(f.read())
+    return {item['nameId']: item['string'] for item in data['strings']}
+
+
+def lookup(names, name_ids):
+    for name_id in name_ids:
+        names.get(name_id)
+
+
+def with_json(name_ids):
+    lookup(json_names(), name_ids)
+
+
+def with_index(name_ids, first):
+    if first:
+        namesindex._INDEXES.clear()
+    lookup(load_names_index(NAMES_JSON), name_ids)
+
+
+def allocated(function):
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    root = ET.fromstring(load_fixture(FIXTURE))
+    name_ids = [element.get('nameId') for element in root.iter() if element.tag in ('device', 'channel')]
+
+    rows = [
+            ("json", lambda: with_json(name_ids)),
+            ("index, first", lambda: with_index(name_ids, True)),
+            ("index, shared", lambda: with_index(name_ids, False)),
+            ]
+
+    print("%d lookups, names of %s" % (len(name_ids), FIXTURE))
+    print("%-15s %12s %14s" % ("names", "time (us)", "peak (KiB)"))
+    for name, function in rows:
+        elapsed = min(timeit.repeat(function, number=NUMBER, repeat=5)) / NUMBER * 1e6
+        print("%-15s %12.1f %14.1f" % (name, elapsed, allocated(function) / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare the plain int fallback (fastnacl) with the bundled tweetnacl.
+
+Timed are poly1305 of the key exchange sized and a larger message, the
+xsalsa20 stream of a pubsub sized payload and a curve25519 scalar
+multiplication, the primitives the fallback provides.
+
+Run with: python tests/benchmarks/bench_pure_nacl.py
+"""
+import os
+import sys
+import timeit
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.pure_pynacl import (
+    IntArray,
+    crypto_onetimeauth_poly1305_tweet,
+    crypto_scalarmult_curve25519_tweet,
+    crypto_stream_xsalsa20_tweet_xor,
+)
+from fah.pure_pynacl import tweetnacl
+from fah.pure_pynacl.fastnacl import (
+    crypto_onetimeauth_poly1305,
+    crypto_scalarmult_curve25519,
+    crypto_stream_xsalsa20_xor,
+)
+
+
+def out(size):
+    return IntArray(tweetnacl.u8, size=size)
+
+
+def measure(function, number):
+    return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+
+def main():
+    key, nonce, point = os.urandom(32), os.urandom(24), os.urandom(32)
+    short, long = os.urandom(32), os.urandom(1024)
+
+    cases = [
+        ("poly1305 32 B",
+         lambda: crypto_onetimeauth_poly1305_tweet(out(16), short, len(short), key),
+         lambda: crypto_onetimeauth_poly1305(short, key), 20),
+        ("poly1305 1 KiB",
+         lambda: crypto_onetimeauth_poly1305_tweet(out(16), long, len(long), key),
+         lambda: crypto_onetimeauth_poly1305(long, key), 2),
+        ("xsalsa20 1 KiB",
+         lambda: crypto_stream_xsalsa20_tweet_xor(out(len(long)), long, len(long), nonce, key),
+         lambda: crypto_stream_xsalsa20_xor(long, nonce, key), 2),
+        ("curve25519",
+         lambda: crypto_scalarmult_curve25519_tweet(out(32), key, point),
+         lambda: crypto_scalarmult_curve25519(key, point), 1),
+    ]
+
+    print("%-16s %12s %12s %9s" % ("", "tweet ms", "fast ms", "speedup"))
+    for name, slow, fast, number in cases:
+        slow_time = measure(slow, number)
+        fast_time = measure(fast, number * 100)
+        print("%-16s %12.3f %12.3f %8.0fx" % (name, slow_time * 1e3, fast_time * 1e3, slow_time / fast_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Measure the CPU time of the handshake a reconnect repeats.
+
+A reconnect creates a new SaslHandler: a key exchange derives the shared key
+twice, SCRAM derives its client and server key. Timed is that handshake with
+an empty derived key cache, like every reconnect before the cache, and with
+the keys of the previous handshake in the cache.
+
+Run with: python tests/benchmarks/bench_reconnect.py
+"""
+import base64
+import os
+import sys
+import timeit
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.clientscramhandler import ClientScramHandler
+from fah.crypto import Crypto
+from fah.keycache import DERIVED_KEYS
+
+NUMBER = 5
+ITERATIONS = [4096, 100000, 600000]
+
+
+def handshake(salt, server_first, iterations):
+    crypto = Crypto("jid", "password", iterations, salt)
+    crypto.generateKeypair()
+    crypto.generateLocalKey()
+    crypto.generateSharedKey()
+
+    scram = ClientScramHandler()
+    scram.createClientFirst("jid")
+    scram.setServerFirst(server_first, "password")
+    scram.createClientFinal()
+
+
+def main():
+    salt = base64.b64encode(os.urandom(32)).decode()
+
+    print("%-12s %14s %14s" % ("iterations", "cold ms", "cached ms"))
+    for iterations in ITERATIONS:
+        server_first = "r=nonce,s=%s,i=%d" % (salt, iterations)
+
+        def cold():
+            DERIVED_KEYS.clear()
+            handshake(salt, server_first, iterations)
+
+        cold_time = min(timeit.repeat(cold, number=1, repeat=NUMBER))
+        handshake(salt, server_first, iterations)
+        cached_time = min(timeit.repeat(lambda: handshake(salt, server_first, iterations), number=1, repeat=NUMBER))
+        print("%-12d %14.2f %14.2f" % (iterations, cold_time * 1e3, cached_time * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Decrypt 100k synthetic pubsub updates through Crypto.decryptPubSub.
+
+The updates arrive mostly in order, with some reordered and some lost, as
+the replay window has to track them. Timed are the sequence check alone
+and the whole decryption.
+
+Run with: python tests/benchmarks/bench_replay_window.py
+"""
+import os
+import random
+import sys
+import time
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from common import encrypt_update, get_crypto
+
+COUNT = 100000
+
+
+def arrival_order(rng, count):
+    """Sequence numbers 0..count with every 50th lost and neighbours swapped now and then."""
+    order = [sequence for sequence in range(count) if sequence % 50 != 49]
+    for i in range(0, len(order) - 1, 7):
+        if rng.random() < 0.3:
+            order[i], order[i + 1] = order[i + 1], order[i]
+    return order
+
+
+def main():
+    rng = random.Random(1)
+    order = arrival_order(rng, COUNT)
+    updates = [encrypt_update(sequence, "<update/>") for sequence in order]
+
+    crypto = get_crypto()
+    start = time.perf_counter()
+    for sequence in order:
+        crypto.checkPubSubSequence(sequence)
+        crypto.acceptPubSubSequence(sequence)
+    checked = time.perf_counter() - start
+
+    crypto = get_crypto()
+    start = time.perf_counter()
+    for data in updates:
+        crypto.decryptPubSub(data)
+    decrypted = time.perf_counter() - start
+
+    print("%d updates" % len(order))
+    print("sequence check  %8.3f s  %6.2f us/update" % (checked, checked / len(order) * 1e6))
+    print("decryptPubSub   %8.3f s  %6.2f us/update" % (decrypted, decrypted / len(order) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare a cold start, reading the configuration from the SysAP, with a warm start from the config cache.
+
+The SysAP round trip of getAll is not part of the cold start timing, only the
+work on the configuration is. The background refresh of a warm start is not
+part of its timing either.
+
+Run with: python tests/benchmarks/bench_startup.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch, AsyncMock
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.pfreeathome import Client
+from fah.configcache import ConfigCache
+from common import load_fixture
+
+FIXTURE = "B008_sensor_actuator_8gang.xml"
+NUMBER = 50
+
+
+def get_client(config, cache_path):
+    client = Client()
+    client._host = "localhost"
+    client.component_path = os.path.dirname(os.path.dirname(TESTS_DIR))
+    client.get_config = AsyncMock(return_value=config)
+    client.config_cache = ConfigCache(cache_path)
+    return client
+
+
+async def start(config, cache_path, warm):
+    if not warm and os.path.exists(cache_path):
+        os.remove(cache_path)
+
+    client = get_client(config, cache_path)
+    begin = time.perf_counter()
+    await client.find_devices(True)
+    elapsed = time.perf_counter() - begin
+
+    if warm:
+        assert client._refresh_task is not None
+        client.cancel_refresh()
+    return elapsed, len(client.devices)
+
+
+async def run(config, cache_path, warm):
+    # Cold starts write the cache, so a warm start always finds one
+    await start(config, cache_path, False)
+    timings = [await start(config, cache_path, warm) for _ in range(NUMBER)]
+    return min(elapsed for elapsed, _ in timings), timings[0][1]
+
+
+def main():
+    config = load_fixture(FIXTURE)
+
+    with tempfile.TemporaryDirectory() as directory, \
+            patch("fah.pfreeathome.Client.__init__", return_value=None), \
+            patch("fah.pfreeathome.get_room_names", return_value={"00": {"00": "room1", "01": "room2"}}):
+        cache_path = os.path.join(directory, "config")
+        cold, devices = asyncio.run(run(config, cache_path, False))
+        warm, _ = asyncio.run(run(config, cache_path, True))
+        size = os.path.getsize(cache_path)
+
+    print("%s: %d devices, %d bytes config, %d bytes cache" % (FIXTURE, devices, len(config), size))
+    print("%-10s %12s" % ("start", "time (ms)"))
+    print("%-10s %12.2f" % ("cold", cold * 1e3))
+    print("%-10s %12.2f" % ("warm", warm * 1e3))
+    print("speedup %.1fx" % (cold / warm))
+
+
+if __name__ == "__main__":
+    main()
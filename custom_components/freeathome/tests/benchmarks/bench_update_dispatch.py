@@ -0,0 +1,64 @@
+"""Measure the cost of handing parsed update values to the devices.
+
+For every configuration fixture the devices are created, then the initial
+state of the configuration and the update fixtures of the same device type are
+parsed once. Timed is only apply_updates: routing every value to its device,
+decoding and storing it.
+
+Run with: python tests/benchmarks/bench_update_dispatch.py
+"""
+import asyncio
+import os
+import sys
+import timeit
+from unittest.mock import patch
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.pfreeathome import Client
+from common import load_fixture
+
+NUMBER = 200
+
+
+def workloads():
+    fixtures = sorted(os.listdir(os.path.join(TESTS_DIR, "fixtures")))
+    component_path = os.path.dirname(os.path.dirname(TESTS_DIR))
+    for fixture in fixtures:
+        if "_update_" in fixture or fixture == "duplicate-attributes.xml":
+            continue
+        client = Client()
+        client._host = "localhost"
+        client.component_path = component_path
+        updates = asyncio.run(client.discover_devices(load_fixture(fixture)))
+
+        prefix = fixture.split("_")[0] + "_update_"
+        for update in fixtures:
+            if update.startswith(prefix):
+                updates.extend(client.parse_update_xml(load_fixture(update)))
+        yield fixture, client, updates
+
+
+async def dispatch(loads):
+    for _ in range(NUMBER):
+        for client, updates in loads:
+            await client.apply_updates(updates, initializing=True)
+
+
+def main():
+    with patch("fah.pfreeathome.Client.__init__", return_value=None), \
+            patch("fah.pfreeathome.get_room_names", return_value={}):
+        loads = [(client, updates) for _, client, updates in workloads()]
+        values = sum(len(updates) for _, updates in loads)
+
+        loop = asyncio.new_event_loop()
+        elapsed = min(timeit.repeat(lambda: loop.run_until_complete(dispatch(loads)), number=1, repeat=5))
+        loop.close()
+
+    print("%d fixtures, %d values" % (len(loads), values))
+    print("%-20s %10.0f" % ("ns per value", elapsed / NUMBER / values * 1e9))
+
+
+if __name__ == "__main__":
+    main()
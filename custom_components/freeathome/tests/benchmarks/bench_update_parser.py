@@ -0,0 +1,30 @@
+"""Compare the streaming update parser with the element tree based parsing.
+
+Run with: python tests/benchmarks/bench_update_parser.py
+"""
+import os
+import sys
+import timeit
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from fah.updateparser import parse_update
+from common import load_fixture, tree_parse_update
+
+NUMBER = 2000
+
+
+def main():
+    fixtures = sorted(f for f in os.listdir(os.path.join(TESTS_DIR, "fixtures")) if "_update_" in f)
+
+    print("%-40s %12s %12s %8s" % ("fixture", "tree (us)", "stream (us)", "speedup"))
+    for fixture in fixtures:
+        xml = load_fixture(fixture)
+        tree = min(timeit.repeat(lambda: tree_parse_update(xml), number=NUMBER, repeat=5)) / NUMBER * 1e6
+        stream = min(timeit.repeat(lambda: parse_update(xml), number=NUMBER, repeat=5)) / NUMBER * 1e6
+        print("%-40s %12.1f %12.1f %7.1fx" % (fixture, tree, stream, tree / stream))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Benchmark suite of the hot paths of the fah library, compared with a stored baseline.
+
+Every case is timed on the fixtures and on synthetic installations of 10, 100
+and 1000 devices (see synthetic.py) with as many random updates. Reported is
+the best time per call of a few repeats. The results are compared with baseline.json next to this file, and
+the suite fails if a case got slower than the baseline by more than the
+tolerance. Baselines depend on the machine: save one (--save) before
+changing code, then compare after.
+
+Run with: python tests/benchmarks/suite.py [-k NAME] [--save] [--tolerance 0.25]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from unittest.mock import patch, AsyncMock
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from nacl.bindings import crypto_box_afternm, crypto_box_beforenm, crypto_box_keypair, crypto_box_NONCEBYTES
+from nacl.encoding import RawEncoder
+from nacl.hash import generichash
+
+from fah.crypto import Crypto
+from fah.messagewriter import MessageWriter
+from fah.pfreeathome import Client
+from fah.pure_pynacl import IntArray, crypto_onetimeauth_poly1305_tweet, tweetnacl
+from fah.pure_pynacl.fastnacl import crypto_onetimeauth_poly1305
+from common import encrypt_update, get_crypto, load_fixture
+from synthetic import CONFIG_FIXTURES, generate_config, generate_updates
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = (10, 100, 1000)
+# Seconds a repeat runs at least, and the number of repeats of a case
+MIN_TIME = 0.2
+REPEAT = 3
+
+FIXTURES = sorted(os.listdir(os.path.join(TESTS_DIR, "fixtures")))
+UPDATE_FIXTURES = [f for f in FIXTURES if "_update_" in f]
+
+# name -> function returning the function to time, registered with case
+CASES = {}
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+class Workload:
+    """The configurations, update messages and RPC payloads a case runs on."""
+
+    def __init__(self, name, configs, updates, payloads):
+        self.name = name
+        self.configs = configs
+        self.updates = updates
+        self.payloads = payloads
+
+
+def workloads():
+    """Yield the workload of the fixtures, then of the synthetic installations."""
+    yield Workload("fixtures",
+                   [load_fixture(fixture) for fixture in CONFIG_FIXTURES],
+                   [load_fixture(fixture) for fixture in UPDATE_FIXTURES],
+                   [load_fixture(fixture).encode("utf-8") for fixture in FIXTURES])
+    for size in SIZES:
+        installation = generate_config(size)
+        # A full state dump, then an update per device
+        updates = [installation.config] + list(generate_updates(installation, size))
+        yield Workload("%d devices" % size, [installation.config], updates,
+                       [update.encode("utf-8") for update in updates[1:]])
+
+
+def get_client(config):
+    client = Client()
+    client.devices = set()
+    client._host = "localhost"
+    client.component_path = os.path.dirname(os.path.dirname(TESTS_DIR))
+    client.get_config = AsyncMock(return_value=config)
+    return client
+
+
+def find_devices(config):
+    client = get_client(config)
+    asyncio.run(client.find_devices(False))
+    return client
+
+
+@case("find_devices")
+def bench_find_devices(workload):
+    return lambda: [find_devices(config) for config in workload.configs]
+
+
+@case("update_devices")
+def bench_update_devices(workload):
+    clients = [find_devices(config) for config in workload.configs]
+
+    async def update():
+        for client in clients:
+            for xml in workload.updates:
+                await client.update_devices(xml)
+
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(update())
+
+
+@case("clean_xml")
+def bench_clean_xml(workload):
+    client = Client()
+    return lambda: [client.clean_xml(config) for config in workload.configs + workload.updates]
+
+
+def session():
+    """Return a Crypto after a key exchange with a SysAP, and the key of the SysAP side."""
+    crypto = Crypto("jid", "password", 4096, base64.b64encode(bytes(32)))
+    crypto.generateKeypair()
+    public_key, secret_key = crypto_box_keypair()
+    crypto.cryptoIntermediateData = crypto_box_beforenm(public_key, crypto.secretKey)
+    crypto._Crypto__Ys = "session"
+    crypto._Crypto__Yt = bytes(8)
+    return crypto, crypto_box_beforenm(crypto.publicKey, secret_key)
+
+
+@case("Crypto.encryptPayload")
+def bench_encrypt_payload(workload):
+    crypto, _ = session()
+
+    def encrypt():
+        for data in workload.payloads:
+            crypto.encryptPayload(data)
+        crypto._Crypto__Yp.clear()
+    return encrypt
+
+
+@case("Crypto.decryptPayload")
+def bench_decrypt_payload(workload):
+    crypto, key = session()
+    containers = []
+    for data in workload.payloads:
+        nonce = os.urandom(crypto_box_NONCEBYTES)
+        box = crypto_box_afternm(data, nonce, key)
+        container = MessageWriter()
+        container.writeUint8(0)
+        container.writeUint8(0)
+        container.writeUint32(len(box))
+        container.writeBlob(box)
+        containers.append((nonce, bytes(container.toUint8Array())))
+    pending = crypto._Crypto__Yp
+
+    def decrypt():
+        for nonce, container in containers:
+            # The nonce of the request the container answers
+            pending.append(nonce)
+            crypto.decryptPayload(container)
+    return decrypt
+
+
+@case("Crypto.decryptPubSub")
+def bench_decrypt_pubsub(workload):
+    updates = [encrypt_update(sequence, xml) for sequence, xml in enumerate(workload.updates)]
+
+    def decrypt():
+        crypto = get_crypto()
+        for data in updates:
+            crypto.decryptPubSub(data)
+    return decrypt
+
+
+@case("MessageWriter.toUint8Array")
+def bench_to_uint8array(workload):
+    def write():
+        for blob in workload.payloads:
+            writer = MessageWriter()
+            writer.writeUint8(1)
+            writer.writeString("session")
+            writer.writeUint32(len(blob))
+            writer.writeBlob(blob)
+            writer.toUint8Array()
+    return write
+
+
+def authenticated(workload):
+    """Return what poly1305 authenticates per payload: its 32 byte generic hash, like makeAuthenticator."""
+    return [generichash(data, encoder=RawEncoder) for data in workload.payloads]
+
+
+@case("poly1305 tweetnacl")
+def bench_poly1305_tweet(workload):
+    key = bytes(range(32))
+    messages = authenticated(workload)
+    out = IntArray(tweetnacl.u8, size=16)
+    return lambda: [crypto_onetimeauth_poly1305_tweet(out, m, len(m), key) for m in messages]
+
+
+@case("poly1305 fastnacl")
+def bench_poly1305_fast(workload):
+    key = bytes(range(32))
+    messages = authenticated(workload)
+    return lambda: [crypto_onetimeauth_poly1305(m, key) for m in messages]
+
+
+def measure(function):
+    """Return the best seconds per call of function."""
+    function()
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= MIN_TIME or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(MIN_TIME / elapsed) + 1))
+    return min([elapsed] + timer.repeat(REPEAT - 1, number)) / number
+
+
+def run(names):
+    results = {}
+    with patch("fah.pfreeathome.Client.__init__", return_value=None), \
+            patch("fah.pfreeathome.get_room_names", return_value={"00": {"00": "room1", "01": "room2"}}):
+        for workload in workloads():
+            for name in names:
+                key = "%s[%s]" % (name, workload.name)
+                results[key] = measure(CASES[name](workload))
+                yield key, results[key]
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE):
+        return {}
+    with open(BASELINE, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="keyword", default="", help="only the cases whose name contains KEYWORD")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="fraction a case may be slower than the baseline (default 0.25)")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.keyword.lower() in name.lower()]
+    baseline = load_baseline()
+    results = {}
+    regressions = []
+
+    print("%-45s %14s %14s %8s" % ("case", "time (ms)", "baseline (ms)", "change"))
+    for key, seconds in run(names):
+        results[key] = seconds
+        before = baseline.get(key)
+        if before is None:
+            print("%-45s %14.4f %14s %8s" % (key, seconds * 1e3, "-", ""))
+            continue
+        change = seconds / before - 1
+        flag = ""
+        if change > args.tolerance:
+            regressions.append(key)
+            flag = "  SLOWER"
+        print("%-45s %14.4f %14.4f %+7.0f%%%s" % (key, seconds * 1e3, before * 1e3, change * 100, flag))
+
+    if args.save:
+        # Cases that were not run keep their baseline
+        baseline.update(results)
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "saved": time.strftime("%Y-%m-%d"), "results": dict(sorted(baseline.items()))},
+                      f, indent=1)
+            f.write("\n")
+        print("baseline saved to %s" % BASELINE)
+    elif regressions:
+        print("%d cases slower than the baseline by more than %d%%: %s"
+              % (len(regressions), args.tolerance * 100, ", ".join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,72 @@
+import base64
 import os
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from nacl.bindings import crypto_secretbox
+
+from fah.crypto import Crypto
+from fah.replaywindow import ReplayWindow
+
+# Key of the updates of encrypt_update
+KEY = bytes(range(32))
 
 def load_fixture(filename):
     """Load a fixture."""
     path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
     with open(path, encoding="utf-8") as fptr:
         return fptr.read()
+
+def tree_parse_update(xml):
+    """Reference parser: the element tree based parsing of update XML, as it used to be done in Client."""
+    for duplicate in ["name", "imaginary", "inputPairingId", "outputPairingId"]:
+        xml = re.sub(rf"{duplicate}=\"[^\"]*\" ([^>]*){duplicate}=\"[^\"]*\"", r'\1', xml)
+
+    root = ET.fromstring(xml)
+    updates = []
+
+    for device in root.find('devices').findall('device'):
+        serialnumber = device.get('serialNumber')
+        channels = device.find('channels')
+        if channels is None:
+            continue
+
+        for channel in channels.findall('channel'):
+            channel_id = channel.get('i')
+            datapoint_filter_mask = 0xFFFFFFFF
+
+            xml_function_id = channel.find("attribute[@name='functionId']")
+            if xml_function_id is not None:
+                function_id = int(xml_function_id.text, 16)
+                xml_function = channel.find("functions/function[@functionId='%04x']" % function_id)
+                if xml_function is not None:
+                    datapoint_filter_mask = int(xml_function.get("sensorMatchCode"), 16) | int(xml_function.get("actuatorMatchCode"), 16)
+
+            for datapoint in channel.findall('.//dataPoint'):
+                match_code_hex = datapoint.get("matchCode")
+                if match_code_hex is not None and int(match_code_hex, 16) & datapoint_filter_mask == 0:
+                    continue
+                value = datapoint.find('value')
+                if value is not None:
+                    updates.append((serialnumber, channel_id, datapoint.get('i'), value.text))
+
+            for parameter in channel.findall('.//parameter'):
+                value = parameter.find('value')
+                if value is not None:
+                    updates.append((serialnumber, channel_id, parameter.get('i'), value.text))
+
+    return updates
+
+def encrypt_update(sequence, xml, key=KEY, length=None):
+    """Return a base64 encoded update like the SysAP publishes it, declaring length if given."""
+    raw = xml.encode("utf-8")
+    message = (len(raw) if length is None else length).to_bytes(4, "big") + zlib.compress(raw)
+    nonce = os.urandom(16) + sequence.to_bytes(8, "little")
+    return base64.b64encode(nonce + crypto_secretbox(message, nonce, key))
+
+def get_crypto(sequence=0):
+    """Crypto of a finished key exchange, expecting the updates from sequence on."""
+    crypto = Crypto("jid", "password", 4096, base64.b64encode(bytes(32)))
+    crypto._Crypto__Key = KEY
+    crypto._Crypto__Yq["update"] = ReplayWindow(start=sequence)
+    return crypto
@@ -0,0 +1,200 @@
+"""Synthetic SysAP installations for scale testing.
+
+generate_config combines the devices of the configuration fixtures into a
+getAll configuration of any size: copies of them under other serial numbers,
+spread over the rooms of a generated floorplan. generate_updates makes a
+stream of update messages for it, each changing a few random datapoints of
+the installation, like the SysAP publishes them. Both are deterministic for
+a seed.
+
+Run with: python tests/synthetic.py DIRECTORY [--devices 2000] [--floors 4] [--rooms 8] [--updates 1000] [--seed 0]
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if __name__ == "__main__":
+    sys.path[:0] = [TESTS_DIR, os.path.dirname(TESTS_DIR)]
+
+from common import load_fixture
+
+FIXTURES = sorted(os.listdir(os.path.join(TESTS_DIR, "fixtures")))
+CONFIG_FIXTURES = [f for f in FIXTURES if "_update_" not in f and f != "duplicate-attributes.xml"]
+
+
+class Installation:
+    """A generated configuration and what the updates of it may change.
+
+    datapoints holds a (serialnumber, channel_id, datapoint_id, value) tuple for
+    every datapoint with a value, rooms maps floor uids to the room uids and names.
+    """
+
+    def __init__(self, config, serialnumbers, datapoints, rooms):
+        self.config = config
+        self.serialnumbers = serialnumbers
+        self.datapoints = datapoints
+        self.rooms = rooms
+
+
+def load_templates():
+    """Return the device elements and the strings of all configuration fixtures."""
+    templates = []
+    strings = {}
+    for fixture in CONFIG_FIXTURES:
+        root = ET.fromstring(load_fixture(fixture))
+        for string in root.find("strings"):
+            strings.setdefault(string.get("nameId"), string)
+        templates.extend(root.find("devices"))
+    return templates, list(strings.values())
+
+
+def template_datapoints(device):
+    """Return the (channel_id, datapoint_id, value) of the datapoints of a device that have a value."""
+    result = []
+    for channel in device.iterfind("channels/channel"):
+        for datapoint in channel.iterfind("*/dataPoint"):
+            value = datapoint.find("value")
+            if value is not None and value.text is not None:
+                result.append((channel.get("i"), datapoint.get("i"), value.text))
+    return result
+
+
+def locate(element, floor, room):
+    """Move a device or channel element to floor and room, if it has a location."""
+    for attribute in element.iterfind("attribute"):
+        name = attribute.get("name")
+        if name == "floor" and attribute.text:
+            attribute.text = floor
+        elif name == "room" and attribute.text:
+            attribute.text = room
+
+
+def generate_config(devices, floors=4, rooms=8, seed=0):
+    """Return an Installation of the number of devices, on floors with rooms each."""
+    rng = random.Random(seed)
+    templates, strings = load_templates()
+    datapoints_of = [template_datapoints(template) for template in templates]
+
+    floorplan = ET.Element("floorplan")
+    locations = []
+    room_names = {}
+    for floor_number in range(floors):
+        floor_uid = "%02X" % floor_number
+        floor = ET.SubElement(floorplan, "floor", uid=floor_uid, name="Floor %d" % (floor_number + 1))
+        room_names[floor_uid] = {}
+        for room_number in range(rooms):
+            room_uid = "%02X" % room_number
+            name = "Room %d.%d" % (floor_number + 1, room_number + 1)
+            ET.SubElement(floor, "room", uid=room_uid, name=name)
+            room_names[floor_uid][room_uid] = name
+            locations.append((floor_uid, room_uid))
+
+    serialnumbers = []
+    datapoints = []
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<project type="debug" mrhaVersion="2.6.0">',
+             "<strings>", "".join(ET.tostring(string, encoding="unicode") for string in strings), "</strings>",
+             ET.tostring(floorplan, encoding="unicode"), "<devices>"]
+
+    for number in range(devices):
+        index = rng.randrange(len(templates))
+        device = copy.deepcopy(templates[index])
+        serialnumber = "ABB%09d" % number
+        device.set("serialNumber", serialnumber)
+
+        floor, room = rng.choice(locations)
+        locate(device, floor, room)
+        for channel in device.iterfind("channels/channel"):
+            # Now and then a channel of a device is somewhere else
+            if rng.random() < 0.1:
+                locate(channel, *rng.choice(locations))
+            else:
+                locate(channel, floor, room)
+
+        serialnumbers.append(serialnumber)
+        datapoints.extend((serialnumber,) + datapoint for datapoint in datapoints_of[index])
+        parts.append(ET.tostring(device, encoding="unicode"))
+
+    parts.append("</devices></project>")
+    return Installation("".join(parts), serialnumbers, datapoints, room_names)
+
+
+def random_value(rng, value):
+    """Return a random value of the kind of value: a bit, a number or a decimal."""
+    if value in ("0", "1"):
+        return rng.choice(("0", "1"))
+    try:
+        int(value)
+        return str(rng.randint(0, 100))
+    except ValueError:
+        pass
+    try:
+        float(value)
+        return "%.2f" % rng.uniform(5, 35)
+    except ValueError:
+        return value
+
+
+def update_xml(values):
+    """Return the update message of (serialnumber, channel_id, datapoint_id, value) tuples."""
+    devices = {}
+    for serialnumber, channel_id, datapoint_id, value in values:
+        devices.setdefault(serialnumber, {}).setdefault(channel_id, []).append((datapoint_id, value))
+
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<project type="update"><privileges/><devices>']
+    for serialnumber, channels in devices.items():
+        parts.append('<device serialNumber="%s" state="modified"><channels>' % serialnumber)
+        for channel_id, datapoints in channels.items():
+            inputs = [d for d in datapoints if d[0].startswith("idp")]
+            outputs = [d for d in datapoints if not d[0].startswith("idp")]
+            parts.append('<channel state="modified" i="%s">' % channel_id)
+            for tag, section in (("inputs", inputs), ("outputs", outputs)):
+                parts.append("<%s>" % tag)
+                parts.extend('<dataPoint state="modified" i="%s"><value>%s</value></dataPoint>' % (datapoint_id, escape(value))
+                             for datapoint_id, value in section)
+                parts.append("</%s>" % tag)
+            parts.append("<parameters/><scenes/></channel>")
+        parts.append("</channels><parameters/></device>")
+    parts.append("</devices></project>")
+    return "".join(parts)
+
+
+def generate_updates(installation, count, max_values=8, seed=0):
+    """Yield count update messages, each setting 1 to max_values random datapoints of installation."""
+    rng = random.Random(seed)
+    datapoints = installation.datapoints
+    for _ in range(count):
+        values = [(serialnumber, channel_id, datapoint_id, random_value(rng, value))
+                  for serialnumber, channel_id, datapoint_id, value
+                  in rng.sample(datapoints, min(len(datapoints), rng.randint(1, max_values)))]
+        yield update_xml(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="where config.xml and the updates are written")
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--floors", type=int, default=4)
+    parser.add_argument("--rooms", type=int, default=8, help="rooms per floor")
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    installation = generate_config(args.devices, args.floors, args.rooms, args.seed)
+    os.makedirs(args.directory, exist_ok=True)
+    with open(os.path.join(args.directory, "config.xml"), "w", encoding="utf-8") as f:
+        f.write(installation.config)
+    for number, update in enumerate(generate_updates(installation, args.updates, seed=args.seed)):
+        with open(os.path.join(args.directory, "update_%06d.xml" % number), "w", encoding="utf-8") as f:
+            f.write(update)
+
+    print("%d devices, %d datapoints, %d bytes config, %d updates in %s"
+          % (args.devices, len(installation.datapoints), len(installation.config), args.updates, args.directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -368,5 +368,5 @@ class TestCyclicRepeatFilter:
         with patch("fah.devices.fah_binary_sensor.time.monotonic",
                    return_value=1000.0 + CYCLIC_PERIOD):
             sensor.update_datapoint("odp0001", "50")
-        assert sensor.window_position == "50"
+        assert sensor.window_position == 50
         assert sensor.state is None
@@ -0,0 +1,67 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from fah.channelindex import ChannelIndex
+from fah.devices.fah_light import FahLight
+from fah.devices.fah_switch import FahSwitch
+from fah.devices.fah_thermostat import FahThermostat
+from fah.pfreeathome import (
+        DEVICE_CLASSES,
+        get_attribute,
+        get_datapoints_by_pairing_ids,
+        get_parameters_by_parameter_ids,
+        )
+from common import load_fixture
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+CONFIG_FIXTURES = sorted(f for f in os.listdir(FIXTURES_DIR) if "_update_" not in f and f != "duplicate-attributes.xml")
+
+def channels(fixture):
+    root = ET.fromstring(load_fixture(fixture))
+    return root.findall("./devices/device/channels/channel")
+
+def class_queries(function_id):
+    """Yield the pairing and parameter IDs every device class asks for."""
+    for fah_class in DEVICE_CLASSES:
+        if fah_class in [FahLight, FahSwitch]:
+            for switch_as_x in [False, True]:
+                yield fah_class.pairing_ids(function_id, switch_as_x=switch_as_x), None
+        else:
+            parameter_ids = fah_class.parameter_ids(function_id) if fah_class is FahThermostat else None
+            yield fah_class.pairing_ids(function_id), parameter_ids
+
+@pytest.mark.parametrize("fixture", CONFIG_FIXTURES)
+def test_same_result_as_xml_search(fixture):
+    for channel in channels(fixture):
+        index = ChannelIndex(channel)
+
+        for name in ["functionId", "displayName", "floor", "room", "notThere"]:
+            assert index.attribute(name) == get_attribute(channel, name)
+
+        function_id = index.attribute("functionId")
+        function_id = int(function_id, 16) if function_id else None
+
+        for pairing_ids, parameter_ids in class_queries(function_id):
+            if pairing_ids is not None:
+                assert index.datapoints_by_pairing_ids(pairing_ids) == get_datapoints_by_pairing_ids(channel, pairing_ids)
+            if parameter_ids is not None:
+                assert index.parameters_by_parameter_ids(parameter_ids) == get_parameters_by_parameter_ids(channel, parameter_ids)
+
+def test_first_datapoint_wins():
+    channel = ET.fromstring(
+            '<channel i="ch0000">'
+            '<attribute name="displayName">first</attribute>'
+            '<attribute name="displayName">second</attribute>'
+            '<outputs>'
+            '<dataPoint i="odp0000" pairingId="0100"/>'
+            '<dataPoint i="odp0001" pairingId="0100"/>'
+            '</outputs>'
+            '<parameters><parameter i="pm0000"/><parameter i="pm0001" parameterId="001b"/></parameters>'
+            '</channel>')
+    index = ChannelIndex(channel)
+
+    assert index.attribute("displayName") == "first"
+    assert index.datapoints_by_pairing_ids({"outputs": [0x100], "inputs": [0x1]}) == {0x100: "odp0000"}
+    assert index.parameters_by_parameter_ids({"parameters": [0x1b, 0x1c]}) == {0x1b: "pm0001"}
@@ -50,10 +50,10 @@ class TestClimate:
 
         # TODO: Convert to decimal
         # TODO: This should be its own sensor
-        assert climate.current_temperature == '21.56'
-        assert climate.target_temperature == '20'
+        assert climate.current_temperature == 21.56
+        assert climate.target_temperature == 20
         # TODO: This should be its own sensor
-        assert climate.current_actuator == '16'
+        assert climate.current_actuator == 16
         assert climate.state == True
         assert climate.ecomode == False
 
@@ -78,11 +78,11 @@ class TestClimate:
 
         # Test changing target temperature
         await client.update_devices(load_fixture("1004_update_target_temperature.xml"))
-        assert climate.target_temperature == '20.5'
+        assert climate.target_temperature == 20.5
 
         # Test updating current temperature
         await client.update_devices(load_fixture("1004_update_current_temperature.xml"))
-        assert climate.current_temperature == '20.9'
+        assert climate.current_temperature == 20.9
 
         # Test eco mode turned on
         await client.update_devices(load_fixture("1004_update_eco_mode.xml"))
@@ -95,13 +95,13 @@ class TestClimate:
         # Test device turned back on, target temperature, and actuator value up
         await client.update_devices(load_fixture("1004_update_turn_on.xml"))
         assert climate.state == True
-        assert climate.target_temperature == '18'
-        assert climate.current_actuator == '27'
+        assert climate.target_temperature == 18
+        assert climate.current_actuator == 27
 
         # Test eco mode turned off, and target temperature up
         await client.update_devices(load_fixture("1004_update_eco_mode_off.xml"))
         assert climate.ecomode == False
-        assert climate.target_temperature == '21'
+        assert climate.target_temperature == 21
 
         # Test alternative ecomode turn on
         climate.update_datapoint('odp0009', '36')
@@ -139,10 +139,10 @@ class TestWirelessClimate:
         assert climate.device_info["model"] == "Heizkörperthermostat Comfort"
         assert climate.device_info["sw_version"] == "2.95"
 
-        assert climate.current_temperature == '19.71'
-        assert climate.target_temperature == '19.5'
-        assert climate.current_actuator == '0'
-        assert climate.temperature_correction == '0'
+        assert climate.current_temperature == 19.71
+        assert climate.target_temperature == 19.5
+        assert climate.current_actuator == 0
+        assert climate.temperature_correction == 0
         assert climate.state == True
         assert climate.ecomode == False
 
@@ -166,9 +166,9 @@ class TestWirelessClimateWithoutCorrection:
         assert climate.device_info["model"] == "Heizkörperthermostat Comfort"
         assert climate.device_info["sw_version"] == "2.95"
 
-        assert climate.current_temperature == '16.89'
-        assert climate.target_temperature == '16'
-        assert climate.current_actuator == '0'
+        assert climate.current_temperature == 16.89
+        assert climate.target_temperature == 16
+        assert climate.current_actuator == 0
         assert climate.temperature_correction == None
         assert climate.state == True
         assert climate.ecomode == False
@@ -0,0 +1,103 @@
+import pytest
+
+import logging
+from async_mock import patch
+
+from fah.codec import CodecRegistry, DATAPOINT_CODECS, decode_int, decode_on_off, decode_rgb
+from fah.const import PID_INFO_ON_OFF, PID_INFO_ACTUAL_DIMMING_VALUE, PID_INFO_RGB, PID_RAIN_ALARM, PID_WINDOW_DOOR_POSITION
+from fah.devices.fah_binary_sensor import FahBinarySensor
+from fah.devices.fah_light import FahLight
+from fah.pfreeathome import Client
+
+class DummyClient:
+    pass
+
+
+def make_light():
+    datapoints = {
+            PID_INFO_ON_OFF: 'odp0000',
+            PID_INFO_ACTUAL_DIMMING_VALUE: 'odp0001',
+            PID_INFO_RGB: 'odp0002',
+            }
+    return FahLight(DummyClient(), None, 'SN', 'ch0000', 0x002F, 'test', datapoints)
+
+
+def test_decoded_values_are_cached():
+    assert decode_int("36") == 36
+    assert decode_int("36.0") == 36
+    # Repeated strings are decoded once
+    assert decode_rgb("255,0,0") is decode_rgb("255,0,0")
+    assert decode_on_off("1") is True
+    assert decode_on_off("0") is False
+
+
+def test_decode_rgb():
+    assert decode_rgb("16711680") == 0xFF0000
+    assert decode_rgb("#00FF00") == 0x00FF00
+    assert decode_rgb("0;0;255") == 0x0000FF
+    with pytest.raises(ValueError):
+        decode_rgb("not a color")
+
+
+def test_registry():
+    registry = CodecRegistry()
+    registry.register(1, decode_int)
+
+    assert registry.decode(1, "42") == 42
+    # Values without a codec are passed on as they are
+    assert registry.decode(2, "42") == "42"
+    assert registry.get(2) is None
+    assert DATAPOINT_CODECS.get(PID_INFO_RGB) is decode_rgb
+
+
+def test_device_receives_decoded_values():
+    light = make_light()
+    light.update_datapoint('odp0000', '1')
+    light.update_datapoint('odp0001', '36')
+    light.update_datapoint('odp0002', '0,255,0')
+
+    assert light.state is True
+    assert light.brightness == 36
+    assert light.rgb_color == 0x00FF00
+
+
+def test_invalid_value_is_skipped(caplog):
+    light = make_light()
+    light.update_datapoint('odp0001', '36')
+
+    with caplog.at_level(logging.WARNING):
+        light.update_datapoint('odp0001', 'invalid')
+        light.update_datapoint('odp0002', 'not a color')
+
+    assert light.brightness == 36
+    assert light.rgb_color is None
+    assert "invalid value 'invalid'" in caplog.text
+
+
+def test_raw_pairing_ids_are_not_decoded():
+    sensor = FahBinarySensor(DummyClient(), None, 'SN', 'ch0000', 0x0000, 'test',
+                             {PID_WINDOW_DOOR_POSITION: 'odp0000'})
+    _, _, codec = sensor.datapoint_routes['odp0000']
+    assert codec is decode_int
+
+    # The rain alarm of a binary sensor is an on/off state, kept as sent
+    sensor = FahBinarySensor(DummyClient(), None, 'SN', 'ch0001', 0x0000, 'test', {PID_RAIN_ALARM: 'odp0000'})
+    _, _, codec = sensor.datapoint_routes['odp0000']
+    assert codec is None
+    assert DATAPOINT_CODECS.get(PID_RAIN_ALARM) is decode_int
+
+
+@pytest.mark.asyncio
+async def test_client_skips_invalid_values(caplog):
+    with patch("fah.pfreeathome.Client.__init__", return_value=None):
+        client = Client()
+    client.reset_devices()
+    light = make_light()
+    client.monitor_device(light)
+
+    with caplog.at_level(logging.WARNING):
+        await client.apply_updates([('SN', 'ch0000', 'odp0001', 'invalid'), ('SN', 'ch0000', 'odp0000', '1')])
+
+    assert light.brightness is None
+    assert light.state is True
+    assert "invalid value 'invalid' for datapoint SN/ch0000/odp0001" in caplog.text
@@ -0,0 +1,145 @@
+import pytest
+pytestmark = pytest.mark.asyncio
+
+import os
+import threading
+from async_mock import patch, AsyncMock, MagicMock
+
+from fah.pfreeathome import Client, parse_config_xml
+from fah.configcache import ConfigCache, read_cache
+from fah.updateparser import UpdateParser
+from common import load_fixture
+
+CONFIG = load_fixture("B008_sensor_actuator_8gang.xml")
+
+def get_client(cache_path, config=CONFIG):
+    client = Client()
+    client.devices = set()
+    client.set_datapoint = AsyncMock()
+    client.get_config = AsyncMock(return_value=config)
+    client._host = "localhost"
+    client.component_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    client.config_cache = ConfigCache(cache_path)
+
+    return client
+
+@pytest.fixture(autouse=True)
+def mock_init():
+    with patch("fah.pfreeathome.Client.__init__", return_value=None):
+        yield
+
+@pytest.fixture(autouse=True)
+def mock_roomnames():
+    with patch("fah.pfreeathome.get_room_names", return_value={"00":{"00":"room1", "01":"room2"}}):
+        yield
+
+def summary(client):
+    return sorted((type(device).__name__, device.lookup_key, device.name) for device in client.devices)
+
+async def test_cold_start_writes_cache(tmp_path):
+    path = str(tmp_path / "config")
+    client = get_client(path)
+    await client.find_devices(True)
+
+    assert os.path.exists(path)
+    assert client._refresh_task is None
+    client.get_config.assert_called_once()
+
+async def test_warm_start_from_cache(tmp_path):
+    path = str(tmp_path / "config")
+    cold = get_client(path)
+    await cold.find_devices(True)
+
+    warm = get_client(path)
+    warm.devices_changed_callback = MagicMock()
+    await warm.find_devices(True)
+
+    # Devices and their state are there before the SysAP was asked
+    warm.get_config.assert_not_called()
+    assert summary(warm) == summary(cold)
+    light = next(el for el in warm.get_devices("light") if el.lookup_key == "ABB2E0612345/ch000C")
+    assert light.name == "Hinten rechts (room1)"
+    assert light.is_on() == False
+    assert light.device_info["identifiers"] == {("freeathome", "ABB2E0612345")}
+
+    await warm._refresh_task
+    warm.get_config.assert_called_once()
+    warm.devices_changed_callback.assert_not_called()
+
+    # Routes are in place
+    await warm.update_devices(load_fixture("B008_update_light.xml"))
+    assert light.is_on() == True
+
+async def test_warm_start_does_not_parse_on_the_loop(tmp_path):
+    path = str(tmp_path / "config")
+    await get_client(path).find_devices(True)
+
+    calls = []
+    def recorded(function):
+        def record(*args, **kwargs):
+            calls.append((function.__name__, threading.get_ident()))
+            return function(*args, **kwargs)
+        return record
+
+    warm = get_client(path)
+    with patch("fah.configcache.read_cache", recorded(read_cache)), \
+            patch("fah.pfreeathome.parse_config_xml", recorded(parse_config_xml)), \
+            patch.object(UpdateParser, "feed", recorded(UpdateParser.feed)):
+        await warm.find_devices(True)
+
+    # The cache was decoded in the executor, no XML was parsed at all
+    assert [name for name, _ in calls] == ["read_cache"]
+    assert calls[0][1] != threading.get_ident()
+    light = next(el for el in warm.get_devices("light") if el.lookup_key == "ABB2E0612345/ch000C")
+    assert light.is_on() == False
+    await warm._refresh_task
+
+async def test_cache_ignored_for_other_settings(tmp_path):
+    path = str(tmp_path / "config")
+    await get_client(path).find_devices(True)
+
+    client = get_client(path)
+    await client.find_devices(False)
+
+    client.get_config.assert_called_once()
+    assert client._refresh_task is None
+
+async def test_unreadable_cache(tmp_path):
+    path = tmp_path / "config"
+    path.write_bytes(b"garbage")
+
+    client = get_client(str(path))
+    await client.find_devices(True)
+
+    client.get_config.assert_called_once()
+    assert len(client.get_devices("light")) == 6
+
+async def test_refresh_reconciles_changes(tmp_path):
+    path = str(tmp_path / "config")
+    await get_client(path).find_devices(True)
+
+    renamed = CONFIG.replace(">Hinten rechts<", ">Vorne rechts<")
+    client = get_client(path, config=renamed)
+    client.devices_changed_callback = MagicMock()
+    await client.find_devices(True)
+
+    before = {device.lookup_key: device for device in client.devices}
+    await client._refresh_task
+
+    after = {device.lookup_key: device for device in client.devices}
+    assert before.keys() == after.keys()
+
+    # Only the renamed device was replaced, the others are the same objects
+    changed = [key for key in after if after[key] is not before[key]]
+    assert changed == ["ABB2E0612345/ch000C"]
+    assert after["ABB2E0612345/ch000C"].name == "Vorne rechts (room1)"
+
+    added, removed = client.devices_changed_callback.call_args[0]
+    assert added == [after["ABB2E0612345/ch000C"]]
+    assert removed == [before["ABB2E0612345/ch000C"]]
+
+    # The cache holds the new configuration
+    restarted = get_client(path, config=renamed)
+    await restarted.find_devices(True)
+    await restarted._refresh_task
+    assert summary(restarted) == summary(client)
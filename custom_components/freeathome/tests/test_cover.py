@@ -48,9 +48,9 @@ class TestCover:
         assert cover.device_info["model"] == "Sensor/ Jalousieaktor 1/1-fach"
         assert cover.device_info["sw_version"] == "2.1366"
 
-        # TODO: Convert to int, make this a getter
+        # TODO: Make this a getter
         # TODO: This should return 73, reverse values in component
-        assert cover.position == "27"
+        assert cover.position == 27
         assert cover.tilt_position == None
         assert cover.get_forced_cover_position() == "none"
         assert cover.state == "1"
@@ -95,7 +95,13 @@ class TestCover:
         assert cover.is_cover_closing() == False
         assert cover.is_cover_closed() == True
         # TODO: This should return 100, reverse values in component
-        assert cover.position == "0"
+        assert cover.position == 0
+
+        # An empty value is stored as None, the rest of the update still applies
+        cover.state = '2'
+        await client.update_devices(load_fixture("1013_update_closed.xml").replace("<value>100</value>", "<value/>"))
+        assert cover.position is None
+        assert cover.is_cover_closing() == False
 
         await client.update_devices(load_fixture("1013_update_opening.xml"))
         assert cover.is_cover_opening() == True
@@ -106,7 +112,7 @@ class TestCover:
         assert cover.is_cover_closing() == False
         assert cover.is_cover_closed() == False
         # TODO: This should return 64, reverse values in component
-        assert cover.position == "36"
+        assert cover.position == 36
 
         await client.update_devices(load_fixture("1013_update_force_opening.xml"))
         assert cover.is_cover_opening() == True
@@ -214,10 +220,10 @@ class TestShutter:
         assert cover.device_info["model"] == "Sensor/ Jalousieaktor 1/1-fach"
         assert cover.device_info["sw_version"] == "2.1366"
 
-        # TODO: Convert to int, make this a getter
+        # TODO: Make this a getter
         # TODO: This should return 73, reverse values in component
-        assert cover.position == "27"
-        assert cover.tilt_position == "28"
+        assert cover.position == 27
+        assert cover.tilt_position == 28
         assert cover.get_forced_cover_position() == "none"
         assert cover.state == "1"
         assert cover.is_cover_closed() == False
@@ -252,6 +258,14 @@ class TestShutter:
         # TODO: This should set 41, reverse in component
         client.set_datapoint.assert_called_once_with("ABB700D12345", "ch0003", "idp0003", "66")
 
+        client.set_datapoint.reset_mock()
+        await cover.set_cover_position(41, 34)
+        client.set_datapoint.assert_has_calls([
+            call("ABB700D12345", "ch0003", "idp0002", "59"),
+            call("ABB700D12345", "ch0003", "idp0003", "66"),
+            ])
+        assert client.set_datapoint.call_count == 2
+
         client.set_datapoint.reset_mock()
         await cover.set_forced_cover_position("none")
         client.set_datapoint.assert_called_once_with("ABB700D12345", "ch0003", "idp0004", "1")
@@ -266,7 +280,7 @@ class TestShutter:
         assert cover.is_cover_closing() == False
         assert cover.is_cover_closed() == True
         # TODO: This should return 100, reverse values in component
-        assert cover.position == "0"
+        assert cover.position == 0
 
         await client.update_devices(load_fixture("1013_update_opening.xml"))
         assert cover.is_cover_opening() == True
@@ -277,17 +291,17 @@ class TestShutter:
         assert cover.is_cover_closing() == False
         assert cover.is_cover_closed() == False
         # TODO: This should return 64, reverse values in component
-        assert cover.position == "36"
+        assert cover.position == 36
 
         await client.update_devices(load_fixture("1013_update_tilt_open.xml"))
-        assert cover.position == "36"
+        assert cover.position == 36
         # TODO: This should return 0, reverse values in component
-        assert cover.tilt_position == "100"
+        assert cover.tilt_position == 100
 
         await client.update_devices(load_fixture("1013_update_tilt_closed.xml"))
-        assert cover.position == "36"
+        assert cover.position == 36
         # TODO: This should return 100, reverse values in component
-        assert cover.tilt_position == "0"
+        assert cover.tilt_position == 0
 
         await client.update_devices(load_fixture("1013_update_force_opening.xml"))
         assert cover.is_cover_opening() == True
@@ -0,0 +1,71 @@
+import pytest
+
+import base64
+import os
+from nacl.encoding import RawEncoder
+from nacl.hash import generichash
+
+from fah.crypto import Crypto
+from fah.poly1305 import PurePoly1305, SodiumPoly1305, load_backend
+
+# RFC 8439, 2.5.2
+KEY = bytes.fromhex("85d6be7857556d337f4452fe42d506a80103808afb0db2fd4abff6af4149f51b")
+MESSAGE = b"Cryptographic Forum Research Group"
+TAG = bytes.fromhex("a8061dc1305136c6c22b8baf0c0127a9")
+
+SODIUM = SodiumPoly1305.load()
+requires_sodium = pytest.mark.skipif(SODIUM is None, reason="libsodium not available")
+
+
+def backends():
+    return [PurePoly1305()] + ([SODIUM] if SODIUM is not None else [])
+
+
+@pytest.mark.parametrize("backend", backends(), ids=lambda backend: backend.name)
+def test_known_answer(backend):
+    assert backend.auth(MESSAGE, KEY) == TAG
+    assert backend.verify(TAG, MESSAGE, KEY) == 0
+    assert backend.verify(bytes(16), MESSAGE, KEY) == -1
+
+
+@requires_sodium
+@pytest.mark.parametrize("length", [0, 1, 15, 16, 17, 32, 63, 64, 65, 1000])
+def test_sodium_equals_pure(length):
+    pure = PurePoly1305()
+    for _ in range(5):
+        key = os.urandom(32)
+        message = os.urandom(length)
+        token = pure.auth(message, key)
+
+        assert SODIUM.auth(message, key) == token
+        assert SODIUM.verify(token, bytearray(message), key) == pure.verify(token, message, key) == 0
+        forged = bytes([token[0] ^ 1]) + token[1:]
+        assert SODIUM.verify(forged, message, key) == pure.verify(forged, message, key) == -1
+
+
+def test_load_backend():
+    assert load_backend("pure").name == "pure"
+    assert load_backend().name == ("pure" if SODIUM is None else "sodium")
+    with pytest.raises(KeyError):
+        load_backend("other")
+
+
+@requires_sodium
+def test_crypto_authenticators_equal_for_both_backends():
+    crypto = Crypto("jid", "password", 10, base64.b64encode(b"salt"))
+    crypto.generateKeypair()
+    shared_key = crypto.generateSharedKey()
+    buffer = os.urandom(16)
+
+    crypto.poly1305 = PurePoly1305()
+    pure = crypto.makeAuthenticator(shared_key, buffer)
+    crypto.poly1305 = SODIUM
+    assert crypto.makeAuthenticator(shared_key, buffer) == pure
+
+    # The SysAP answers with two 16 byte values and a token over the rest of the response
+    fD, fS, rest = os.urandom(16), os.urandom(16), os.urandom(48)
+    token = PurePoly1305().auth(rest, generichash(data=shared_key, key=fD, encoder=RawEncoder))
+    for backend in backends():
+        crypto.poly1305 = backend
+        assert crypto.validateAuthenticator(rest, fD, token, shared_key) == 0
+        assert crypto.validateAuthenticator(rest, fD, bytes(16), shared_key) == -1
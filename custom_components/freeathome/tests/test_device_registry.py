@@ -0,0 +1,59 @@
+import pytest
+
+from fah import const
+from fah.devices.fah_device import DEVICE_REGISTRY, FahDevice
+from fah.pfreeathome import DEVICE_CLASSES
+from fah.devices.fah_light import FahLight
+from fah.devices.fah_switch import FahSwitch
+
+def all_function_ids():
+    function_ids = set()
+    for name in dir(const):
+        if name.startswith("FUNCTION_IDS_"):
+            function_ids.update(getattr(const, name))
+    # Function IDs nobody handles, and channels without one
+    return sorted(function_ids | {0xfffe}, key=str) + [None]
+
+def ask_every_class(function_id, switch_as_x):
+    specs = []
+    for fah_class in DEVICE_CLASSES:
+        if fah_class in [FahLight, FahSwitch]:
+            pairing_ids = fah_class.pairing_ids(function_id, switch_as_x=switch_as_x)
+        else:
+            pairing_ids = fah_class.pairing_ids(function_id)
+        if pairing_ids is not None:
+            specs.append((fah_class, pairing_ids))
+    return specs
+
+def test_all_device_classes_registered():
+    assert {cls.__name__ for cls in DEVICE_CLASSES} == {
+            "FahLight", "FahSwitch", "FahCover", "FahBinarySensor", "FahThermostat",
+            "FahLightScene", "FahLightGroup", "FahSensor", "FahLock",
+            }
+
+@pytest.mark.parametrize("switch_as_x", [False, True])
+def test_same_result_as_asking_every_class(switch_as_x):
+    for function_id in all_function_ids():
+        assert list(DEVICE_REGISTRY.classify(function_id, switch_as_x)) == ask_every_class(function_id, switch_as_x)
+
+def test_switching_actuator():
+    function_id = const.FUNCTION_IDS_SWITCHING_ACTUATOR[0]
+
+    assert [cls for cls, _ in DEVICE_REGISTRY.classify(function_id, switch_as_x=False)] == [FahLight]
+    assert [cls for cls, _ in DEVICE_REGISTRY.classify(function_id, switch_as_x=True)] == [FahSwitch]
+
+def test_subclass_registers_itself():
+    class FahTestDevice(FahDevice):
+        function_ids = frozenset([0xfffd])
+
+        def pairing_ids(function_id=None):
+            if function_id == 0xfffd:
+                return {"inputs": [], "outputs": [0x0001]}
+
+    try:
+        assert DEVICE_REGISTRY.classify(0xfffd) == ((FahTestDevice, {"inputs": [], "outputs": [0x0001]}),)
+        assert DEVICE_REGISTRY.classify(0xfffe) == ()
+    finally:
+        DEVICE_REGISTRY.unregister(FahTestDevice)
+
+    assert DEVICE_REGISTRY.classify(0xfffd) == ()
@@ -0,0 +1,115 @@
+import pytest
+pytestmark = pytest.mark.asyncio
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from async_mock import patch, AsyncMock
+
+from fah.pfreeathome import Client, describe_config, parse_config_xml, parse_update_xml, strip_duplicate_attributes
+from fah.sharedtables import SHARED_TABLES, section_digest
+from common import load_fixture
+
+CONFIG = load_fixture("B008_sensor_actuator_8gang.xml")
+COMPONENT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+def large_config(copies):
+    """The configuration with the device of CONFIG copied under other serial numbers."""
+    device = re.search(r"<device .*?</device>", CONFIG, re.DOTALL).group(0)
+    devices = [device.replace("ABB2E0612345", "ABB2E%07d" % i) for i in range(copies)]
+    return CONFIG.replace(device, "\n".join(devices))
+
+def get_client():
+    client = Client()
+    client.devices = set()
+    client._host = "localhost"
+    client.component_path = COMPONENT_PATH
+    client.get_config = AsyncMock(return_value=CONFIG)
+    return client
+
+@pytest.fixture(autouse=True)
+def mock_init():
+    with patch("fah.pfreeathome.Client.__init__", return_value=None):
+        yield
+
+@pytest.fixture(autouse=True)
+def mock_roomnames():
+    with patch("fah.pfreeathome.get_room_names", return_value={"00":{"00":"room1", "01":"room2"}}):
+        yield
+
+async def test_device_table_is_plain_data():
+    table, updates, _ = describe_config(CONFIG, "localhost", True, False, COMPONENT_PATH)
+
+    # Survives the trip to another process, or to the config cache
+    assert json.loads(json.dumps(table)) == [dict(entry, datapoints=[list(dp) for dp in entry["datapoints"]],
+                                                  parameters=[list(pm) for pm in entry["parameters"]])
+                                             for entry in table]
+    entry = next(entry for entry in table if entry["channel_id"] == "ch000C" and entry["class"] == "FahLight")
+    assert entry["name"] == "Hinten rechts (room1)"
+    assert ("ABB2E0612345", "ch000C", "odp0000", "0") in updates
+
+async def test_discovery_matches_initial_state():
+    client = get_client()
+    await client.find_devices(True)
+
+    light = next(el for el in client.get_devices("light") if el.lookup_key == "ABB2E0612345/ch000C")
+    assert light.is_on() == False
+    assert client.discovery_parse_time > 0
+
+    await client.update_devices(load_fixture("B008_update_light.xml"))
+    assert light.is_on() == True
+
+async def test_discovery_in_process_pool():
+    client = get_client()
+    await client.discover_devices(CONFIG)
+    expected = sorted((type(device).__name__, device.lookup_key, device.name) for device in client.devices)
+
+    with ProcessPoolExecutor(1) as executor:
+        client = get_client()
+        client.discovery_executor = executor
+        await client.discover_devices(CONFIG)
+
+    assert sorted((type(device).__name__, device.lookup_key, device.name) for device in client.devices) == expected
+
+async def test_process_pool_tables_are_released():
+    # Names no other test has
+    config = CONFIG.replace("8/8fach, REG", "8/8fach, pool")
+    tables = len(SHARED_TABLES)
+
+    with ProcessPoolExecutor(1) as executor:
+        client = get_client()
+        client._host = "pool"
+        client.discovery_executor = executor
+        await client.discover_devices(config)
+
+    # The tables are held in this process, by the host of the client
+    assert len(SHARED_TABLES) > tables
+    assert any(device.device_info["model"] == "Sensor/ Schaltaktor 8/8fach, pool" for device in client.devices)
+    SHARED_TABLES.release("pool")
+    assert len(SHARED_TABLES) == tables
+
+async def test_nothing_is_parsed_on_the_loop():
+    config = large_config(10)
+    client = get_client()
+    await client.discover_devices(CONFIG)
+    devices = len(client.devices)
+
+    calls = []
+    def recorded(function):
+        def record(*args, **kwargs):
+            calls.append((function.__name__, threading.get_ident()))
+            return function(*args, **kwargs)
+        return record
+
+    with patch("fah.pfreeathome.parse_config_xml", recorded(parse_config_xml)), \
+            patch("fah.pfreeathome.parse_update_xml", recorded(parse_update_xml)), \
+            patch("fah.pfreeathome.strip_duplicate_attributes", recorded(strip_duplicate_attributes)), \
+            patch("fah.pfreeathome.section_digest", recorded(section_digest)):
+        await client.discover_devices(config)
+
+    assert len(client.devices) == 10 * devices
+    # The configuration was cleaned, parsed and hashed, all of it in the executor
+    assert {name for name, _ in calls} == {"parse_config_xml", "parse_update_xml", "strip_duplicate_attributes", "section_digest"}
+    assert threading.get_ident() not in {thread for _, thread in calls}
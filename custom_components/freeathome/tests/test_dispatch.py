@@ -0,0 +1,155 @@
+import pytest
+pytestmark = pytest.mark.asyncio
+
+import asyncio
+import os
+import time
+from async_mock import patch, AsyncMock
+
+from fah.pfreeathome import Client
+from fah.dispatch import CallbackDispatcher
+from common import load_fixture
+
+def get_client():
+    client = Client()
+    client.devices = set()
+    client.set_datapoint = AsyncMock()
+    client._host = "localhost"
+    client.component_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+    return client
+
+@pytest.fixture(autouse=True)
+def mock_init():
+    with patch("fah.pfreeathome.Client.__init__", return_value=None):
+        yield
+
+@pytest.fixture(autouse=True)
+def mock_roomnames():
+    with patch("fah.pfreeathome.get_room_names", return_value={"00":{"00":"room1", "01":"room2"}}):
+        yield
+
+def sleeping_callback(delay, calls):
+    async def callback(device):
+        await asyncio.sleep(delay)
+        calls.append(device.lookup_key)
+    return callback
+
+class Concurrency:
+    """Counts the callbacks running at the same time, and the most that ever did."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    def callback(self, delay, calls):
+        async def callback(device):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            try:
+                await asyncio.sleep(delay)
+                calls.append(device.lookup_key)
+            finally:
+                self.running -= 1
+        return callback
+
+async def find_devices(client):
+    await client.find_devices(False)
+    devices = sorted(client.devices, key=lambda device: device.lookup_key)
+    assert len(devices) >= 4
+    return devices
+
+@patch("fah.pfreeathome.Client.get_config", return_value=load_fixture("B008_sensor_actuator_8gang.xml"))
+class TestDispatch:
+    async def test_serial_by_default(self, _):
+        client = get_client()
+        devices = await find_devices(client)
+
+        calls = []
+        concurrency = Concurrency()
+        for device in devices[:4]:
+            device.register_device_updated_cb(concurrency.callback(0.01, calls))
+
+        await client.update_devices(load_fixture("B008_sensor_actuator_8gang.xml"))
+
+        assert len(calls) == 4
+        assert concurrency.peak == 1
+
+    async def test_latency_follows_slowest_callback(self, _):
+        client = get_client()
+        client.callback_dispatcher = CallbackDispatcher(concurrency=8)
+        devices = await find_devices(client)
+
+        calls = []
+        concurrency = Concurrency()
+        delays = [0.05, 0.1, 0.15, 0.3] * 2
+        for device, delay in zip(devices[:4] * 2, delays):
+            device.register_device_updated_cb(concurrency.callback(delay, calls))
+
+        start = time.monotonic()
+        await client.update_devices(load_fixture("B008_sensor_actuator_8gang.xml"))
+        elapsed = time.monotonic() - start
+
+        assert len(calls) == 8
+        # All of them ran at once, far from the sum of the delays
+        assert concurrency.peak == 8
+        assert elapsed < sum(delays) / 2
+
+    async def test_failures_are_isolated(self, _):
+        client = get_client()
+        dispatcher = CallbackDispatcher(timeout=0.1)
+        client.callback_dispatcher = dispatcher
+        devices = await find_devices(client)
+
+        calls = []
+
+        async def failing_callback(device):
+            raise RuntimeError("broken subscriber")
+
+        devices[0].register_device_updated_cb(failing_callback)
+        devices[0].register_device_updated_cb(sleeping_callback(0, calls))
+        devices[1].register_device_updated_cb(sleeping_callback(10, calls))
+        devices[2].register_device_updated_cb(sleeping_callback(0, calls))
+
+        start = time.monotonic()
+        await client.update_devices(load_fixture("B008_sensor_actuator_8gang.xml"))
+        elapsed = time.monotonic() - start
+
+        assert sorted(calls) == [devices[0].lookup_key, devices[2].lookup_key]
+        assert dispatcher.failures == 1
+        assert dispatcher.timeouts == 1
+        assert elapsed < 1
+
+    async def test_bounded_concurrency(self, _):
+        client = get_client()
+        client.callback_dispatcher = CallbackDispatcher(concurrency=2)
+        devices = await find_devices(client)
+
+        calls = []
+        concurrency = Concurrency()
+        for device in devices:
+            device.register_device_updated_cb(concurrency.callback(0.01, calls))
+
+        await client.update_devices(load_fixture("B008_sensor_actuator_8gang.xml"))
+
+        assert concurrency.peak == 2
+
+    async def test_after_update_with_dispatcher(self, _):
+        client = get_client()
+        devices = await find_devices(client)
+
+        calls = []
+        concurrency = Concurrency()
+        device = devices[0]
+        for delay in [0.01, 0.01, 0.01]:
+            device.register_device_updated_cb(concurrency.callback(delay, calls))
+
+        await device.after_update(CallbackDispatcher())
+
+        assert len(calls) == 3
+        assert concurrency.peak == 3
+
+
+async def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        CallbackDispatcher(concurrency=0)
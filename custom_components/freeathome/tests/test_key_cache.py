@@ -0,0 +1,56 @@
+import pytest
+
+import base64
+import hashlib
+
+from fah.clientscramhandler import ClientScramHandler
+from fah.crypto import Crypto
+from fah.keycache import DerivedKeyCache, DERIVED_KEYS
+
+SALT = bytes(range(32))
+SERVER_FIRST = "r=nonce,s=%s,i=4096" % base64.b64encode(SALT).decode()
+
+
+def test_derive_equals_pbkdf2():
+    keys = DerivedKeyCache()
+    expected = hashlib.pbkdf2_hmac("sha256", b"password", SALT, 10)
+
+    assert keys.derive("password", SALT, 10) == expected
+    assert keys.derive(b"password", bytearray(SALT), 10) is keys.derive("password", SALT, 10)
+    assert (keys.hits, keys.misses) == (2, 1)
+
+    assert keys.derive("other", SALT, 10) != expected
+    assert keys.derive("password", SALT, 11) != expected
+    assert keys.misses == 3
+
+
+def test_least_recently_used_key_is_dropped():
+    keys = DerivedKeyCache(maxsize=2)
+    keys.derive("a", SALT, 1)
+    keys.derive("b", SALT, 1)
+    keys.derive("a", SALT, 1)
+    keys.derive("c", SALT, 1)
+    assert len(keys) == 2
+
+    keys.derive("a", SALT, 1)
+    assert keys.misses == 3
+    keys.derive("b", SALT, 1)
+    assert keys.misses == 4
+
+    with pytest.raises(ValueError):
+        DerivedKeyCache(maxsize=0)
+
+
+def test_handshakes_share_keys():
+    DERIVED_KEYS.clear()
+    misses = DERIVED_KEYS.misses
+
+    for _ in range(2):
+        # A reconnect creates both again
+        crypto = Crypto("jid", "secret", 4096, base64.b64encode(SALT))
+        scram = ClientScramHandler()
+        scram.setServerFirst(SERVER_FIRST, "secret")
+
+        assert crypto.generateSharedKey() == hashlib.pbkdf2_hmac("sha256", b"secret", SALT, 4096)
+
+    assert DERIVED_KEYS.misses == misses + 1
@@ -3,9 +3,12 @@ pytestmark = pytest.mark.asyncio
 
 import os
 import logging
+import zlib
 from async_mock import call,patch, AsyncMock
 
 from fah.pfreeathome import Client
+from fah.codec import decode_on_off
+from fah.const import PID_SWITCH_ON_OFF
 from common import load_fixture
 
 LOG = logging.getLogger(__name__)
@@ -62,6 +65,17 @@ class TestLight:
         await client.update_devices(load_fixture("100C_update_light.xml"))
         assert light.is_on() == False
 
+    async def test_light_compressed_update(self, _):
+        client = get_client()
+        await client.find_devices(True)
+        light = next(el for el in client.get_devices("light") if el.lookup_key == "ABB700D12345/ch0003")
+        assert light.is_on() == True
+
+        # Parsed while inflated, as encrypted updates are
+        xml = load_fixture("100C_update_light.xml").encode("utf-8")
+        await client.update_compressed_devices(len(xml).to_bytes(4, "big") + zlib.compress(xml))
+        assert light.is_on() == False
+
 
     async def test_light_no_room_name(self, _):
         client = get_client()
@@ -73,6 +87,65 @@ class TestLight:
 
         assert light.name == "Büro"
 
+    async def test_datapoint_routes(self, _):
+        client = get_client()
+        await client.find_devices(False)
+
+        light = client.get_devices("light")[0]
+
+        # Only output datapoints are routed, straight to the handler of the datapoint
+        device, handler, attribute, codec = client.datapoint_routes[("ABB700D12345", "ch0003", "odp0000")]
+        assert device is light
+        assert handler == type(light)._set_value
+        assert attribute == "state"
+        assert codec is decode_on_off
+        assert ("ABB700D12345", "ch0003", "idp0000") not in client.datapoint_routes
+
+    async def test_transaction(self, _):
+        client = get_client()
+        await client.find_devices(False)
+
+        light = client.get_devices("light")[0]
+
+        # Writes to the same datapoint are sent once, with the last value
+        async with light.transaction() as transaction:
+            transaction.set(PID_SWITCH_ON_OFF, '1')
+            transaction.set(PID_SWITCH_ON_OFF, '0')
+            transaction.set_datapoint("idp0000", '1')
+            assert transaction.writes == {"idp0000": "1"}
+            client.set_datapoint.assert_not_called()
+
+        assert transaction.replaced == 2
+        client.set_datapoint.assert_called_once_with("ABB700D12345", "ch0003", "idp0000", "1")
+
+    async def test_transaction_rollback(self, _):
+        client = get_client()
+        await client.find_devices(False)
+
+        light = client.get_devices("light")[0]
+
+        with pytest.raises(RuntimeError):
+            async with light.transaction() as transaction:
+                transaction.set(PID_SWITCH_ON_OFF, '1')
+                raise RuntimeError()
+
+        client.set_datapoint.assert_not_called()
+
+    async def test_turn_on_failed(self, _):
+        client = get_client()
+        await client.find_devices(False)
+
+        light = client.get_devices("light")[0]
+        light.state = False
+        client.set_datapoints = AsyncMock(side_effect=RuntimeError("rejected"))
+
+        with pytest.raises(RuntimeError):
+            await light.turn_on()
+
+        # Nothing was switched, so the light is still off
+        assert light.is_on() == False
+        client.set_datapoints.assert_called_once_with("ABB700D12345", "ch0003", {"idp0000": "1"})
+
 
 @patch("fah.pfreeathome.Client.get_config", return_value=load_fixture("B008_sensor_actuator_8gang.xml"))
 class TestLight8Gang:
@@ -117,6 +190,19 @@ class TestLight8Gang:
 
         assert light.name == "Hinten rechts"
 
+    async def test_lights_share_maps(self, _):
+        client = get_client()
+        await client.find_devices(False)
+
+        first, second = client.get_devices("light")[:2]
+
+        # Equal channels share their datapoint map, routes and device info
+        assert not hasattr(first, "__dict__")
+        assert first.datapoints is second.datapoints
+        assert first.datapoint_routes is second.datapoint_routes
+        assert first.device_info is second.device_info
+        assert first.brightness is None
+
 @patch("fah.pfreeathome.Client.get_config", return_value=load_fixture("hue_dimmer.xml"))
 class TestDimmer:
     async def test_dimmer(self, _):
@@ -156,7 +242,7 @@ class TestDimmer:
 
         # Test device being turned off
         light.update_datapoint('odp0001', '36')
-        assert light.get_brightness() == '36'
+        assert light.get_brightness() == 36
 
         # Test device being turned off
         light.update_datapoint('odp0000', '0')
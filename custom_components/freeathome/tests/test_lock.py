@@ -50,7 +50,7 @@ class TestLock:
         assert lock.device_info["name"] == "Control panel (ABB654612345)"
         assert lock.device_info["model"] == 'free@homeTouch 7"'
         assert lock.device_info["sw_version"] == "0.2.1"
-        assert lock.state == '0'
+        assert lock.state is False
 
         # Test datapoints
         await lock.lock()
@@ -62,7 +62,7 @@ class TestLock:
 
         # Test device being turned off
         await client.update_devices(load_fixture("unknown_update_lock.xml"))
-        assert lock.state == '1'
+        assert lock.state is True
 
 
     async def test_lock_no_room_name(self, _):
@@ -0,0 +1,72 @@
+import pytest
+
+from fah.messagereader import MessageReader
+from fah.messagewriter import MessageWriter
+
+
+def test_round_trip():
+    writer = MessageWriter(capacity=4)
+    writer.writeUint8(7)
+    writer.writeUint32(0x12345678)
+    writer.writeString("grüße")
+    writer.writeBlob(b"\x01\x02\x03")
+    writer.writeUint32(5)
+    writer.writeUint32(0)
+    data = writer.toUint8Array()
+
+    assert isinstance(data, bytearray)
+    assert len(data) == len(writer) == 1 + 4 + 4 + len("grüße".encode()) + 3 + 8
+    assert data[:5] == b"\x07\x78\x56\x34\x12"
+
+    reader = MessageReader(bytes(data))
+    assert reader.readUint8() == 7
+    assert reader.readUint32() == 0x12345678
+    assert reader.readString() == "grüße"
+    assert reader.readBlob(3) == b"\x01\x02\x03"
+    assert reader.getRemainingData() == b"\x05" + bytes(7)
+    assert reader.readUint64() == 5
+    assert reader.getRemainingData() == b""
+
+
+def test_reader_values():
+    reader = MessageReader(bytearray(b"\x12\x34\x01\x02\x03\x04\x01\x00\x00\x00\x01\x00\x00\x00"))
+    assert reader.readUint16() == 0x3412
+    assert reader.readUint32BE() == 0x01020304
+    view = reader.getRemainingView()
+    assert isinstance(view, memoryview) and view.tobytes() == reader.getRemainingData()
+
+    with pytest.raises(Exception, match="upper 32 bits"):
+        reader.readUint64()
+
+
+def test_reader_checks_length():
+    reader = MessageReader(b"\x05\x00\x00\x00abc")
+    with pytest.raises(Exception, match="Insufficient data"):
+        reader.readString()
+
+    reader = MessageReader(b"\x01")
+    assert reader.readUint8() == 1
+    for read in (reader.readUint8, reader.readUint16, reader.readUint32, reader.readUint32BE, reader.readUint64):
+        with pytest.raises(Exception, match="Insufficient data"):
+            read()
+    with pytest.raises(Exception, match="Insufficient data"):
+        reader.readBlob(1)
+
+
+def test_writer_limits():
+    writer = MessageWriter()
+    with pytest.raises(Exception, match="Refusing"):
+        writer.writeUint8(256)
+    with pytest.raises(Exception, match="Refusing"):
+        writer.writeBlob(bytes(1024 * 1024 * 10 + 1))
+    assert writer.toUint8Array() == bytearray()
+
+
+def test_written_array_does_not_change():
+    writer = MessageWriter(capacity=2)
+    writer.writeBlob(b"abc")
+    first = writer.toUint8Array()
+    writer.writeUint8(1)
+
+    assert first == b"abc"
+    assert writer.toUint8Array() == b"abc\x01"
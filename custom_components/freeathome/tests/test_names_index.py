@@ -0,0 +1,108 @@
+import pytest
+
+import json
+import os
+import shutil
+
+from fah import namesindex
+from fah.namesindex import NamesIndex, build_names_index, load_names_index
+
+NAMES_JSON = os.path.join(os.path.dirname(os.path.dirname(__file__)), "names.json")
+NAMES_INDEX = NAMES_JSON[:-len(".json")] + ".idx"
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    namesindex._INDEXES.clear()
+    yield
+    namesindex._INDEXES.clear()
+
+@pytest.fixture
+def names_json(tmp_path):
+    path = str(tmp_path / "names.json")
+    shutil.copy(NAMES_JSON, path)
+    return path
+
+def json_names(path):
+    with open(path) as f:
+        return {item["nameId"]: item["string"] for item in json.load(f)["strings"]}
+
+def test_same_names_as_json(names_json):
+    names = load_names_index(names_json)
+
+    assert dict(names) == json_names(names_json)
+    assert names["FEF1"] == "Sensor/ Schaltaktor 8/8fach, REG"
+    assert names.get("ZZZZ", "unknown") == "unknown"
+    assert "FFFF0" not in names
+    with pytest.raises(KeyError):
+        names["EEEE"]
+
+def test_prebuilt_index_is_current():
+    names = load_names_index(NAMES_JSON)
+
+    with open(NAMES_JSON, "rb") as f:
+        assert bytes(names._buffer) == build_names_index(f.read())
+
+def test_shared_and_built_once(names_json):
+    names = load_names_index(names_json)
+    assert load_names_index(names_json) is names
+
+def shipped_index(names_json, json_newer=False):
+    """Copy the shipped index next to names_json, older than names_json if json_newer."""
+    index = names_json[:-len(".json")] + ".idx"
+    shutil.copy(NAMES_INDEX, index)
+    json_time = os.stat(names_json).st_mtime_ns
+    index_time = json_time - 10**9 if json_newer else json_time + 10**9
+    os.utime(index, ns=(index_time, index_time))
+    return index
+
+def test_shipped_index_without_reading_json(names_json, monkeypatch):
+    shipped_index(names_json)
+    def no_read(path, *args, **kwargs):
+        raise AssertionError("%s was read" % path)
+    monkeypatch.setattr(namesindex, "build_names_index", no_read)
+    monkeypatch.setattr(namesindex, "open", no_read, raising=False)
+    monkeypatch.setattr(namesindex, "_map", lambda path: bytes(open(path, "rb").read()))
+
+    names = load_names_index(names_json)
+    assert names["FEF1"] == "Sensor/ Schaltaktor 8/8fach, REG"
+
+def test_newer_json_with_same_contents(names_json, monkeypatch):
+    shipped_index(names_json, json_newer=True)
+    def no_build(data):
+        raise AssertionError("the index was built")
+    monkeypatch.setattr(namesindex, "build_names_index", no_build)
+
+    names = load_names_index(names_json)
+    assert names["FEF1"] == "Sensor/ Schaltaktor 8/8fach, REG"
+
+def test_rebuilt_for_edit_of_same_size(names_json):
+    with open(names_json, encoding="utf-8") as f:
+        data = f.read()
+    with open(names_json, "w", encoding="utf-8") as f:
+        f.write(data.replace("8/8fach, REG", "8/8fach, REX"))
+    shipped_index(names_json, json_newer=True)
+
+    names = load_names_index(names_json)
+    assert names["FEF1"] == "Sensor/ Schaltaktor 8/8fach, REX"
+
+def test_rebuilt_in_memory_for_other_json(names_json):
+    index = names_json[:-len(".json")] + ".idx"
+    shutil.copy(NAMES_INDEX, index)
+    with open(names_json, "w") as f:
+        json.dump({"strings": [{"nameId": "0001", "string": "Überall"}]}, f)
+
+    names = load_names_index(names_json)
+    assert dict(names) == {"0001": "Überall"}
+    # The stale index is left alone
+    with open(index, "rb") as f, open(NAMES_INDEX, "rb") as shipped:
+        assert f.read() == shipped.read()
+
+def test_missing_index_is_not_written(names_json):
+    names = load_names_index(names_json)
+
+    assert dict(names) == json_names(names_json)
+    assert not os.path.exists(names_json[:-len(".json")] + ".idx")
+
+def test_not_an_index():
+    with pytest.raises(ValueError):
+        NamesIndex(b"NOPE" + bytes(namesindex.HEADER.size))
@@ -0,0 +1,153 @@
+import pytest
+pytestmark = pytest.mark.asyncio
+
+import asyncio
+import os
+from async_mock import patch
+
+from fah.pfreeathome import Client
+from fah.pipeline import CommandPipeline
+from common import load_fixture
+
+RTT = 0.05
+
+class FakeSysAp:
+    """Answers every command after RTT seconds and records the order."""
+
+    def __init__(self, fail=()):
+        self.sent = []
+        self.answered = []
+        # ('sent' or 'answered', name, value) in the order they happened
+        self.events = []
+        self.fail = fail
+
+    async def send(self, method, name, value):
+        self.sent.append((name, value))
+        self.events.append(('sent', name, value))
+        await asyncio.sleep(RTT)
+        self.answered.append((name, value))
+        self.events.append(('answered', name, value))
+        if value in self.fail:
+            raise RuntimeError("rejected " + value)
+        return value
+
+    def most_outstanding(self):
+        """Return the most commands that were sent and not answered at the same time."""
+        outstanding = most = 0
+        for event, _, _ in self.events:
+            outstanding += 1 if event == 'sent' else -1
+            most = max(most, outstanding)
+        return most
+
+@pytest.fixture(autouse=True)
+def mock_init():
+    with patch("fah.pfreeathome.Client.__init__", return_value=None):
+        yield
+
+@pytest.fixture(autouse=True)
+def mock_roomnames():
+    with patch("fah.pfreeathome.get_room_names", return_value={"00":{"00":"room1", "01":"room2"}}):
+        yield
+
+async def test_commands_share_a_round_trip():
+    sysap = FakeSysAp()
+    pipeline = CommandPipeline(sysap.send, window=4)
+
+    futures = [pipeline.submit('dp%d' % i, 'set', 'dp%d' % i, str(i)) for i in range(4)]
+    results = await asyncio.gather(*futures)
+
+    assert results == ['0', '1', '2', '3']
+    # All of them were sent before the first reply
+    assert [event for event, _, _ in sysap.events] == ['sent'] * 4 + ['answered'] * 4
+    assert pipeline.max_in_flight == 4
+    assert pipeline.sent == 4
+    assert sum(pipeline.latency_histogram.values()) == 4
+
+async def test_window_limits_commands_in_flight():
+    sysap = FakeSysAp()
+    pipeline = CommandPipeline(sysap.send, window=2)
+
+    await asyncio.gather(*[pipeline.submit('dp%d' % i, 'set', 'dp%d' % i, str(i)) for i in range(6)])
+
+    assert pipeline.max_in_flight == 2
+    assert sysap.most_outstanding() == 2
+    assert len(sysap.answered) == 6
+
+async def test_same_datapoint_keeps_order():
+    sysap = FakeSysAp()
+    pipeline = CommandPipeline(sysap.send, window=4)
+
+    futures = [pipeline.submit('dp', 'set', 'dp', str(i)) for i in range(3)]
+    futures.append(pipeline.submit('other', 'set', 'other', 'x'))
+    await asyncio.gather(*futures)
+
+    assert [value for name, value in sysap.answered if name == 'dp'] == ['0', '1', '2']
+    # The other datapoint did not wait for the first one
+    assert sysap.sent[:2] == [('dp', '0'), ('other', 'x')]
+    assert pipeline.pending == 0
+
+async def test_failure_only_affects_its_command():
+    sysap = FakeSysAp(fail=('1',))
+    pipeline = CommandPipeline(sysap.send, window=4)
+
+    futures = [pipeline.submit('dp', 'set', 'dp', str(i)) for i in range(3)]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+
+    assert results[0] == '0'
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == '2'
+    assert pipeline.failed == 1
+
+async def test_coalesce_burst_of_writes():
+    sysap = FakeSysAp()
+    pipeline = CommandPipeline(sysap.send, window=4, coalesce=True)
+
+    first = pipeline.submit('dp', 'set', 'dp', '0')
+    # Let the first write go out, the others are sent after its reply
+    await asyncio.sleep(0)
+    assert sysap.sent == [('dp', '0')]
+
+    futures = [pipeline.submit('dp', 'set', 'dp', str(i)) for i in range(1, 10)]
+    other = pipeline.submit('other', 'set', 'other', 'x')
+    results = await asyncio.gather(first, *futures, other)
+
+    assert sysap.sent == [('dp', '0'), ('other', 'x'), ('dp', '9')]
+    assert results == ['0'] + ['9'] * 9 + ['x']
+    assert pipeline.dropped == 8
+    assert pipeline.sent == 3
+
+async def test_coalesce_cancelled_caller():
+    sysap = FakeSysAp()
+    pipeline = CommandPipeline(sysap.send, window=4, coalesce=True)
+
+    first = pipeline.submit('dp', 'set', 'dp', '0')
+    second = pipeline.submit('dp', 'set', 'dp', '1')
+    first.cancel()
+
+    assert await second == '1'
+    assert sysap.sent == [('dp', '1')]
+
+async def test_invalid_window():
+    with pytest.raises(ValueError):
+        CommandPipeline(None, window=0)
+
+@patch("fah.pfreeathome.Client.get_config", return_value=load_fixture("1022_dimming_actuator_6gang.xml"))
+async def test_light_turn_on_takes_one_round_trip(_):
+    client = Client()
+    client.devices = set()
+    client._host = "localhost"
+    client.component_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    await client.find_devices(False)
+
+    sysap = FakeSysAp()
+    client.send_rpc_command = sysap.send
+
+    light = client.get_devices("light")[0]
+    light.state = False
+    light.brightness = '50'
+
+    await light.turn_on()
+
+    assert len(sysap.answered) == 2
+    # Both writes were in flight at once
+    assert sysap.most_outstanding() == 2
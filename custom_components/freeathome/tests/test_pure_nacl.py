@@ -0,0 +1,102 @@
+import pytest
+
+import os
+import nacl.bindings
+
+from fah.pure_pynacl import (
+    IntArray,
+    crypto_core_hsalsa20_tweet,
+    crypto_onetimeauth_poly1305_tweet,
+    crypto_scalarmult_curve25519_tweet,
+    crypto_stream_xsalsa20_tweet_xor,
+)
+from fah.pure_pynacl import tweetnacl
+from fah.pure_pynacl.fastnacl import (
+    crypto_core_hsalsa20,
+    crypto_onetimeauth_poly1305,
+    crypto_onetimeauth_poly1305_verify,
+    crypto_scalarmult_curve25519,
+    crypto_scalarmult_curve25519_base,
+    crypto_secretbox_xsalsa20poly1305,
+    crypto_secretbox_xsalsa20poly1305_open,
+    crypto_stream_xsalsa20_xor,
+)
+
+# RFC 7748, 6.1
+ALICE_SECRET = bytes.fromhex("77076d0a7318a57d3c16c17251b26645df4c2f87ebc0992ab177fba51db92c2a")
+ALICE_PUBLIC = bytes.fromhex("8520f0098930a754748b7ddcb43ef75a0dbf3a0d26381af4eba4a98eaa9b4e6a")
+BOB_SECRET = bytes.fromhex("5dab087e624a8a4b79e17f8b83800ee66f3bb1292618b6fd1c2f8b27ff88e0eb")
+BOB_PUBLIC = bytes.fromhex("de9edb7d7b7dc1b4d35b61c2ece435373f8343c85b78674dadfc7e146f882b4f")
+SHARED = bytes.fromhex("4a5d9d5ba4ce2de1728e3bf480350f25e07e21c947d19e3376f09b3c1e161742")
+
+
+def tweet(function, size, *args):
+    """Call a tweetnacl function that writes size bytes to its first argument."""
+    out = IntArray(tweetnacl.u8, size=size)
+    function(out, *args)
+    return bytes(out[:size])
+
+
+@pytest.mark.parametrize("key, message, tag", [
+    # RFC 8439, 2.5.2
+    ("85d6be7857556d337f4452fe42d506a80103808afb0db2fd4abff6af4149f51b",
+     b"Cryptographic Forum Research Group".hex(), "a8061dc1305136c6c22b8baf0c0127a9"),
+    # RFC 8439, A.3 #1 and #5
+    ("00" * 32, "00" * 64, "00" * 16),
+    ("02" + "00" * 31, "ff" * 16, "03" + "00" * 15),
+    ])
+def test_poly1305_known_answers(key, message, tag):
+    key, message, tag = bytes.fromhex(key), bytes.fromhex(message), bytes.fromhex(tag)
+    assert crypto_onetimeauth_poly1305(message, key) == tag
+    assert crypto_onetimeauth_poly1305_verify(tag, message, key) == 0
+    assert crypto_onetimeauth_poly1305_verify(bytes(16), message, key) == (0 if tag == bytes(16) else -1)
+
+
+def test_curve25519_known_answers():
+    assert crypto_scalarmult_curve25519_base(ALICE_SECRET) == ALICE_PUBLIC
+    assert crypto_scalarmult_curve25519_base(BOB_SECRET) == BOB_PUBLIC
+    assert crypto_scalarmult_curve25519(ALICE_SECRET, BOB_PUBLIC) == SHARED
+    assert crypto_scalarmult_curve25519(BOB_SECRET, ALICE_PUBLIC) == SHARED
+    # RFC 7748, 5.2
+    assert crypto_scalarmult_curve25519(
+        bytes.fromhex("a546e36bf0527c9d3b16154b82465edd62144c0ac1fc5a18506a2244ba449ac4"),
+        bytes.fromhex("e6db6867583030db3594c1a424b15f7c726624ec26b3353b10a903a6d0ab1c4c"),
+    ) == bytes.fromhex("c3da55379de9c6908e94ea4df28d084f32eccf03491c71f754b4075577a28552")
+
+
+def test_hsalsa20_known_answer():
+    # The first key of the NaCl box, core1 of the NaCl tests
+    assert crypto_core_hsalsa20(bytes(16), SHARED) == bytes.fromhex(
+        "1b27556473e985d462cd51197a9a46c76009549eac6474f206c4ee0844f68389")
+
+
+@pytest.mark.parametrize("length", [0, 1, 15, 16, 17, 63, 64, 65, 130])
+def test_equal_to_tweetnacl(length):
+    key, nonce, message = os.urandom(32), os.urandom(24), os.urandom(length)
+
+    assert crypto_onetimeauth_poly1305(message, key) == tweet(
+        crypto_onetimeauth_poly1305_tweet, 16, message, length, key)
+    assert crypto_stream_xsalsa20_xor(message, nonce, key) == tweet(
+        crypto_stream_xsalsa20_tweet_xor, length, message, length, nonce, key)
+    assert crypto_core_hsalsa20(nonce[:16], key) == tweet(
+        crypto_core_hsalsa20_tweet, 32, nonce[:16], key, tweetnacl.sigma)
+
+
+def test_scalarmult_equal_to_tweetnacl():
+    secret, public = os.urandom(32), os.urandom(32)
+    assert crypto_scalarmult_curve25519(secret, public) == tweet(
+        crypto_scalarmult_curve25519_tweet, 32, secret, public)
+
+
+@pytest.mark.parametrize("length", [0, 1, 64, 1000])
+def test_equal_to_libsodium(length):
+    key, nonce, message = os.urandom(32), os.urandom(24), os.urandom(length)
+
+    box = crypto_secretbox_xsalsa20poly1305(message, nonce, key)
+    assert box == nacl.bindings.crypto_secretbox(message, nonce, key)
+    assert crypto_secretbox_xsalsa20poly1305_open(box, nonce, key) == message
+    forged = box[:-1] + bytes([box[-1] ^ 1]) if length else bytes([box[0] ^ 1]) + box[1:]
+    assert crypto_secretbox_xsalsa20poly1305_open(forged, nonce, key) is None
+
+    secret = os.urandom(32)
+    assert crypto_scalarmult_curve25519_base(secret) == nacl.bindings.crypto_scalarmult_base(secret)
@@ -0,0 +1,139 @@
+import random
+import time
+import pytest
+
+from fah.replaywindow import ReplayWindow
+from common import encrypt_update, get_crypto
+
+
+class ReferenceWindow:
+    """The replay window as sets, the straightforward way."""
+
+    def __init__(self, size, start=None):
+        self.size = size
+        self.received = set()
+        self.highest = None if start is None else start - 1
+        self.start = start
+
+    def accept(self, sequence):
+        if self.start is not None and sequence < self.start:
+            return False
+        if self.highest is not None and sequence <= self.highest - self.size:
+            return False
+        if sequence in self.received:
+            return False
+        self.received.add(sequence)
+        if self.highest is None or sequence > self.highest:
+            self.highest = sequence
+        return True
+
+
+def sequences(rng, count):
+    """Sequence numbers as they arrive: mostly in order, some reordered, some lost, some replayed."""
+    result = []
+    sequence = 0
+    for _ in range(count):
+        choice = rng.random()
+        if choice < 0.1 and result:
+            result.append(rng.choice(result[-100:]))
+        elif choice < 0.2:
+            result.append(max(0, sequence - rng.randrange(1, 100)))
+        else:
+            sequence += rng.choice((1, 1, 1, 2, 5, 70))
+            result.append(sequence)
+    return result
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("size", [1, 8, 32, 64, 128])
+def test_matches_reference(seed, size):
+    rng = random.Random(seed)
+    start = rng.choice((None, 0, 10))
+    window = ReplayWindow(size, start=start)
+    reference = ReferenceWindow(size, start=start)
+
+    for sequence in sequences(rng, 500):
+        expected = reference.accept(sequence)
+        assert window.check(sequence) == expected
+        assert window.accept(sequence) == expected, sequence
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_every_sequence_is_accepted_once(seed):
+    rng = random.Random(seed)
+    order = list(range(1000))
+    # Shuffle within blocks smaller than the window, nothing is too old then
+    for block in range(0, len(order), 32):
+        part = order[block:block + 32]
+        rng.shuffle(part)
+        order[block:block + 32] = part
+
+    window = ReplayWindow(64, start=0)
+    assert all(window.accept(sequence) for sequence in order)
+    assert not any(window.accept(sequence) for sequence in rng.sample(order, 100))
+    assert window.next_sequence == 1000
+
+
+def test_large_gap():
+    window = ReplayWindow(64, start=0)
+    assert window.accept(0)
+    start = time.perf_counter()
+    assert window.accept(2 ** 32 - 1)
+    assert window.accept(2 ** 64 - 1)
+    assert time.perf_counter() - start < 0.1
+    assert not window.accept(2 ** 64 - 1)
+    assert window.accept(2 ** 64 - 2)
+    assert not window.accept(2 ** 32 - 1)
+
+
+def test_window():
+    window = ReplayWindow(4, start=5)
+    assert not window.accept(4)
+    assert window.accept(7)
+    assert window.accept(5)
+    assert not window.accept(5)
+    # 6 is skipped until it leaves the window
+    assert window.check(6)
+    assert window.accept(10)
+    assert not window.accept(6)
+    assert window.accept(8)
+
+    window = ReplayWindow()
+    assert window.next_sequence is None
+    assert window.accept(1000)
+    assert window.accept(999)
+    assert not window.accept(1000)
+
+    with pytest.raises(ValueError):
+        ReplayWindow(0)
+
+
+def test_crypto_rejects_replayed_update():
+    crypto = get_crypto(sequence=3)
+    first, second = encrypt_update(3, "<a/>"), encrypt_update(5, "<b/>")
+
+    crypto.decryptPubSub(second)
+    crypto.decryptPubSub(first)
+    with pytest.raises(Exception, match="Unexpected sequence"):
+        crypto.decryptPubSub(first)
+    with pytest.raises(Exception, match="Unexpected sequence"):
+        crypto.decryptPubSub(encrypt_update(2, "<c/>"))
+
+
+def test_crypto_without_sequence_in_key_data():
+    crypto = get_crypto()
+    del crypto._Crypto__Yq["update"]
+
+    crypto.decryptPubSub(encrypt_update(42, "<a/>"))
+    with pytest.raises(Exception, match="Unexpected sequence"):
+        crypto.decryptPubSub(encrypt_update(42, "<a/>"))
+
+
+def test_crypto_forged_update_does_not_move_window():
+    crypto = get_crypto()
+
+    with pytest.raises(Exception):
+        crypto.decryptPubSub(encrypt_update(2 ** 32 - 1, "<forged/>", key=bytes(32)))
+    crypto.decryptPubSub(encrypt_update(0, "<a/>"))
+    crypto.decryptPubSub(encrypt_update(1, "<b/>"))
+
@@ -59,7 +59,7 @@ class TestMovementDetectorLuxSensor:
         assert sensor.device_info["name"] == "Bewegungssensor (ABB700C12345)"
         assert sensor.device_info["model"] == "Bewegungsmelder/Schaltaktor 1-fach"
         assert sensor.device_info["sw_version"] == "2.1366"
-        assert sensor.state == "20"
+        assert sensor.state == 20.0
 
         # Test device event
         await client.update_devices(load_fixture("100A_update_movement_detector.xml"))
@@ -94,7 +94,7 @@ class TestWeatherStation:
         assert sensor.device_info["name"] == "Weather station (ABB121212345)"
         assert sensor.device_info["model"] == "Wetterstation"
         assert sensor.device_info["sw_version"] == "2.1366"
-        assert sensor.state == "100"
+        assert sensor.state == 100.0
 
         # Test attributes for temperature sensor
         sensor = next((el for el in sensor_devices if el.lookup_key == "ABB121212345/ch0002"))
@@ -106,7 +106,7 @@ class TestWeatherStation:
         assert sensor.device_info["name"] == "Weather station (ABB121212345)"
         assert sensor.device_info["model"] == "Wetterstation"
         assert sensor.device_info["sw_version"] == "2.1366"
-        assert sensor.state == "16.0"
+        assert sensor.state == 16.0
 
         # Test attributes for wind sensor
         sensor = next((el for el in sensor_devices if el.lookup_key == "ABB121212345/ch0003"))
@@ -118,7 +118,7 @@ class TestWeatherStation:
         assert sensor.device_info["name"] == "Weather station (ABB121212345)"
         assert sensor.device_info["model"] == "Wetterstation"
         assert sensor.device_info["sw_version"] == "2.1366"
-        assert sensor.state == "42"
+        assert sensor.state == 42.0
 
         # Test attributes for wind force sensor, which shares the channel with the wind speed
         # sensor and therefore has the datapoint in its lookup key
@@ -127,7 +127,7 @@ class TestWeatherStation:
         assert sensor.type == "windforce"
         assert sensor.serialnumber == "ABB121212345"
         assert sensor.channel_id == "ch0003"
-        assert sensor.state == "2"
+        assert sensor.state == 2
 
 
     async def test_wind_speed_and_wind_force_do_not_overwrite_each_other(self, _):
@@ -141,6 +141,6 @@ class TestWeatherStation:
 
         await client.update_devices(load_fixture("101D_update_wind.xml"))
 
-        assert speed.state == "5.6"
-        assert force.state == "4"
+        assert speed.state == 5.6
+        assert force.state == 4
 
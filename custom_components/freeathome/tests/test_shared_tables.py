@@ -0,0 +1,84 @@
+import pytest
+
+import os
+from async_mock import patch
+
+from fah.pfreeathome import describe_config
+from fah.sharedtables import SharedTables, SHARED_TABLES, get_section, section_digest
+from common import load_fixture
+
+CONFIG = load_fixture("B008_sensor_actuator_8gang.xml")
+COMPONENT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+@pytest.fixture(autouse=True)
+def mock_roomnames():
+    with patch("fah.pfreeathome.get_room_names", return_value={"00":{"00":"room1", "01":"room2"}}):
+        yield
+
+def test_get_section():
+    xml = '<project><stringsX/><strings a="1"><string>x</string></strings></project>'
+    assert get_section(xml, "strings") == '<strings a="1"><string>x</string></strings>'
+    assert get_section(xml, "stringsX") == '<stringsX/>'
+    assert get_section(xml, "floorplan") is None
+
+def test_equal_xml_shares_one_table():
+    tables = SharedTables()
+    first = tables.get("strings", "<strings/>", "sysap1", lambda: {"a": "b"})
+    second = tables.get("strings", "<strings/>", "sysap2", lambda: {"a": "other"})
+
+    assert second is first
+    assert (tables.hits, tables.misses) == (1, 1)
+    assert len(tables) == 1
+
+def test_release_drops_unused_tables():
+    tables = SharedTables()
+    tables.get("strings", "<strings/>", "sysap1", dict)
+    tables.get("strings", "<strings/>", "sysap2", dict)
+    tables.get("floorplan", "<floorplan/>", "sysap2", dict)
+
+    tables.release("sysap2")
+    assert len(tables) == 1
+    tables.release("sysap1")
+    assert len(tables) == 0
+
+def test_changed_xml_replaces_table_of_owner():
+    tables = SharedTables()
+    tables.get("strings", "<strings>1</strings>", "sysap1", dict)
+    tables.get("strings", "<strings>2</strings>", "sysap1", dict)
+
+    assert len(tables) == 1
+    tables.release("sysap1")
+    assert len(tables) == 0
+
+def test_add_keeps_the_first_table():
+    tables = SharedTables()
+    first = tables.add("strings", section_digest("<strings/>"), "sysap1", {"a": "b"})
+    second = tables.add("strings", section_digest("<strings/>"), "sysap2", {"a": "b"})
+
+    assert second is first
+    assert tables.get("strings", "<strings/>", "sysap3", dict) is first
+    assert (tables.hits, tables.misses) == (2, 1)
+
+def hold(owner, shared):
+    return {kind: SHARED_TABLES.add(kind, digest, owner, table) for kind, (digest, table) in shared.items()}
+
+def test_sysaps_share_names():
+    # Names no other test has
+    config = CONFIG.replace("8/8fach, REG", "8/8fach, shared")
+    tables = len(SHARED_TABLES)
+    try:
+        first, _, first_shared = describe_config(config, "sysap1", True, False, COMPONENT_PATH)
+        second, _, second_shared = describe_config(config, "sysap2", True, False, COMPONENT_PATH)
+        assert "strings" in first_shared
+
+        held = hold("sysap1", first_shared)
+        assert held["strings"] is first_shared["strings"][1]
+        # Built again by the second, but the first table is kept
+        assert hold("sysap2", second_shared)["strings"] is held["strings"]
+        assert [entry["device_info"]["model"] for entry in first] == [entry["device_info"]["model"] for entry in second]
+        assert first[0]["device_info"]["model"] == "Sensor/ Schaltaktor 8/8fach, shared"
+    finally:
+        SHARED_TABLES.release("sysap1")
+        SHARED_TABLES.release("sysap2")
+
+    assert len(SHARED_TABLES) == tables
@@ -0,0 +1,61 @@
+import pytest
+pytestmark = pytest.mark.asyncio
+
+import os
+from async_mock import patch, AsyncMock
+
+from fah.pfreeathome import Client
+from fah.updateparser import parse_update
+from synthetic import generate_config, generate_updates
+
+def get_client(config):
+    client = Client()
+    client.devices = set()
+    client._host = "localhost"
+    client.component_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    client.get_config = AsyncMock(return_value=config)
+
+    return client
+
+@pytest.fixture(autouse=True)
+def mock_init():
+    with patch("fah.pfreeathome.Client.__init__", return_value=None):
+        yield
+
+async def test_generated_config():
+    installation = generate_config(60, floors=2, rooms=3, seed=1)
+    assert installation.config == generate_config(60, floors=2, rooms=3, seed=1).config
+    assert installation.config != generate_config(60, floors=2, rooms=3, seed=2).config
+
+    client = get_client(installation.config)
+    await client.find_devices(True)
+
+    assert len(installation.serialnumbers) == len(set(installation.serialnumbers)) == 60
+    assert {device.serialnumber for device in client.devices} <= set(installation.serialnumbers)
+    assert len({device.serialnumber for device in client.devices}) > 30
+
+    # Every device is in a room of the floorplan
+    room_names = {name for rooms in installation.rooms.values() for name in rooms.values()}
+    assert len(room_names) == 6
+    for device in client.devices:
+        assert any("(%s)" % name in device.name for name in room_names)
+
+async def test_generated_updates():
+    installation = generate_config(20, seed=1)
+    datapoints = {datapoint[:3] for datapoint in installation.datapoints}
+    updates = list(generate_updates(installation, 50, max_values=4, seed=1))
+
+    assert len(updates) == 50
+    assert updates == list(generate_updates(installation, 50, max_values=4, seed=1))
+    for update in updates:
+        values = parse_update(update)
+        assert 1 <= len(values) <= 4
+        assert {value[:3] for value in values} <= datapoints
+
+    # Some of them reach devices
+    client = get_client(installation.config)
+    await client.find_devices(False)
+    routed = [value for update in updates for value in parse_update(update) if value[:3] in client.datapoint_routes]
+    assert routed
+    for update in updates:
+        await client.update_devices(update)
@@ -0,0 +1,103 @@
+import os
+import pytest
+import tracemalloc
+import zlib
+import xml.etree.ElementTree as ET
+
+from fah.pfreeathome import parse_compressed_update, parse_update_xml
+from fah.updateparser import UpdateParser, parse_update, DuplicateAttributeError
+from common import load_fixture, tree_parse_update
+
+FIXTURES = sorted(f for f in os.listdir(os.path.join(os.path.dirname(__file__), "fixtures")) if f.endswith(".xml"))
+
+
+@pytest.mark.parametrize("fixture", [f for f in FIXTURES if f != "duplicate-attributes.xml"])
+def test_same_result_as_element_tree(fixture):
+    xml = load_fixture(fixture)
+    assert parse_update(xml) == tree_parse_update(xml)
+
+
+@pytest.mark.parametrize("fixture", ["1013_update_force_opening.xml", "B008_sensor_actuator_8gang.xml"])
+def test_feed_in_chunks(fixture):
+    xml = load_fixture(fixture).encode("utf-8")
+    parser = UpdateParser()
+    updates = []
+    for pos in range(0, len(xml), 97):
+        updates.extend(parser.feed(xml[pos:pos + 97]))
+    updates.extend(parser.close())
+
+    assert updates == tree_parse_update(xml.decode("utf-8"))
+
+
+def test_update_tuples():
+    updates = parse_update(load_fixture("1013_update_closed.xml"))
+    assert updates == [
+            ("ABB700D12345", "ch0003", "odp0000", "1"),
+            ("ABB700D12345", "ch0003", "odp0001", "100"),
+            ]
+
+
+def test_match_code_filter():
+    # Only datapoints that match the sensor/actuator match code of the active function are reported
+    updates = parse_update(load_fixture("100C_sensor_actuator_1gang.xml"))
+    assert ("ABB700D12345", "ch0000", "odp0000", "1") in updates
+    assert ("ABB700D12345", "ch0000", "odp0002", "0") not in updates
+
+
+def test_duplicate_attributes():
+    with pytest.raises(DuplicateAttributeError):
+        parse_update(load_fixture("duplicate-attributes.xml"))
+
+
+def test_skip_unmonitored_channels():
+    xml = load_fixture("1013_update_force_opening.xml")
+    parser = UpdateParser({"ABB700D12345": {"ch0003"}})
+    updates = parser.feed(xml) + parser.close()
+
+    assert updates == [u for u in tree_parse_update(xml) if u[1] == "ch0003"]
+    # ch0000 was skipped: the channel, its inputs, outputs, the dataPoint and value
+    assert parser.skipped_elements > 0
+    assert parser.skipped_bytes == len(xml[xml.index('<channel state="modified" i="ch0000"'):xml.index('</channel>') + len('</channel>')].encode("utf-8"))
+
+
+def test_skip_unmonitored_devices():
+    xml = load_fixture("B008_sensor_actuator_8gang.xml")
+    parser = UpdateParser({"ABB700D12345": {"ch0003"}})
+    updates = parser.feed(xml) + parser.close()
+
+    assert updates == []
+    # Every element of the device, including the device itself
+    device = ET.fromstring(xml).find("devices/device")
+    assert parser.skipped_elements == len(list(device.iter()))
+
+
+def compress_update(xml):
+    raw = xml.encode("utf-8")
+    return len(raw).to_bytes(4, "big") + zlib.compress(raw)
+
+
+@pytest.mark.parametrize("fixture", FIXTURES)
+def test_compressed_same_result(fixture):
+    xml = load_fixture(fixture)
+    # Small chunks split multibyte characters and tags
+    updates, _ = parse_compressed_update(compress_update(xml), None, chunk_size=97)
+    assert updates == parse_update_xml(xml, None)[0]
+
+
+def test_compressed_memory_is_bounded():
+    channel = load_fixture("B008_sensor_actuator_8gang.xml")
+    channel = channel[channel.index("<devices>") + len("<devices>"):channel.index("</devices>")]
+    xml = "<update><devices>%s</devices></update>" % (channel * 100)
+    message = compress_update(xml)
+
+    tracemalloc.start()
+    try:
+        updates, _ = parse_compressed_update(message, {})
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert updates == []
+    assert len(xml) > 10 * 1024 * 1024
+    assert peak < 1024 * 1024
+
@@ -0,0 +1,209 @@
+import pytest
+pytestmark = pytest.mark.asyncio
+
+import asyncio
+import base64
+import functools
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from fah.updatepipeline import UpdatePipeline, STAGES, MAX_UPDATE_SIZE, inflate_chunks, inflate_update
+from fah.pfreeathome import parse_compressed_update
+from common import encrypt_update, get_crypto
+
+class SlowCrypto:
+    """Opens the updates of crypto, the first one slower than the others."""
+
+    def __init__(self, crypto, delay):
+        self.crypto = crypto
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def openPubSub(self, data_bytes):
+        with self.lock:
+            delay, self.delay = self.delay, 0
+        time.sleep(delay)
+        return self.crypto.openPubSub(data_bytes)
+
+    def __getattr__(self, name):
+        return getattr(self.crypto, name)
+
+
+async def test_crypto_steps_equal_decrypt():
+    data = encrypt_update(0, "<update/>")
+    crypto = get_crypto()
+
+    sequence = crypto.pubSubSequence(data)
+    assert sequence == 0
+    crypto.checkPubSubSequence(sequence)
+    opened = crypto.openPubSub(base64.b64decode(data))
+    crypto.acceptPubSubSequence(sequence)
+
+    assert inflate_update(opened) == "<update/>"
+    assert get_crypto().decryptPubSub(data) == opened
+
+
+async def test_updates_are_applied_in_order():
+    crypto = get_crypto()
+    applied = []
+
+    async def apply(xml):
+        applied.append(xml)
+
+    with ThreadPoolExecutor(4) as executor:
+        pipeline = UpdatePipeline(executor, max_pending=4)
+        slow = SlowCrypto(crypto, 0.2)
+        updates = [encrypt_update(i, "<update%d/>" % i) for i in range(8)]
+        await asyncio.gather(*[pipeline.process(slow, data, apply) for data in updates])
+
+    assert applied == ["<update%d/>" % i for i in range(8)]
+    assert pipeline.processed == 8
+    assert pipeline.depth == 0
+    assert pipeline.max_depth == 8
+    assert set(pipeline.stage_times) == set(STAGES)
+    # The first update held everybody up
+    assert pipeline.stage_times["order"] > 0.1
+
+
+async def test_pipeline_is_bounded():
+    crypto = get_crypto()
+
+    async def apply(xml):
+        pass
+
+    class CountingCrypto:
+        """Counts the updates that are opened at the same time."""
+        lock = threading.Lock()
+        current = 0
+        most = 0
+
+        def openPubSub(self, data_bytes):
+            with self.lock:
+                self.current += 1
+                self.most = max(self.most, self.current)
+            time.sleep(0.01)
+            with self.lock:
+                self.current -= 1
+            return crypto.openPubSub(data_bytes)
+
+        def __getattr__(self, name):
+            return getattr(crypto, name)
+
+    counting = CountingCrypto()
+    with ThreadPoolExecutor(4) as executor:
+        pipeline = UpdatePipeline(executor, max_pending=2)
+        await asyncio.gather(*[pipeline.process(counting, encrypt_update(i, "<u/>"), apply) for i in range(6)])
+
+    assert pipeline.processed == 6
+    assert counting.most == 2
+
+    with pytest.raises(ValueError):
+        UpdatePipeline(max_pending=0)
+
+
+async def test_failed_update_is_skipped():
+    crypto = get_crypto()
+    applied = []
+
+    async def apply(xml):
+        applied.append(xml)
+
+    pipeline = UpdatePipeline()
+    updates = [encrypt_update(0, "<first/>"), encrypt_update(1, "<forged/>", key=bytes(32)), encrypt_update(2, "<last/>")]
+    await asyncio.gather(*[pipeline.process(crypto, data, apply) for data in updates])
+    pipeline.close()
+
+    assert applied == ["<first/>", "<last/>"]
+    assert (pipeline.processed, pipeline.failed) == (2, 1)
+
+
+async def test_forged_update_does_not_move_window():
+    crypto = get_crypto()
+    applied = []
+
+    async def apply(xml):
+        applied.append(xml)
+
+    pipeline = UpdatePipeline()
+    forged = encrypt_update(1000, "<forged/>", key=bytes(32))
+    updates = [forged, encrypt_update(0, "<first/>"), encrypt_update(0, "<replayed/>"), encrypt_update(1, "<last/>")]
+    for data in updates:
+        # What pub_sub_callback does before handing an update to the pipeline
+        crypto.checkPubSubSequence(crypto.pubSubSequence(data))
+    await asyncio.gather(*[pipeline.process(crypto, data, apply) for data in updates])
+    pipeline.close()
+
+    assert applied == ["<first/>", "<last/>"]
+    assert (pipeline.processed, pipeline.failed) == (2, 2)
+
+
+async def test_parse_while_inflating_in_worker():
+    crypto = get_crypto()
+    xml = ('<project type="update"><devices><device serialNumber="ABB700D12345"><channels>'
+           '<channel i="ch0003"><outputs><dataPoint i="odp0000"><value>%d</value></dataPoint></outputs></channel>'
+           '</channels></device></devices></project>')
+    applied = []
+
+    async def apply(parsed):
+        updates, parser = parsed
+        applied.extend(updates)
+
+    pipeline = UpdatePipeline()
+    # Like pub_sub_callback without update handlers, the worker hands over parsed updates
+    read = functools.partial(parse_compressed_update, monitored=None, chunk_size=16)
+    updates = [encrypt_update(0, xml % 1), encrypt_update(1, xml % 0, length=len(xml) - 5), encrypt_update(2, xml % 0)]
+    await asyncio.gather(*[pipeline.process(crypto, data, apply, read) for data in updates])
+    pipeline.close()
+
+    # The update longer than it declared was stopped while inflating
+    assert applied == [("ABB700D12345", "ch0003", "odp0000", "1"), ("ABB700D12345", "ch0003", "odp0000", "0")]
+    assert (pipeline.processed, pipeline.failed) == (2, 1)
+
+
+async def test_event_loop_runs_while_opening():
+    crypto = get_crypto()
+    xml = "<update>%s</update>" % ("<datapoint>1</datapoint>" * 200000)
+    data = encrypt_update(0, xml)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    async def apply(result):
+        assert result == xml
+
+    ticker = asyncio.ensure_future(tick())
+    pipeline = UpdatePipeline()
+    await pipeline.process(SlowCrypto(crypto, 0.1), data, apply)
+    pipeline.close()
+    ticker.cancel()
+
+    assert ticks > 10
+
+
+async def test_inflate_in_chunks():
+    raw = b"<update>%s</update>" % (b"<datapoint>1</datapoint>" * 10000)
+    chunks = list(inflate_chunks(len(raw).to_bytes(4, "big") + zlib.compress(raw), 1000))
+
+    assert b"".join(chunks) == raw
+    assert max(len(chunk) for chunk in chunks) == 1000
+
+
+async def test_inflate_is_capped():
+    raw = b"<update/>" * 1000
+    compressed = zlib.compress(raw)
+
+    with pytest.raises(ValueError):
+        inflate_update(len(raw[:-1]).to_bytes(4, "big") + compressed)
+    with pytest.raises(ValueError):
+        inflate_update((MAX_UPDATE_SIZE + 1).to_bytes(4, "big") + compressed)
+    with pytest.raises(zlib.error):
+        inflate_update(len(raw).to_bytes(4, "big") + compressed[:-10])
+    # Shorter than declared is only logged
+    assert inflate_update((len(raw) + 1).to_bytes(4, "big") + compressed) == raw.decode()
+